@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import numpy as np
+
+import FilterDesign
+import TapCache
+import CaptureReader
+
+APT_RATE = 4160
+
+# block-wise NumPy version of the APT decode chain in the NOAA flowgraph:
+#
+#   band_pass_filter_0 (500-4200 Hz) -> rational_resampler_xxx_0_0
+#   -> hilbert_fc_0 -> blocks_complex_to_mag_0 -> rational_resampler_xxx_1_0
+#
+# every block of audio is filtered, turned into an analytic signal and
+# resampled to 4160 samples/s entirely in the frequency domain. Blocks
+# overlap by a margin on each side so the circular FFT edges are discarded.
+
+def gcd(a,b):
+  while b:
+    a, b = b, a%b
+  return a
+
+class APTDemodulator():
+  def __init__(self,audio_rate = 11025,low_cutoff = 500,high_cutoff = 4.2e3,
+      transition = 200,gain = 1.0,block_seconds = 5.0,output_rate = APT_RATE):
+    self.audio_rate = int(audio_rate)
+    self.output_rate = int(output_rate)
+    self.gain = gain
+    # smallest input/output block pair that maps to whole samples
+    g = gcd(self.audio_rate,self.output_rate)
+    self.unit_in = self.audio_rate // g
+    self.unit_out = self.output_rate // g
+    self.taps = TapCache.band_pass(gain,self.audio_rate,low_cutoff,high_cutoff,
+      transition,FilterDesign.WIN_HAMMING,6.76)
+    # the margin must swallow the filter length and the resampler's ringing
+    margin_units = 1
+    while margin_units * self.unit_in < max(len(self.taps),self.audio_rate // 10):
+      margin_units += 1
+    core_units = max(1,int(block_seconds * self.audio_rate) // self.unit_in)
+    self.margin = margin_units * self.unit_in
+    self.core = core_units * self.unit_in
+    self.seg = self.core + 2 * self.margin
+    self.margin_out = margin_units * self.unit_out
+    self.core_out = core_units * self.unit_out
+    self.seg_out = self.core_out + 2 * self.margin_out
+    self.mask = self.design_mask()
+    self.reset()
+
+  def reset(self):
+    # the stream starts with a silent left margin
+    self.buffer = np.zeros(self.margin,dtype=np.float32)
+    self.samples_in = 0
+    self.samples_out = 0
+
+  # band-pass response and analytic-signal mask combined into one
+  # set of weights for the rfft bins of a segment
+  def design_mask(self):
+    ntaps = len(self.taps)
+    m = (ntaps - 1) // 2
+    h = np.zeros(self.seg,dtype=np.float64)
+    # zero-phase: the center tap sits at index 0
+    h[:m+1] = self.taps[m:]
+    h[self.seg-m:] = self.taps[:m]
+    mask = np.fft.rfft(h)
+    mask[1:] *= 2
+    if self.seg % 2 == 0:
+      mask[-1] /= 2
+    return mask
+
+  def process_segment(self,seg):
+    spectrum = np.fft.rfft(seg) * self.mask
+    analytic = np.zeros(self.seg,dtype=np.complex128)
+    analytic[:len(spectrum)] = spectrum
+    envelope = np.abs(np.fft.ifft(analytic))
+    # resample the envelope by truncating its spectrum
+    spectrum = np.fft.rfft(envelope)[:self.seg_out//2+1]
+    out = np.fft.irfft(spectrum,self.seg_out) * (float(self.seg_out) / self.seg)
+    return out[self.margin_out:self.margin_out+self.core_out].astype(np.float32)
+
+  # accepts any amount of audio and returns the envelope samples
+  # that are complete so far
+  def feed(self,samples):
+    samples = np.asarray(samples,dtype=np.float32)
+    self.samples_in += len(samples)
+    self.buffer = np.concatenate((self.buffer,samples))
+    out = []
+    while len(self.buffer) >= self.seg:
+      out.append(self.process_segment(self.buffer[:self.seg]))
+      self.buffer = self.buffer[self.core:]
+    return self.collect(out)
+
+  # pads the tail with silence and returns the remaining envelope
+  def flush(self):
+    total_out = self.samples_in * self.unit_out // self.unit_in
+    out = []
+    while self.samples_out + sum(len(x) for x in out) < total_out:
+      pad = self.seg - len(self.buffer)
+      if pad > 0:
+        self.buffer = np.concatenate((self.buffer,np.zeros(pad,dtype=np.float32)))
+      out.append(self.process_segment(self.buffer[:self.seg]))
+      self.buffer = self.buffer[self.core:]
+    out = self.collect(out)
+    extra = self.samples_out - total_out
+    if extra > 0:
+      out = out[:len(out)-extra]
+      self.samples_out = total_out
+    self.reset()
+    return out
+
+  def collect(self,out):
+    if len(out) == 0:
+      return np.zeros(0,dtype=np.float32)
+    out = np.concatenate(out)
+    self.samples_out += len(out)
+    return out
+
+  def process(self,samples):
+    self.reset()
+    return np.concatenate((self.feed(samples),self.flush()))
+
+# decodes a wav capture (blocks_wavfile_sink_0), optionally only the part
+# between start and start + duration seconds
+def decode_wav(path,start = 0,duration = None,chunk_seconds = 30):
+  capture = CaptureReader.open_capture(path)
+  if capture.kind != 'wav':
+    raise ValueError("%s: not a wav capture" % path)
+  demod = APTDemodulator(audio_rate = capture.sample_rate)
+  out = []
+  for chunk in capture.chunks(int(chunk_seconds * capture.sample_rate),start,duration):
+    if capture.channels > 1:
+      chunk = chunk[:,0]
+    out.append(demod.feed(capture.normalized(chunk)))
+  out.append(demod.flush())
+  return np.concatenate(out)
+
+# same conversion as blocks_multiply_const_vxx_0_1 -> blocks_float_to_uchar_0
+def to_uchar(envelope,scale = 255):
+  return np.clip(envelope * scale,0,255).astype(np.uint8)
+
+if __name__ == "__main__":
+  if len(sys.argv) < 2:
+    print("usage: %s input.wav [output.dat]" % sys.argv[0])
+    sys.exit(1)
+  src = sys.argv[1]
+  if len(sys.argv) > 2:
+    dest = sys.argv[2]
+  else:
+    dest = os.path.splitext(src)[0] + ".dat"
+  t = time.time()
+  envelope = decode_wav(src)
+  to_uchar(envelope).tofile(dest)
+  print("decoded %d lines in %.2f s -> %s" % (len(envelope) // 2080,time.time()-t,dest))
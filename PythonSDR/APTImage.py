@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import struct
+import zlib
+import numpy as np
+
+import APTSync
+
+# turning decoded APT lines into 8-bit images and PNG files, without
+# depending on an imaging library
+
+# stretch the envelope between two percentiles onto 0..255
+def normalize(rows,low = 1,high = 99):
+  rows = np.asarray(rows,dtype=np.float32)
+  if rows.size == 0:
+    return np.zeros(rows.shape,dtype=np.uint8)
+  lo,hi = np.percentile(rows,(low,high))
+  if hi <= lo:
+    hi = lo + 1
+  out = (rows - lo) * (255.0 / (hi - lo))
+  return np.clip(out,0,255).astype(np.uint8)
+
+# synced image from a whole-pass envelope
+def build_image(envelope):
+  sync = APTSync.APTSync()
+  starts,confidence = sync.locate(envelope)
+  return normalize(sync.rows(envelope,starts))
+
+def png_chunk(tag,data):
+  crc = zlib.crc32(tag + data) & 0xffffffff
+  return struct.pack('>I',len(data)) + tag + data + struct.pack('>I',crc)
+
+def png_header(width,height,color_type = 0):
+  ihdr = struct.pack('>IIBBBBB',width,height,8,color_type,0,0,0)
+  return b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR',ihdr)
+
+# 8-bit grayscale (h, w) or RGB (h, w, 3) image
+def write_png(path,image,level = 6):
+  image = np.ascontiguousarray(image,dtype=np.uint8)
+  height,width = image.shape[:2]
+  color_type = (0,2)[image.ndim == 3]
+  row_bytes = width * (1,3)[image.ndim == 3]
+  # every scanline is prefixed with filter type 0
+  raw = np.zeros((height,row_bytes + 1),dtype=np.uint8)
+  raw[:,1:] = image.reshape(height,row_bytes)
+  f = open(path,'wb')
+  try:
+    f.write(png_header(width,height,color_type))
+    f.write(png_chunk(b'IDAT',zlib.compress(raw.tobytes(),level)))
+    f.write(png_chunk(b'IEND',b''))
+  finally:
+    f.close()
+
+# PNG that grows a few rows at a time and is a complete, valid file after
+# every flush, so a pass can be watched while it comes in and a crash only
+# loses the rows since the last flush. Rows go through one zlib stream;
+# a flush syncs it into a new IDAT chunk, then writes a finishing IDAT and
+# IEND from a copy of the compressor and patches the height in IHDR. The
+# next flush writes over that tail. Memory use doesn't grow with the image.
+# Until the first rows are flushed the file holds a single black row, as a
+# PNG can't be zero rows high.
+class ProgressivePNG():
+  def __init__(self,path,width,channels = 1,level = 6,flush_rows = 20):
+    self.path = path
+    self.width = width
+    self.channels = channels
+    self.color_type = (0,2)[channels == 3]
+    self.flush_rows = flush_rows
+    self.height = 0
+    self.unflushed = 0
+    self.compressor = zlib.compressobj(level)
+    self.pending = []
+    self.f = open(path,'w+b')
+    self.f.write(png_header(width,1,self.color_type))
+    # end of the IDAT chunks that stay, where the tail is rewritten
+    self.end = self.f.tell()
+    blank = zlib.compress(bytes(bytearray(width * channels + 1)))
+    self.f.write(png_chunk(b'IDAT',blank) + png_chunk(b'IEND',b''))
+    self.f.flush()
+
+  # (n, width) or (n, width, 3) uint8 rows
+  def add_rows(self,rows):
+    rows = np.ascontiguousarray(rows,dtype=np.uint8)
+    n = rows.shape[0]
+    if n == 0:
+      return
+    raw = np.zeros((n,self.width * self.channels + 1),dtype=np.uint8)
+    raw[:,1:] = rows.reshape(n,-1)
+    self.pending.append(self.compressor.compress(raw.tobytes()))
+    self.height += n
+    self.unflushed += n
+    if self.unflushed >= self.flush_rows:
+      self.flush()
+
+  def write_tail(self,data,tail):
+    self.f.seek(self.end)
+    if len(data) > 0:
+      self.f.write(png_chunk(b'IDAT',data))
+    self.end = self.f.tell()
+    self.f.write(png_chunk(b'IDAT',tail) + png_chunk(b'IEND',b''))
+    self.f.truncate()
+    ihdr = struct.pack('>IIBBBBB',self.width,self.height,8,self.color_type,0,0,0)
+    self.f.seek(8)
+    self.f.write(png_chunk(b'IHDR',ihdr))
+    self.f.flush()
+
+  def flush(self):
+    if self.f == None or self.height == 0:
+      return
+    data = b''.join(self.pending) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+    self.pending = []
+    self.unflushed = 0
+    self.write_tail(data,self.compressor.copy().flush(zlib.Z_FINISH))
+
+  def close(self):
+    if self.f == None:
+      return
+    if self.height > 0:
+      self.write_tail(b''.join(self.pending),self.compressor.flush(zlib.Z_FINISH))
+    self.pending = []
+    self.f.close()
+    self.f = None
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+LINE_WIDTH = 2080
+CHANNEL_WIDTH = LINE_WIDTH // 2
+
+# sync patterns at 4160 words/s: channel A carries seven 1040 Hz pulses,
+# channel B seven 832 Hz pulses, each preceded by four low words
+SYNC_A = np.array([0]*4 + [1,1,0,0]*7 + [0]*7,dtype=np.float32)
+SYNC_B = np.array([0]*4 + [1,1,1,0,0]*7,dtype=np.float32)
+
+def next_pow2(n):
+  p = 1
+  while p < n:
+    p <<= 1
+  return p
+
+# normalized cross correlation of the envelope with a sync pattern,
+# computed for every offset with one FFT pair: result[t] compares
+# pattern against envelope[t:t+len(pattern)]
+def correlate(envelope,pattern):
+  n = len(envelope)
+  m = len(pattern)
+  if n < m:
+    return np.zeros(0,dtype=np.float32)
+  p = pattern - pattern.mean()
+  p /= np.sqrt(np.sum(p*p))
+  size = next_pow2(n + m)
+  ex = np.fft.rfft(envelope,size)
+  px = np.fft.rfft(p[::-1],size)
+  corr = np.fft.irfft(ex * px,size)[m-1:n]
+  # divide by the local energy so the score reads as a correlation
+  # coefficient independent of signal level
+  c1 = np.concatenate(([0.0],np.cumsum(envelope,dtype=np.float64)))
+  c2 = np.concatenate(([0.0],np.cumsum(np.square(envelope,dtype=np.float64))))
+  s1 = c1[m:] - c1[:-m]
+  s2 = c2[m:] - c2[:-m]
+  var = np.maximum(s2 - s1*s1/m,1e-12)
+  return (corr / np.sqrt(var)).astype(np.float32)
+
+class APTSync():
+  def __init__(self,line_width = LINE_WIDTH,max_residual = 24,iterations = 3):
+    self.line_width = line_width
+    self.max_residual = max_residual
+    self.iterations = iterations
+    self.period = float(line_width)
+    self.origin = 0.0
+
+  # combined Sync A / Sync B score for a line starting at each sample
+  def score(self,envelope):
+    envelope = np.asarray(envelope,dtype=np.float32)
+    half = self.line_width // 2
+    a = correlate(envelope,SYNC_A)
+    b = correlate(envelope,SYNC_B)
+    n = min(len(a),len(b) - half)
+    if n <= 0:
+      return np.zeros(0,dtype=np.float32)
+    return (a[:n] + b[half:half+n]) * 0.5
+
+  # returns line start indices and a per-line confidence in [0,1]
+  def locate(self,envelope):
+    score = self.score(envelope)
+    w = self.line_width
+    total = len(envelope)
+    lines = len(score) // w
+    if lines < 2:
+      return np.zeros(0,dtype=np.int64),np.zeros(0,dtype=np.float32)
+    # best candidate inside every nominal line slot
+    grid = score[:lines*w].reshape(lines,w)
+    offsets = np.argmax(grid,axis=1)
+    weights = np.maximum(grid[np.arange(lines),offsets],0)
+    # the slots cut through the real lines anywhere, so find the common
+    # phase on the circle before fitting
+    angle = 2 * np.pi * offsets / w
+    phase = np.angle(np.sum(weights * np.exp(1j * angle))) * w / (2 * np.pi)
+    offsets = phase + (offsets - phase + w//2) % w - w//2
+    k = np.arange(lines,dtype=np.float64)
+    positions = k * w + offsets
+    keep = weights > 0
+    self.origin,self.period = phase,float(w)
+    for i in range(self.iterations):
+      if np.count_nonzero(keep) < 2:
+        break
+      self.period,self.origin = np.polyfit(k[keep],positions[keep],1,w=weights[keep])
+      residual = np.abs(positions - (self.origin + self.period * k))
+      keep = (residual < self.max_residual) & (weights > 0)
+    # constant-rate line model across the whole pass; rounded rather than
+    # cut so a line ending right at the end isn't lost to the fit's last
+    # bits, the bounds check below drops any that don't fit
+    first = int(np.round(-self.origin / self.period))
+    last = int(np.round((total - w - self.origin) / self.period))
+    k = np.arange(first,last+1)
+    starts = np.round(self.origin + self.period * k).astype(np.int64)
+    starts = starts[(starts >= 0) & (starts + w <= total)]
+    confidence = np.zeros(len(starts),dtype=np.float32)
+    valid = starts < len(score)
+    confidence[valid] = np.clip(score[starts[valid]],0,1)
+    return starts,confidence
+
+  # one row per line start; a strided view when every line has the same
+  # length in samples, otherwise a single gather
+  def rows(self,envelope,starts):
+    w = self.line_width
+    if len(starts) == 0:
+      return np.zeros((0,w),dtype=envelope.dtype)
+    steps = np.diff(starts)
+    if len(steps) == 0 or np.all(steps == steps[0]):
+      step = int(steps[0]) if len(steps) else w
+      base = envelope[starts[0]:]
+      return np.lib.stride_tricks.as_strided(base,shape=(len(starts),w),
+        strides=(base.strides[0]*step,base.strides[0]),writeable=False)
+    return envelope[starts[:,None] + np.arange(w)]
+
+# line-by-line version of the locator for streams: acquires the first line
+# with a full search, then tracks each following line inside a small
+# window around the expected start and coasts through noisy lines
+class StreamSync():
+  def __init__(self,line_width = LINE_WIDTH,search = 48,threshold = 0.3):
+    self.line_width = line_width
+    self.search = search
+    self.threshold = threshold
+    self.sync = APTSync(line_width)
+    self.reset()
+
+  def reset(self):
+    self.buffer = np.zeros(0,dtype=np.float32)
+    self.next_start = None
+
+  # returns a list of (row, confidence) for every line completed so far
+  def feed(self,envelope):
+    w = self.line_width
+    tail = w // 2 + len(SYNC_B)
+    self.buffer = np.concatenate((self.buffer,np.asarray(envelope,dtype=np.float32)))
+    out = []
+    if self.next_start == None:
+      if len(self.buffer) < 2 * w + tail:
+        return out
+      score = self.sync.score(self.buffer[:2 * w + tail])
+      self.next_start = int(np.argmax(score[:w]))
+    while len(self.buffer) >= self.next_start + self.search + w + tail:
+      lo = max(0,self.next_start - self.search)
+      hi = self.next_start + self.search
+      score = self.sync.score(self.buffer[lo:hi + tail + 1])[:hi - lo + 1]
+      best = int(np.argmax(score))
+      if score[best] >= self.threshold:
+        start = lo + best
+      else:
+        start = self.next_start
+      confidence = float(np.clip(score[start - lo],0,1))
+      out.append((self.buffer[start:start + w].copy(),confidence))
+      self.next_start = start + w
+      # keep only what the next search window can reach
+      drop = max(0,self.next_start - self.search)
+      self.buffer = self.buffer[drop:]
+      self.next_start -= drop
+    return out
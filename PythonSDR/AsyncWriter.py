@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import wave
+import threading
+from collections import deque
+import numpy as np
+
+# keeps the disk out of the radio's way. The GNU Radio thread copies each
+# buffer into a large preallocated byte ring and goes on; a writer thread
+# empties the ring into the file in big writes that end on multiples of
+# block bytes. head and tail are running byte counts with one writer
+# each, as in FrameQueue; the condition only wakes the threads up.
+#
+# when the disk falls so far behind that a buffer doesn't fit, policy DROP
+# leaves it out of the ring and counts it, so the source never waits on
+# the disk and the live decode carries on; BLOCK waits for room, which
+# is what a plain file sink does. A dropped buffer becomes a gap at that
+# point of the stream, which the writer thread fills with as many zero
+# bytes once it gets there: everything after it stays at its offset, and
+# offsets are what sample times are computed from.
+
+DROP = 'drop'
+BLOCK = 'block'
+
+class AsyncWriter():
+  def __init__(self,write,close = None,capacity = 64 << 20,block = 1 << 20,
+      policy = DROP,flush_interval = 1.0):
+    self.write = write
+    self.close_function = close
+    self.block = block
+    # a whole number of blocks
+    self.capacity = max(1,capacity // block) * block
+    self.ring = np.zeros(self.capacity,dtype=np.uint8)
+    self.policy = policy
+    self.flush_interval = flush_interval
+    self.head = 0
+    self.tail = 0
+    # (ring byte count, bytes) of every gap not written yet; only the
+    # producer appends and only the writer thread pops
+    self.gaps = deque()
+    self.closing = False
+    self.condition = threading.Condition()
+    # producer side counters
+    self.received = 0
+    self.dropped = 0
+    self.overflows = 0
+    self.waits = 0
+    self.max_fill = 0
+    # writer side counters
+    self.written = 0
+    self.filled = 0
+    self.writes = 0
+    self.slowest_write = 0.0
+    self.thread = threading.Thread(target = self.run)
+    self.thread.daemon = True
+    self.thread.start()
+
+  # producer side; returns False when the data was dropped
+  def put(self,data):
+    x = np.ascontiguousarray(data).view(np.uint8).reshape(-1)
+    n = len(x)
+    self.received += n
+    if self.capacity - (self.head - self.tail) < n:
+      if self.policy == DROP:
+        self.gaps.append((self.head,n))
+        self.dropped += n
+        self.overflows += 1
+        return False
+      # pieces no bigger than the ring, each waiting for room
+      for i in range(0,n,self.capacity):
+        self.put_blocking(x[i:i + self.capacity])
+      return True
+    self.copy_in(x)
+    return True
+
+  def put_blocking(self,x):
+    with self.condition:
+      if self.capacity - (self.head - self.tail) < len(x):
+        self.waits += 1
+      while self.capacity - (self.head - self.tail) < len(x):
+        self.condition.wait()
+    self.copy_in(x)
+
+  def copy_in(self,x):
+    n = len(x)
+    start = self.head % self.capacity
+    first = min(n,self.capacity - start)
+    self.ring[start:start + first] = x[:first]
+    self.ring[:n - first] = x[first:]
+    self.head += n
+    fill = self.head - self.tail
+    self.max_fill = max(self.max_fill,fill)
+    if fill >= self.block:
+      with self.condition:
+        self.condition.notify_all()
+
+  # writer thread: whole blocks as they fill up, whatever is there after
+  # flush_interval without one, everything once closing
+  def run(self):
+    while True:
+      with self.condition:
+        if self.head - self.tail < self.block and not self.closing:
+          self.condition.wait(self.flush_interval)
+        closing = self.closing
+      head = self.head
+      end = (head // self.block) * self.block
+      if end <= self.tail:
+        end = head
+      if end > self.tail or len(self.gaps) > 0:
+        self.drain(end)
+      if closing and self.tail == self.head and len(self.gaps) == 0:
+        return
+
+  def timed_write(self,x):
+    t = time.time()
+    self.write(x)
+    self.slowest_write = max(self.slowest_write,time.time() - t)
+    self.writes += 1
+
+  # ring bytes up to end, with the gaps met on the way
+  def drain(self,end):
+    while True:
+      if len(self.gaps) > 0 and self.gaps[0][0] == self.tail:
+        self.fill(self.gaps[0][1])
+        self.gaps.popleft()
+        continue
+      stop = end
+      if len(self.gaps) > 0:
+        stop = min(stop,self.gaps[0][0])
+      if self.tail >= stop:
+        return
+      start = self.tail % self.capacity
+      n = min(stop - self.tail,self.capacity - start)
+      self.timed_write(self.ring[start:start + n])
+      self.written += n
+      self.tail += n
+      with self.condition:
+        self.condition.notify_all()
+
+  def fill(self,n):
+    zeros = np.zeros(min(n,self.block),dtype=np.uint8)
+    while n > 0:
+      k = min(n,len(zeros))
+      self.timed_write(zeros[:k])
+      self.filled += k
+      n -= k
+
+  def close(self):
+    if self.closing:
+      return
+    with self.condition:
+      self.closing = True
+      self.condition.notify_all()
+    self.thread.join()
+    if self.close_function != None:
+      self.close_function()
+
+  def stats(self):
+    return {
+      'received' : self.received,
+      'written' : self.written,
+      'dropped' : self.dropped,
+      'filled' : self.filled,
+      'overflows' : self.overflows,
+      'waits' : self.waits,
+      'max_fill' : self.max_fill,
+      'capacity' : self.capacity,
+      'writes' : self.writes,
+      'slowest_write' : round(self.slowest_write,4),
+    }
+
+def open_file(path,**options):
+  f = open(path,'wb')
+  return AsyncWriter(lambda x: x.tofile(f),f.close,**options)
+
+# 16-bit PCM, taking the bytes of int16 samples
+def open_wav(path,rate,channels = 1,**options):
+  w = wave.open(path,'wb')
+  w.setnchannels(channels)
+  w.setsampwidth(2)
+  w.setframerate(rate)
+  return AsyncWriter(lambda x: w.writeframes(x.tobytes()),w.close,**options)
+
+# an IQArchive.ArchiveWriter fed with the bytes of complex64 samples; the
+# conversion and compression run on the writer thread too
+def open_archive(archive,**options):
+  return AsyncWriter(lambda x: archive.write(x.view(np.complex64)),archive.close,**options)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import json
+import argparse
+import multiprocessing
+import numpy as np
+
+import CaptureReader
+import APTDecoder
+import APTImage
+import StreamDecoder
+import FalseColor
+
+# headless re-decoding of a whole capture archive. Every pass is recorded
+# as <satellite>_<YYYY.MM.DD.HH.MM.SS>.raw/.iqc/.wav/.dat; one source per pass
+# is decoded to <satellite>_<stamp>.png, each pass on its own process,
+# plus <satellite>_<stamp>_<palette>.png for every false color palette asked for.
+
+DEFAULT_PREFERENCE = ('wav','raw','iqc','dat')
+
+# {pass name: {kind: path}} for every capture found in the directory
+def find_passes(directory):
+  passes = {}
+  for name in sorted(os.listdir(directory)):
+    satellite,start_time = CaptureReader.parse_name(name)
+    if start_time == None:
+      continue
+    stem,ext = os.path.splitext(name)
+    passes.setdefault(stem,{})[ext.lstrip('.').lower()] = os.path.join(directory,name)
+  return passes
+
+def pick_source(kinds,preference):
+  for kind in preference:
+    if kind in kinds:
+      return kind,kinds[kind]
+  return None,None
+
+# the main image and every false color variant of a pass
+def outputs(output,palettes):
+  return [output] + [os.path.splitext(output)[0] + "_" + name + ".png" for name in palettes]
+
+def up_to_date(source,paths):
+  t = os.path.getmtime(source)
+  return all(os.path.exists(path) and os.path.getmtime(path) >= t for path in paths)
+
+# {source: entry} of an earlier run's manifest, empty when there is none
+def load_entries(path):
+  if not os.path.exists(path):
+    return {}
+  try:
+    f = open(path)
+    manifest = json.load(f)
+    f.close()
+  except ValueError:
+    return {}
+  return dict((e['source'],e) for e in manifest.get('passes',[]))
+
+def decode_image(path,kind,sample_rate):
+  if kind == 'wav':
+    return APTImage.build_image(APTDecoder.decode_wav(path))
+  if kind == 'dat':
+    capture = CaptureReader.open_capture(path)
+    return APTImage.build_image(capture.normalized(capture.data))
+  decoder = StreamDecoder.StreamDecoder(sample_rate = sample_rate)
+  rows = list(decoder.decode_file(path))
+  if len(rows) == 0:
+    return np.zeros((0,2080),dtype=np.uint8)
+  return APTImage.normalize(np.array(rows))
+
+# runs in a worker process, so it only takes and returns plain values
+def decode_job(job):
+  source,kind,output,sample_rate,palettes = job
+  entry = {
+    'source' : source,
+    'kind' : kind,
+    'output' : output,
+  }
+  t = time.time()
+  try:
+    image = decode_image(source,kind,sample_rate)
+    # a PNG can't be zero rows high, and without an image the pass is
+    # tried again on the next run
+    if image.shape[0] == 0:
+      raise ValueError("no APT lines found")
+    APTImage.write_png(output,image)
+    if len(palettes) > 0:
+      channels = FalseColor.Channels(image)
+      entry['channels'] = [channels.channel_a,channels.channel_b]
+      for name,path in zip(palettes,outputs(output,palettes)[1:]):
+        APTImage.write_png(path,channels.composite(name))
+    entry['status'] = 'decoded'
+    entry['lines'] = int(image.shape[0])
+  except Exception as e:
+    entry['status'] = 'error'
+    entry['error'] = "%s: %s" % (type(e).__name__,e)
+  entry['seconds'] = round(time.time() - t,3)
+  return entry
+
+def main():
+  parser = argparse.ArgumentParser(description="decode every archived NOAA pass in a directory")
+  parser.add_argument('directory')
+  parser.add_argument('-o','--output-dir',default=None,
+    help="where images and the manifest go (default: the archive directory)")
+  parser.add_argument('-j','--jobs',type=int,default=multiprocessing.cpu_count())
+  parser.add_argument('--prefer',default=','.join(DEFAULT_PREFERENCE),
+    help="order in which capture types are tried for each pass")
+  parser.add_argument('--sample-rate',type=float,default=CaptureReader.RAW_RATE)
+  parser.add_argument('--force',action='store_true',help="decode passes that are up to date too")
+  parser.add_argument('--manifest',default='manifest.json')
+  parser.add_argument('--false-color',default='',
+    help="comma separated palettes to composite too (%s, or 'all')" % ",".join(sorted(FalseColor.PALETTES.keys())))
+  options = parser.parse_args()
+  output_dir = (options.output_dir,options.directory)[options.output_dir == None]
+  if not os.path.isdir(output_dir):
+    os.makedirs(output_dir)
+  preference = [x.strip().lower() for x in options.prefer.split(',')]
+  palettes = [x.strip() for x in options.false_color.split(',') if x.strip() != '']
+  if palettes == ['all']:
+    palettes = sorted(FalseColor.PALETTES.keys())
+  for name in palettes:
+    if name not in FalseColor.PALETTES:
+      parser.error("unknown palette %s" % name)
+  manifest_path = os.path.join(output_dir,options.manifest)
+  # passes decoded by earlier runs stay in the manifest with their timings
+  previous = load_entries(manifest_path)
+  entries = {}
+  jobs = []
+  for stem,kinds in sorted(find_passes(options.directory).items()):
+    kind,source = pick_source(kinds,preference)
+    if source == None:
+      continue
+    output = os.path.join(output_dir,stem + ".png")
+    if not options.force and up_to_date(source,outputs(output,palettes)):
+      entry = dict(previous.get(source,{'source' : source,'kind' : kind,'output' : output,'seconds' : 0}))
+      entry['status'] = 'skipped'
+      entries[source] = entry
+      continue
+    jobs.append((source,kind,output,options.sample_rate,palettes))
+  t = time.time()
+  if len(jobs) > 0:
+    pool = multiprocessing.Pool(max(1,min(options.jobs,len(jobs))))
+    try:
+      for entry in pool.imap_unordered(decode_job,jobs):
+        print("%-8s %7.2f s  %s" % (entry['status'],entry['seconds'],entry['source']))
+        entries[entry['source']] = entry
+    finally:
+      pool.close()
+      pool.join()
+  elapsed = time.time() - t
+  for source,entry in previous.items():
+    entries.setdefault(source,entry)
+  entries = [entries[source] for source in sorted(entries.keys())]
+  manifest = {
+    'directory' : os.path.abspath(options.directory),
+    'jobs' : options.jobs,
+    'elapsed' : round(elapsed,3),
+    'decoded' : len([e for e in entries if e['status'] == 'decoded']),
+    'skipped' : len([e for e in entries if e['status'] == 'skipped']),
+    'errors' : len([e for e in entries if e['status'] == 'error']),
+    'passes' : entries,
+  }
+  f = open(manifest_path,'w')
+  json.dump(manifest,f,indent=2)
+  f.close()
+  print("%d decoded, %d skipped, %d errors in %.1f s" % (manifest['decoded'],manifest['skipped'],manifest['errors'],elapsed))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import struct
+from datetime import datetime
+import numpy as np
+
+import IQArchive
+
+# zero-copy access to the captures written by the NOAA flowgraph sinks:
+#
+#   .raw  blocks_file_sink_0     complex64 IQ at sample_rate (no header)
+#   .dat  blocks_file_sink_0_0   uchar APT envelope at 4160 Hz
+#   .wav  blocks_wavfile_sink_0  16-bit PCM, rate taken from the header
+#   .iqc  IQArchive              int8/int16 IQ in compressed chunks
+#
+# every file is opened as a read-only np.memmap, so seeking to a given
+# minute of a pass only touches the pages that are actually read; an
+# archive decodes just the chunks a read falls in
+
+RAW_RATE = 2000000
+DAT_RATE = 4160
+
+# names are built as dir_path + satellite + "_" + "%Y.%m.%d.%H.%M.%S" + ext
+NAME_PATTERN = re.compile(r'^(.*)_(\d{4}\.\d{2}\.\d{2}\.\d{2}\.\d{2}\.\d{2})\.(raw|dat|wav|iqc)$')
+TIME_FORMAT = "%Y.%m.%d.%H.%M.%S"
+
+def parse_name(path):
+  m = NAME_PATTERN.match(os.path.basename(path))
+  if m == None:
+    return None,None
+  return m.group(1),datetime.strptime(m.group(2),TIME_FORMAT)
+
+# walks the RIFF chunks and returns (channels, rate, bits, data offset, data bytes)
+def read_wav_header(path):
+  size = os.path.getsize(path)
+  f = open(path,'rb')
+  try:
+    riff,length,wave = struct.unpack('<4sI4s',f.read(12))
+    if riff != b'RIFF' or wave != b'WAVE':
+      raise ValueError("%s: not a RIFF/WAVE file" % path)
+    fmt = None
+    while True:
+      header = f.read(8)
+      if len(header) < 8:
+        raise ValueError("%s: no data chunk" % path)
+      chunk_id,chunk_size = struct.unpack('<4sI',header)
+      if chunk_id == b'fmt ':
+        fmt = struct.unpack('<HHIIHH',f.read(16))
+        f.seek(chunk_size - 16 + (chunk_size & 1),1)
+      elif chunk_id == b'data':
+        if fmt == None:
+          raise ValueError("%s: data chunk before fmt chunk" % path)
+        offset = f.tell()
+        # a sink that was never closed leaves the size at zero
+        if chunk_size == 0 or offset + chunk_size > size:
+          chunk_size = size - offset
+        return fmt[1],fmt[2],fmt[5],offset,chunk_size
+      else:
+        f.seek(chunk_size + (chunk_size & 1),1)
+  finally:
+    f.close()
+
+class Capture():
+  def __init__(self,path,sample_rate = None):
+    self.path = path
+    self.kind = os.path.splitext(path)[1].lower().lstrip('.')
+    self.satellite,self.start_time = parse_name(path)
+    self.channels = 1
+    offset = 0
+    if self.kind == 'raw':
+      self.dtype = np.dtype(np.complex64)
+      self.sample_rate = (sample_rate,RAW_RATE)[sample_rate == None]
+      nbytes = os.path.getsize(path)
+    elif self.kind == 'dat':
+      self.dtype = np.dtype(np.uint8)
+      self.sample_rate = (sample_rate,DAT_RATE)[sample_rate == None]
+      nbytes = os.path.getsize(path)
+    elif self.kind == 'wav':
+      self.channels,self.sample_rate,bits,offset,nbytes = read_wav_header(path)
+      if bits == 8:
+        self.dtype = np.dtype(np.uint8)
+      elif bits == 16:
+        self.dtype = np.dtype('<i2')
+      elif bits == 32:
+        self.dtype = np.dtype('<i4')
+      else:
+        raise ValueError("%s: %d-bit wav files are not supported" % (path,bits))
+    else:
+      raise ValueError("%s: unknown capture type" % path)
+    frame = self.dtype.itemsize * self.channels
+    self.length = nbytes // frame
+    if self.length == 0:
+      self.data = np.zeros(0,dtype=self.dtype)
+    else:
+      shape = (self.length,self.channels) if self.channels > 1 else (self.length,)
+      self.data = np.memmap(path,dtype=self.dtype,mode='r',offset=offset,shape=shape)
+
+  def __len__(self):
+    return self.length
+
+  def duration(self):
+    return float(self.length) / self.sample_rate
+
+  def index(self,seconds):
+    i = int(round(seconds * self.sample_rate))
+    return min(max(i,0),self.length)
+
+  # view of the samples between start and start + duration seconds
+  def at(self,start,duration = None):
+    a = self.index(start)
+    if duration == None:
+      return self.data[a:]
+    return self.data[a:self.index(start + duration)]
+
+  # consecutive views of at most chunk_size samples
+  def chunks(self,chunk_size,start = 0,duration = None):
+    a = self.index(start)
+    b = self.length
+    if duration != None:
+      b = self.index(start + duration)
+    for i in range(a,b,chunk_size):
+      yield self.data[i:min(i + chunk_size,b)]
+
+  # samples as float32 in the same scale the GNU Radio sources produce
+  def normalized(self,samples):
+    if self.kind == 'wav':
+      if self.dtype == np.uint8:
+        return (samples.astype(np.float32) - 128) / 128.0
+      return samples.astype(np.float32) / float(1 << (8 * self.dtype.itemsize - 1))
+    if self.kind == 'dat':
+      return samples.astype(np.float32) / 255.0
+    return samples
+
+  def close(self):
+    self.data = None
+
+def open_capture(path,sample_rate = None):
+  if path.lower().endswith(IQArchive.EXTENSION):
+    return IQArchive.Archive(path,sample_rate)
+  return Capture(path,sample_rate)
@@ -1,18 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import re
-import sys
-import os
-import time
-import struct
-import signal
-import numpy as np
-
-from PyQt5 import Qt
-from PyQt5 import QtCore,QtGui
-from PyQt5.QtWidgets import QWidget
-
 class Combo():
   def __init__(self,main,config,control,function,config_name,content = None):
     self.main = main
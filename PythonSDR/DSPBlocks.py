@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import FilterDesign
+import TapCache
+
+# stateful NumPy counterparts of the GNU Radio blocks used by the NOAA
+# flowgraph. Each block keeps just enough state to process a stream one
+# chunk at a time and produce exactly what one long call would produce.
+
+def next_pow2(n):
+  p = 1
+  while p < n:
+    p <<= 1
+  return p
+
+# FIR filter with optional decimation, evaluated with overlap-save FFT
+# convolution over all the blocks of a chunk at once
+class OverlapSaveFilter():
+  def __init__(self,taps,decim = 1,fft_size = None):
+    self.taps = np.asarray(taps)
+    self.decim = int(decim)
+    self.ntaps = len(self.taps)
+    if fft_size == None:
+      fft_size = max(4096,next_pow2(8 * self.ntaps))
+    self.fft_size = fft_size
+    self.step = fft_size - self.ntaps + 1
+    self.set_taps(self.taps)
+    self.reset()
+
+  # swaps in taps of the same length; the history is raw input, so the
+  # new response applies from the next sample on
+  def set_taps(self,taps):
+    self.taps = np.asarray(taps)
+    self.response = np.fft.fft(self.taps,self.fft_size)
+    self.real_response = None
+    if not np.iscomplexobj(self.taps):
+      self.real_response = np.fft.rfft(self.taps,self.fft_size)
+
+  def reset(self):
+    self.history = None
+    # position of the next input sample on the decimation grid
+    self.phase = 0
+
+  def process(self,x):
+    x = np.asarray(x)
+    n = len(x)
+    complex_out = np.iscomplexobj(x) or np.iscomplexobj(self.taps)
+    out_type = (np.float32,np.complex64)[complex_out]
+    if n == 0:
+      return np.zeros(0,dtype=out_type)
+    if self.history is None:
+      self.history = np.zeros(self.ntaps-1,dtype=x.dtype)
+    buf = np.concatenate((self.history,x))
+    self.history = buf[n:].copy()
+    blocks = (n + self.step - 1) // self.step
+    pad = blocks * self.step + self.ntaps - 1 - len(buf)
+    if pad > 0:
+      buf = np.concatenate((buf,np.zeros(pad,dtype=buf.dtype)))
+    frames = np.lib.stride_tricks.as_strided(buf,shape=(blocks,self.fft_size),
+      strides=(buf.strides[0]*self.step,buf.strides[0]),writeable=False)
+    if complex_out:
+      y = np.fft.ifft(np.fft.fft(frames,axis=1) * self.response,axis=1)
+    else:
+      y = np.fft.irfft(np.fft.rfft(frames,axis=1) * self.real_response,self.fft_size,axis=1)
+    y = y[:,self.ntaps-1:].reshape(-1)[:n]
+    first = (-self.phase) % self.decim
+    self.phase = (self.phase + n) % self.decim
+    return y[first::self.decim].astype(out_type)
+
+# numerically controlled oscillator. Output is built a block of samples
+# at a time, as a table of exp(j w k) over the block times the phasor at
+# the start of the block; that phasor is carried from block to block by
+# complex multiplication and renormalized once per call, so the phase is
+# continuous across calls and frequency changes without an exp() per sample.
+# Frequencies are rounded to resolution Hz, so a slowly moving frequency
+# keeps reusing a few cached tables.
+class NCO():
+  def __init__(self,rate,freq = 0,block = 1024,resolution = 1.0):
+    self.rate = float(rate)
+    self.block = block
+    self.resolution = resolution
+    self.phasor = np.complex128(1)
+    self.tables = {}
+    self.set_freq(freq)
+
+  def set_freq(self,freq):
+    self.freq = float(freq)
+
+  # number of blocks, and so of frequencies, in the next n samples
+  def blocks(self,n):
+    return (n + self.block - 1) // self.block
+
+  def table(self,step):
+    t = self.tables.get(step)
+    if t is None:
+      if len(self.tables) >= 64:
+        self.tables = {}
+      omega = 2 * np.pi * step * self.resolution / self.rate
+      t = np.exp(1j * omega * np.arange(self.block)).astype(np.complex64)
+      self.tables[step] = t
+    return t
+
+  # the next n phasors; freqs, when given, holds one frequency per block
+  def phasors(self,n,freqs = None):
+    m = self.blocks(n)
+    if m == 0:
+      return np.zeros(0,dtype=np.complex64)
+    if freqs is None:
+      freqs = np.full(m,self.freq)
+    else:
+      self.freq = float(freqs[-1])
+    steps = np.round(np.asarray(freqs) / self.resolution).astype(np.int64)
+    unique,index = np.unique(steps,return_inverse=True)
+    tables = np.array([self.table(step) for step in unique])
+    omega = 2 * np.pi * unique[index] * self.resolution / self.rate
+    starts = np.empty(m,dtype=np.complex128)
+    starts[0] = self.phasor
+    starts[1:] = self.phasor * np.cumprod(np.exp(1j * omega[:-1] * self.block))
+    tail = n - (m - 1) * self.block
+    self.phasor = starts[-1] * np.exp(1j * omega[-1] * tail)
+    self.phasor /= abs(self.phasor)
+    out = tables[index.reshape(-1)]
+    out *= starts.astype(np.complex64)[:,None]
+    return out.reshape(-1)[:n]
+
+# multiplies by a complex exponential whose phase carries over between
+# chunks and frequency changes
+class Mixer():
+  def __init__(self,freq,rate):
+    self.rate = float(rate)
+    self.nco = NCO(rate)
+    self.set_freq(freq)
+
+  def set_freq(self,freq):
+    self.freq = float(freq)
+    self.nco.set_freq(freq)
+
+  def current_freq(self):
+    return self.freq
+
+  def process(self,x):
+    if self.freq == 0:
+      return x
+    return x * self.nco.phasors(len(x))
+
+# a mixer whose frequency follows a curve, such as a Doppler correction
+# from PassPredictor.correction_track. times are Unix seconds, the first
+# sample processed is at start_time. The curve is sampled once per NCO
+# block, which at these rates is a fraction of a millisecond.
+class TrackMixer():
+  def __init__(self,times,freqs,rate,start_time = None):
+    self.times = np.asarray(times,dtype=np.float64)
+    self.freqs = np.asarray(freqs,dtype=np.float64)
+    self.rate = float(rate)
+    self.nco = NCO(rate)
+    self.set_start_time(start_time)
+
+  def set_start_time(self,start_time):
+    self.start_time = start_time
+    self.position = 0
+
+  def current_freq(self):
+    return float(np.interp(self.start_time + self.position / self.rate,self.times,self.freqs))
+
+  # mixing vector for the next n samples; the curve is read at the middle
+  # of every block, the last one ending with the chunk
+  def phasors(self,n):
+    block = self.nco.block
+    starts = block * np.arange(self.nco.blocks(n))
+    centers = self.position + (starts + np.minimum(starts + block,n)) / 2.0
+    freqs = np.interp(self.start_time + centers / self.rate,self.times,self.freqs)
+    self.position += n
+    return self.nco.phasors(n,freqs)
+
+  def process(self,x):
+    return x * self.phasors(len(x))
+
+# freq_xlating_fir_filter: mixer and decimating low pass in one pass over
+# the input. As GNU Radio does it, the taps are shifted onto the band being
+# selected and the mixer, running at the output rate, brings the filtered
+# signal to baseband. The taps follow the mixer once it has moved retune Hz.
+class XlatingFilter():
+  def __init__(self,taps,decim,rate,mixer,retune = 1e3):
+    self.lowpass = np.asarray(taps)
+    self.rate = float(rate)
+    self.mixer = mixer
+    self.retune = retune
+    self.center = None
+    self.filter = OverlapSaveFilter(self.lowpass.astype(np.complex64),decim)
+
+  def set_center(self,freq):
+    self.center = freq
+    k = np.arange(len(self.lowpass))
+    self.filter.set_taps((self.lowpass * np.exp(-2j * np.pi * freq / self.rate * k)).astype(np.complex64))
+
+  def process(self,x):
+    freq = self.mixer.current_freq()
+    if self.center == None or abs(freq - self.center) > self.retune:
+      self.set_center(freq)
+    return self.mixer.process(self.filter.process(x))
+
+# polyphase channelizer: channels spaced rate / channels apart, each low
+# passed by the same prototype and decimated by decim, for one pass of the
+# prototype over the input plus a DFT across the polyphase branches. Only
+# the bins asked for are transformed. Bin k is centered at k * rate /
+# channels (k may be negative) and gives exactly what mixing it down,
+# filtering with taps and decimating would, phase included.
+class Channelizer():
+  def __init__(self,taps,channels,decim,bins):
+    self.channels = channels
+    self.decim = decim
+    self.bins = list(bins)
+    taps = np.asarray(taps,dtype=np.float32)
+    self.branches = (len(taps) + channels - 1) // channels
+    self.length = self.branches * channels
+    padded = np.zeros(self.length,dtype=np.float32)
+    padded[:len(taps)] = taps
+    # reversed so that it lines up with a frame of input, oldest sample first
+    self.folded = padded[::-1].reshape(self.branches,channels)
+    k = np.array(self.bins)
+    c = np.arange(channels)
+    self.dft = np.exp(2j * np.pi * np.outer(channels - 1 - c,k) / channels).astype(np.complex64)
+    # the mix down by k * rate / channels at every possible input index
+    self.rotation = np.exp(-2j * np.pi * np.outer(np.arange(channels),k) / channels).astype(np.complex64)
+    self.reset()
+
+  def reset(self):
+    self.history = np.zeros(self.length - 1,dtype=np.complex64)
+    # index of the next input sample since the start of the stream
+    self.position = 0
+
+  # (outputs, bins) array, one column per bin
+  def process(self,x):
+    x = np.asarray(x,dtype=np.complex64)
+    n = len(x)
+    buf = np.concatenate((self.history,x))
+    self.history = buf[n:].copy()
+    first = (-self.position) % self.decim
+    count = max(0,(n - first + self.decim - 1) // self.decim)
+    item = buf.strides[0]
+    frames = np.lib.stride_tricks.as_strided(buf[first:],shape=(count,self.branches,self.channels),
+      strides=(item * self.decim,item * self.channels,item),writeable=False)
+    branches = np.zeros((count,self.channels),dtype=np.complex64)
+    for q in range(self.branches):
+      branches += frames[:,q,:] * self.folded[q]
+    out = branches.dot(self.dft)
+    index = (self.position + first + self.decim * np.arange(count)) % self.channels
+    out *= self.rotation[index]
+    self.position += n
+    return out
+
+# same as analog.quadrature_demod_cf
+class FMDemodulator():
+  def __init__(self,rate,max_dev = 75e3):
+    self.gain = rate / (2 * np.pi * max_dev)
+    self.last = np.complex64(0)
+
+  def process(self,x):
+    if len(x) == 0:
+      return np.zeros(0,dtype=np.float32)
+    prev = np.concatenate(([self.last],x[:-1]))
+    self.last = x[-1]
+    return (self.gain * np.angle(x * np.conj(prev))).astype(np.float32)
+
+# FIR approximation of the 75 us FM de-emphasis used by analog.wfm_rcv,
+# truncated once the exponential has decayed below -80 dB
+def deemphasis_taps(rate,tau = 75e-6):
+  a = np.exp(-1.0 / (rate * tau))
+  n = np.arange(int(np.ceil(np.log(1e-4) / np.log(a))))
+  taps = (1 - a) * a ** n
+  return (taps / taps.sum()).astype(np.float32)
+
+# de-emphasis and audio low pass folded into a single filter
+def audio_taps(rate,cutoff,transition,tau = 75e-6):
+  lp = TapCache.low_pass(1,rate,cutoff,transition,FilterDesign.WIN_HAMMING,6.76)
+  return np.convolve(lp,deemphasis_taps(rate,tau)).astype(np.float32)
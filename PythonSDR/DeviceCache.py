@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import threading
+
+# what an SDR reports about itself (gain stages, bandwidths, sample rates),
+# kept per (driver, device) so rebuilding the radio doesn't query the
+# hardware again. With a file set, capabilities also survive restarts.
+#
+# an entry is only trusted for the device it was probed on: the device
+# identity from osmosdr's enumeration (which includes the serial number)
+# must match, as must the cache format and the gr-osmosdr version, and the
+# entry must be younger than max_age
+
+CACHE_VERSION = 1
+
+class DeviceCache():
+  def __init__(self,path = None,max_age = 30 * 86400):
+    self.entries = {}
+    self.lock = threading.Lock()
+    self.max_age = max_age
+    self.set_path(path)
+
+  def set_path(self,path):
+    if path == '':
+      path = None
+    if path != None:
+      path = os.path.expanduser(path)
+    self.path = path
+    self.loaded = False
+
+  def key(self,driver,identity):
+    return "%s|%s" % (driver,identity)
+
+  def load(self):
+    if self.loaded or self.path == None:
+      return
+    self.loaded = True
+    try:
+      f = open(self.path)
+      entries = json.load(f)
+      f.close()
+    except (IOError,OSError,ValueError):
+      return
+    for key,entry in entries.items():
+      self.entries.setdefault(key,entry)
+
+  def store(self):
+    if self.path == None:
+      return
+    # only entries tied to a real device identity go to disk
+    entries = dict((k,v) for k,v in self.entries.items() if not k.endswith('|'))
+    tmp = self.path + ".%d.tmp" % os.getpid()
+    try:
+      directory = os.path.dirname(self.path)
+      if directory != '' and not os.path.isdir(directory):
+        os.makedirs(directory)
+      f = open(tmp,'w')
+      json.dump(entries,f,indent=2)
+      f.close()
+      os.rename(tmp,self.path)
+    except (IOError,OSError):
+      pass
+
+  def valid(self,entry,version):
+    return (entry.get('cache_version') == CACHE_VERSION
+      and entry.get('osmosdr_version') == version
+      and time.time() - entry.get('probed',0) < self.max_age)
+
+  # capabilities dict, or None when they have to be probed
+  def get(self,driver,identity,version = ''):
+    with self.lock:
+      self.load()
+      entry = self.entries.get(self.key(driver,identity))
+      if entry == None or not self.valid(entry,version):
+        return None
+      return entry['capabilities']
+
+  def put(self,driver,identity,capabilities,version = ''):
+    with self.lock:
+      self.entries[self.key(driver,identity)] = {
+        'cache_version' : CACHE_VERSION,
+        'osmosdr_version' : version,
+        'probed' : time.time(),
+        'capabilities' : capabilities,
+      }
+      if identity != '':
+        self.store()
+
+  # the enumeration string of the first device using this driver, which
+  # carries its serial number; '' when it can't be found. It is looked up
+  # on every call, so a device plugged in or swapped since is seen as such.
+  def identify(self,osmosdr,driver):
+    identity = ''
+    try:
+      for device in osmosdr.device.find(osmosdr.device_t(driver)):
+        s = device.to_string()
+        if driver in s:
+          identity = s
+          break
+    except Exception:
+      identity = ''
+    return identity
+
+shared = DeviceCache(os.environ.get('PYTHONSDR_DEVICE_CACHE'))
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# reduces a spectrum frame to one value (or one min/max pair) per pixel
+# column, so drawing costs depend on the widget width and not on fft_size.
+#
+# the column edges only depend on the number of bins shown and the width,
+# that is, they change with the zoom or a resize, not with every frame
+
+class DisplayReducer():
+  def __init__(self):
+    self.key = None
+    self.starts = None
+
+  # first bin of every pixel column; when there are more columns than
+  # bins a bin is repeated over several columns
+  def column_starts(self,n,width):
+    if self.key != (n,width):
+      self.starts = (np.arange(width) * n) // width
+      self.key = (n,width)
+    return self.starts
+
+  # lowest and highest bin under each column, for an envelope trace that
+  # keeps narrow peaks visible however far the frame is reduced
+  def min_max(self,frame,width):
+    starts = self.column_starts(len(frame),width)
+    return np.minimum.reduceat(frame,starts),np.maximum.reduceat(frame,starts)
+
+  def peak(self,frame,width):
+    return np.maximum.reduceat(frame,self.column_starts(len(frame),width))
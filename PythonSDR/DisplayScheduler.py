@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# picks the spectrum frame rate from what drawing actually costs.
+#
+# the display widgets report the time spent accepting and painting
+# frames; once per interval the cost of one frame is turned into the
+# rate that keeps drawing within a share of one core, and logpwrfft is
+# asked for that many frames per second. When the display cannot be
+# seen the spectrum branch is paused altogether.
+
+class DisplayScheduler():
+  def __init__(self,config):
+    # share of one core the display may use
+    self.budget = config.get('display_cpu_budget',0.2)
+    self.min_rate = config.get('display_min_rate',5)
+    self.max_rate = config.get('display_max_rate',60)
+    self.pause_hidden = config.get('display_pause_hidden',True)
+    self.interval = config.get('display_adapt_interval',1.0)
+    self.rate = self.max_rate
+    self.paused = False
+    self.busy = 0.0
+    self.frames = 0
+
+  def measure(self,seconds):
+    self.busy += seconds
+
+  def frame(self):
+    self.frames += 1
+
+  def clamp(self,rate):
+    rate = (rate,self.min_rate)[rate < self.min_rate]
+    return (rate,self.max_rate)[rate > self.max_rate]
+
+  # called once per interval; returns the new frame rate when it
+  # should change, otherwise None
+  def update(self):
+    busy = self.busy
+    frames = self.frames
+    self.busy = 0.0
+    self.frames = 0
+    if frames == 0 or self.paused:
+      return None
+    cost = busy / frames
+    if cost > 0:
+      target = self.clamp(self.budget / cost)
+    else:
+      target = self.max_rate
+    # go half way each time so the rate settles instead of hunting
+    rate = int(round(self.clamp(self.rate + 0.5 * (target - self.rate))))
+    if abs(rate - self.rate) < max(1,0.1 * self.rate):
+      return None
+    self.rate = rate
+    return rate
+
+  # returns True when the paused state changed
+  def set_visible(self,visible):
+    paused = self.pause_hidden and not visible
+    if paused == self.paused:
+      return False
+    self.paused = paused
+    self.busy = 0.0
+    self.frames = 0
+    return True
@@ -1,22 +1,31 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-
-import re
-import sys
-import os
 import time
-import struct
-import signal
 import numpy as np
 import math
+import sip
 
+import DisplayReduce
 from PyQt5 import Qt
 from PyQt5 import QtCore,QtGui
 from PyQt5.QtCore import QEvent
 from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QColor,QImage,QPainter,QFont,QGuiApplication
+from PyQt5.QtGui import QColor,QImage,QPainter,QFont,QGuiApplication,QPolygonF
+from PyQt5.QtCore import QPointF
+
+# a QPolygonF of n points and a writable (n,2) float64 view of its
+# memory, so a whole trace can be written by NumPy and drawn in one call
+def create_polygon(n):
+  polygon = QPolygonF()
+  polygon.fill(QPointF(),n)
+  ptr = polygon.data()
+  if ptr is None:
+    ptr = sip.voidptr(0)
+  ptr.setsize(n * 2 * 8)
+  points = np.frombuffer(ptr,np.float64).reshape((n,2))
+  return polygon,points
 
 class FFTDispWidget(QWidget):
   def __init__(self,main,config,parent_widget):
@@ -29,6 +38,9 @@ class FFTDispWidget(QWidget):
     self.dh = None
     self.dwd2 = None
     self.data = None
+    self.polygon = None
+    self.points = None
+    self.reducer = DisplayReduce.DisplayReducer()
     self.drawing = False
     self.mousepos = None
     self.mouse_startx = None
@@ -149,11 +161,12 @@ class FFTDispWidget(QWidget):
   def ntrp(self,x,xa,xb,ya,yb):
     return (x-xa)*(yb-ya)/(xb-xa) + ya
     
+  # source is one fftshifted frame of dB values as a NumPy array
   def accept_data(self,source):
     if not self.drawing:
+      t = time.time()
       self.acquire_essential()
       ll = len(source)
-      dest = []
       mpa = self.mpa
       mpb = self.mpb
       # shift displayed spectrum by offset frequency
@@ -169,19 +182,27 @@ class FFTDispWidget(QWidget):
       if(sz > 0):
         # select zoomed data array segment
         wfdest = source[pa:pb]
-        v = wfdest[sz/2]
+        v = wfdest[sz//2]
         self.ss += (v-self.ss) * self.integ_constant
         self.main.waterfall_widget.accept_data_line(wfdest)
         lo = self.config['dbscale_lo']
         hi = self.config['dbscale_hi']
-        for x,y in enumerate(wfdest):
-          px = self.ntrp(x,0,sz,0,self.dw)
-          py = self.ntrp(y,hi,lo,0,self.dh)
-          dest.append([px,py])
+        # one max/min pair per pixel column, drawn as a vertical
+        # stroke per column; the buffer only changes with the width
+        width = max(self.dw,1)
+        lows,highs = self.reducer.min_max(wfdest,width)
+        if self.points is None or len(self.points) != 2 * width:
+          self.polygon,self.points = create_polygon(2 * width)
+          self.points[:,0] = np.repeat(np.arange(width),2)
+        # same mapping as ntrp(y,hi,lo,0,dh)
+        scale = float(self.dh) / (lo-hi)
+        np.multiply(np.subtract(highs,hi),scale,out=self.points[0::2,1])
+        np.multiply(np.subtract(lows,hi),scale,out=self.points[1::2,1])
         # check one more time
         if not self.drawing:
-          self.data = dest
+          self.data = self.polygon
           self.update()
+      self.main.display_scheduler.measure(time.time() - t)
   
   # x must be normalized for these to work
   def zoom_scale(self,x):
@@ -195,6 +216,7 @@ class FFTDispWidget(QWidget):
         
   def paintEvent(self,event):
     if self.isVisible():
+      t = time.time()
       self.drawing = True
       self.acquire_essential()
       qp = QPainter(self)
@@ -205,16 +227,9 @@ class FFTDispWidget(QWidget):
       xp = self.dw * self.zoom_inv_scale(.5)
       qp.drawLine(xp,16,xp,self.dh-40)
       # data
-      if self.data:
+      if self.data != None:
         qp.setPen(self.disp_trace_color)
-        ox = None
-        oy = None
-        for item in self.data:
-          x,y = item
-          if ox != None:
-            qp.drawLine(ox,oy,x,y)
-          ox = x
-          oy = y
+        qp.drawPolyline(self.data)
       steps = 10
       # horizontal frequency scale
       qp.setPen(self.disp_text_color)
@@ -249,4 +264,4 @@ class FFTDispWidget(QWidget):
         qp.drawText(self.mp.x(),self.mp.y()-4,s)
         
       self.drawing = False
-    
\ No newline at end of file
+      self.main.display_scheduler.measure(time.time() - t)
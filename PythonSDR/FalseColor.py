@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+import APTImage
+import APTSync
+
+# false color images from a synced APT image. Every 2080 word line holds
+# two channels of 1040 words:
+#
+#   sync 39 | space 47 | image 909 | telemetry 45
+#
+# the telemetry column repeats a 128 line frame of sixteen 8 line wedges:
+# wedges 1-8 step from 1/8 to full modulation, wedge 9 is zero and wedge
+# 16 equals the wedge (1-6) numbered like the AVHRR channel on display.
+# Each channel is calibrated by mapping its measured wedges back onto
+# their nominal values through a 256 entry table; the calibrated (A, B)
+# pair then indexes a 256x256 RGB palette, once for the whole image.
+
+SYNC = 39
+SPACE = 47
+IMAGE = 909
+TELEMETRY = 45
+CHANNEL = SYNC + SPACE + IMAGE + TELEMETRY
+
+FRAME = 128
+WEDGE = 8
+WEDGE_VALUES = np.array([31,63,95,127,159,191,223,255,0],dtype=np.float64)
+# wedge number in wedge 16 -> AVHRR channel
+AVHRR_CHANNELS = {1 : '1',2 : '2',3 : '3A',4 : '4',5 : '5',6 : '3B'}
+
+# (rows, 909) image and (rows, 45) telemetry of channel 0 (A) or 1 (B)
+def split(image,channel):
+  base = channel * CHANNEL + SYNC + SPACE
+  return image[:,base:base + IMAGE],image[:,base + IMAGE:base + IMAGE + TELEMETRY]
+
+# mean of each of the 16 wedges, folded over every frame in the pass and
+# aligned on the frame start that best fits the wedge 1-9 staircase; None
+# when the pass is shorter than a frame
+def wedges(telemetry):
+  rows = telemetry.shape[0]
+  if rows < FRAME:
+    return None
+  # the middle of the column, one value per line, averaged per frame line
+  level = telemetry[:,5:-5].mean(axis=1)
+  frames = rows // FRAME
+  folded = level[:frames * FRAME].reshape(frames,FRAME).mean(axis=0)
+  # every possible frame start, the inner 6 lines of every wedge
+  index = (np.arange(FRAME)[:,None,None] + WEDGE * np.arange(16)[None,:,None]
+    + np.arange(1,WEDGE - 1)[None,None,:]) % FRAME
+  means = folded[index].mean(axis=2)
+  steps = means[:,:9] - means[:,:9].mean(axis=1)[:,None]
+  target = WEDGE_VALUES - WEDGE_VALUES.mean()
+  score = steps.dot(target) / (np.sqrt(np.sum(steps * steps,axis=1)) + 1e-9)
+  return means[int(np.argmax(score))]
+
+# 256 entry table taking measured values onto the nominal wedge scale
+def calibration(measured):
+  if measured is None:
+    return np.arange(256,dtype=np.uint8)
+  x = measured[:9]
+  order = np.argsort(x)
+  x = np.maximum.accumulate(x[order])
+  lut = np.interp(np.arange(256),x,WEDGE_VALUES[order])
+  return np.clip(np.round(lut),0,255).astype(np.uint8)
+
+# AVHRR channel shown, from wedge 16, or None
+def channel_id(measured):
+  if measured is None:
+    return None
+  wedge = int(np.argmin(np.abs(measured[:6] - measured[15]))) + 1
+  return AVHRR_CHANNELS[wedge]
+
+# palettes are functions of the calibrated channels on the unit grid:
+# a (visible by day) down the rows, b (infrared, cold is bright) across
+
+def mix(t,c0,c1):
+  t = t[...,None]
+  return c0 * (1 - t) + c1 * t
+
+def ramp(x,lo,hi):
+  return np.clip((x - lo) / (hi - lo),0,1)
+
+# sea dark blue, land green to tan with brightness, clouds white
+def vegetation(a,b):
+  land = mix(ramp(a,0.2,0.6),np.array([40,100,35.]),np.array([195,175,125.]))
+  surface = mix(ramp(a,0.12,0.22),np.array([15,30,90.]),land)
+  cloud = np.maximum(ramp(b,0.5,0.8),ramp(a,0.55,0.85))
+  gray = np.maximum(a,b)[...,None] * np.array([255,255,255.])
+  return mix(cloud,surface,gray)
+
+# infrared decides where clouds are, the visible channel colors what's under
+def mcir(a,b):
+  surface = mix(ramp(a,0.1,0.3),np.array([10,40,120.]),np.array([70,130,50.]))
+  surface *= (0.7 + 0.3 * ramp(a,0.1,0.5))[...,None]
+  cloud = ramp(b,0.45,0.75)
+  return mix(cloud,surface,b[...,None] * np.array([255,255,255.]))
+
+# infrared only, cold blue through warm red
+def thermal(a,b):
+  t = 1 - b
+  stops = [0,0.25,0.5,0.75,1]
+  rgb = [[255,0,0,255,255],[255,0,200,255,0],[255,160,255,0,0]]
+  return np.stack([np.interp(t,stops,c) for c in rgb],axis=-1)
+
+PALETTES = {
+  'vegetation' : vegetation,
+  'mcir' : mcir,
+  'thermal' : thermal,
+}
+luts = {}
+
+# (65536, 3) uint8 table indexed by a * 256 + b
+def palette(name):
+  lut = luts.get(name)
+  if lut is None:
+    grid = np.arange(256) / 255.0
+    a,b = np.meshgrid(grid,grid,indexing='ij')
+    rgb = PALETTES[name](a,b)
+    lut = np.clip(np.round(rgb),0,255).astype(np.uint8).reshape(65536,3)
+    luts[name] = lut
+  return lut
+
+# calibrated channel A and B frames of a synced (rows, 2080) uint8 image
+class Channels():
+  def __init__(self,image,calibrate = True):
+    image = np.asarray(image,dtype=np.uint8)
+    a,telemetry_a = split(image,0)
+    b,telemetry_b = split(image,1)
+    self.wedges_a = wedges(telemetry_a)
+    self.wedges_b = wedges(telemetry_b)
+    self.channel_a = channel_id(self.wedges_a)
+    self.channel_b = channel_id(self.wedges_b)
+    if calibrate:
+      a = calibration(self.wedges_a)[a]
+      b = calibration(self.wedges_b)[b]
+    # the palette index of every pixel, shared by all palettes
+    self.index = (a.astype(np.int32) << 8) | b
+    self.a = a
+    self.b = b
+
+  # (rows, 909, 3) RGB image
+  def composite(self,name):
+    return np.take(palette(name),self.index,axis=0)
+
+def composite(image,name,calibrate = True):
+  return Channels(image,calibrate).composite(name)
+
+# synced image of a <stem>_lines.dat file, or of any capture BatchDecode reads
+def load_image(path,sample_rate = None):
+  if path.endswith('_lines.dat'):
+    rows = np.fromfile(path,dtype=np.uint8)
+    return rows[:len(rows) // APTSync.LINE_WIDTH * APTSync.LINE_WIDTH].reshape(-1,APTSync.LINE_WIDTH)
+  import BatchDecode
+  import CaptureReader
+  kind = os.path.splitext(path)[1].lower().lstrip('.')
+  return BatchDecode.decode_image(path,kind,(sample_rate,CaptureReader.RAW_RATE)[sample_rate == None])
+
+def main():
+  parser = argparse.ArgumentParser(description="false color images from a decoded APT pass")
+  parser.add_argument('source',help="<stem>_lines.dat, or a .raw/.iqc/.wav/.dat capture")
+  parser.add_argument('-p','--palette',action='append',default=None,
+    help="%s (repeatable; default: all)" % ", ".join(sorted(PALETTES.keys())))
+  parser.add_argument('-o','--output-dir',default=None)
+  parser.add_argument('--no-calibrate',action='store_true')
+  parser.add_argument('--sample-rate',type=float,default=None)
+  options = parser.parse_args()
+  names = (options.palette,sorted(PALETTES.keys()))[options.palette == None]
+  image = load_image(options.source,options.sample_rate)
+  stem = os.path.splitext(os.path.basename(options.source))[0]
+  if stem.endswith('_lines'):
+    stem = stem[:-len('_lines')]
+  output_dir = (options.output_dir,os.path.dirname(options.source))[options.output_dir == None]
+  t = time.time()
+  channels = Channels(image,not options.no_calibrate)
+  print("%d lines, channel A: AVHRR %s, channel B: AVHRR %s" % (image.shape[0],channels.channel_a,channels.channel_b))
+  for name in names:
+    rgb = channels.composite(name)
+    path = os.path.join(output_dir,stem + "_" + name + ".png")
+    APTImage.write_png(path,rgb)
+    print("%-10s -> %s" % (name,path))
+  print("%.2f s" % (time.time() - t))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# NumPy versions of the gnuradio firdes designs, so the offline decoders
+# produce the same taps as the flowgraphs without importing GNU Radio
+
+WIN_HAMMING = 0
+WIN_HANN = 1
+WIN_BLACKMAN = 2
+WIN_RECTANGULAR = 3
+WIN_KAISER = 4
+
+def max_attenuation(window,beta = 6.76):
+  if window == WIN_HAMMING:
+    return 53.0
+  elif window == WIN_HANN:
+    return 44.0
+  elif window == WIN_BLACKMAN:
+    return 74.0
+  elif window == WIN_RECTANGULAR:
+    return 21.0
+  elif window == WIN_KAISER:
+    return beta/0.1102 + 8.7
+  raise ValueError("unknown window type: %s" % str(window))
+
+# same rule as firdes: more taps for a narrower transition band, always odd
+def compute_ntaps(rate,transition,window,beta = 6.76):
+  ntaps = int(max_attenuation(window,beta) * rate / (22.0 * transition))
+  return ntaps | 1
+
+def window_taps(window,ntaps,beta = 6.76):
+  n = np.arange(ntaps)
+  m = ntaps - 1
+  if window == WIN_HAMMING:
+    return 0.54 - 0.46 * np.cos(2 * np.pi * n / m)
+  elif window == WIN_HANN:
+    return 0.5 - 0.5 * np.cos(2 * np.pi * n / m)
+  elif window == WIN_BLACKMAN:
+    return 0.42 - 0.5 * np.cos(2 * np.pi * n / m) + 0.08 * np.cos(4 * np.pi * n / m)
+  elif window == WIN_RECTANGULAR:
+    return np.ones(ntaps)
+  elif window == WIN_KAISER:
+    return np.kaiser(ntaps,beta)
+  raise ValueError("unknown window type: %s" % str(window))
+
+def low_pass(gain,rate,cutoff,transition,window = WIN_HAMMING,beta = 6.76):
+  ntaps = compute_ntaps(rate,transition,window,beta)
+  m = (ntaps - 1) // 2
+  n = np.arange(-m,m+1)
+  w = window_taps(window,ntaps,beta)
+  taps = 2.0 * cutoff / rate * np.sinc(2.0 * cutoff / rate * n) * w
+  # unity gain at DC
+  return (taps * gain / taps.sum()).astype(np.float32)
+
+def band_pass(gain,rate,low_cutoff,high_cutoff,transition,window = WIN_HAMMING,beta = 6.76):
+  ntaps = compute_ntaps(rate,transition,window,beta)
+  m = (ntaps - 1) // 2
+  n = np.arange(-m,m+1)
+  w = window_taps(window,ntaps,beta)
+  hi = 2.0 * high_cutoff / rate * np.sinc(2.0 * high_cutoff / rate * n)
+  lo = 2.0 * low_cutoff / rate * np.sinc(2.0 * low_cutoff / rate * n)
+  taps = (hi - lo) * w
+  # unity gain at the center of the pass band
+  fc = np.pi * (low_cutoff + high_cutoff) / rate
+  fmax = np.sum(taps * np.cos(n * fc))
+  return (taps * gain / fmax).astype(np.float32)
+
+# low pass prototype shifted up to the center of the band, as
+# firdes.complex_band_pass
+def complex_band_pass(gain,rate,low_cutoff,high_cutoff,transition,window = WIN_HAMMING,beta = 6.76):
+  lp = low_pass(gain,rate,(high_cutoff - low_cutoff) / 2.0,transition,window,beta)
+  m = (len(lp) - 1) // 2
+  n = np.arange(-m,m+1)
+  fc = np.pi * (low_cutoff + high_cutoff) / rate
+  return (lp * np.exp(1j * fc * n)).astype(np.complex64)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import numpy as np
+
+# hands display frames from the GNU Radio thread to the Qt thread.
+#
+# a fixed ring of preallocated float32 frames with one writer and one
+# reader: the writer only moves head, the reader only moves tail, so
+# normally no lock is needed. When the ring is full the incoming frame
+# replaces the newest queued one, so the display never falls behind; the
+# slot the reader holds is never that one, and the lock only keeps the
+# reader from picking it while it is being overwritten. The reader always
+# takes the newest frame and skips whatever older ones are still queued.
+
+class FrameQueue():
+  def __init__(self,frame_size,slots = 3):
+    self.frame_size = frame_size
+    # one slot held by the reader, at least one for the writer
+    self.slots = max(2,slots)
+    self.frames = np.zeros((self.slots,frame_size),dtype=np.float32)
+    # running counts, slot = count % slots
+    self.head = 0
+    self.tail = 0
+    # set by the writer once it has asked for a wake-up, cleared by the
+    # reader before looking, so a frame is never left without a signal
+    self.notified = False
+    self.lock = threading.Lock()
+    # each counter has a single writer
+    self.produced = 0
+    self.dropped_full = 0
+    self.discarded = 0
+    self.skipped = 0
+    self.displayed = 0
+
+  # writer side; returns True when the reader should be woken up
+  def put(self,frame,fftshift = False):
+    self.produced += 1
+    if self.head - self.tail >= self.slots:
+      with self.lock:
+        if self.head - self.tail >= self.slots:
+          # the newest queued frame gives way to this one
+          self.copy(self.frames[(self.head - 1) % self.slots],frame,fftshift)
+          self.dropped_full += 1
+          return False
+    self.copy(self.frames[self.head % self.slots],frame,fftshift)
+    self.head += 1
+    if not self.notified:
+      self.notified = True
+      return True
+    return False
+
+  def copy(self,slot,frame,fftshift):
+    if fftshift:
+      # shift while copying, rather than into a temporary
+      h = self.frame_size // 2
+      n = self.frame_size - h
+      slot[:h] = frame[n:]
+      slot[h:] = frame[:n]
+    else:
+      slot[:] = frame
+
+  # writer side: n frames that never reached put()
+  def discard(self,n):
+    self.produced += n
+    self.discarded += n
+
+  # reader side; the returned frame stays valid until release()
+  def acquire(self):
+    self.notified = False
+    with self.lock:
+      head = self.head
+      if head == self.tail:
+        return None
+      if head - self.tail > 1:
+        self.skipped += head - 1 - self.tail
+        self.tail = head - 1
+    return self.frames[self.tail % self.slots]
+
+  def release(self):
+    self.displayed += 1
+    self.tail += 1
+
+  def dropped(self):
+    return self.dropped_full + self.skipped + self.discarded
+
+  def stats(self):
+    return {
+      'produced' : self.produced,
+      'dropped' : self.dropped(),
+      'displayed' : self.displayed,
+    }
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import json
+import time
+import zlib
+import struct
+import argparse
+from datetime import datetime
+import numpy as np
+
+# compact IQ captures. blocks_file_sink_0 writes complex64, 8 bytes a
+# sample for what the RTL-SDR delivers as two 8-bit numbers; an archive
+# keeps I and Q as int8 (or int16) in chunks of a fixed number of samples,
+# each optionally zlib compressed at its fastest level:
+#
+#   "IQC1", uint32 header size, JSON header
+#   per chunk: uint32 stored bytes, uint32 samples, payload
+#   index: uint64 offset per chunk, then uint64 chunk count, uint64 samples,
+#   uint64 index offset, "IQCX"
+#
+# the header has sample_rate, center_freq, doppler_freq, satellite and
+# start_time (Unix seconds, null when unknown), so a capture no longer
+# depends on its name.
+# The index at the end lets a reader seek by time; a file whose writer
+# died before writing it is indexed by walking the chunk headers.
+
+MAGIC = b'IQC1'
+INDEX_MAGIC = b'IQCX'
+EXTENSION = '.iqc'
+FORMATS = {
+  'int8' : (np.int8,127.0),
+  'int16' : (np.int16,32767.0),
+}
+
+class ArchiveWriter():
+  def __init__(self,path,sample_rate,center_freq = 0,satellite = "",start_time = None,
+      doppler_freq = None,sample_format = 'int8',chunk_samples = 1 << 18,compress = True):
+    self.dtype,self.scale = FORMATS[sample_format]
+    self.chunk_samples = chunk_samples
+    self.compress = compress
+    self.header = {
+      'sample_rate' : float(sample_rate),
+      'center_freq' : float(center_freq),
+      'doppler_freq' : (float(center_freq),doppler_freq)[doppler_freq != None],
+      'satellite' : satellite,
+      'start_time' : None if start_time is None else float(start_time),
+      'sample_format' : sample_format,
+      'scale' : self.scale,
+      'chunk_samples' : chunk_samples,
+      'compression' : ('none','zlib')[compress],
+    }
+    self.f = open(path,'wb')
+    text = json.dumps(self.header).encode('utf-8')
+    self.f.write(MAGIC + struct.pack('<I',len(text)) + text)
+    self.offsets = []
+    self.samples = 0
+    self.pending = []
+    self.pending_samples = 0
+    self.bytes_in = 0
+    self.bytes_out = 0
+
+  # complex samples in the fc32 scale of the GNU Radio sources
+  def write(self,samples):
+    samples = np.asarray(samples,dtype=np.complex64)
+    while len(samples) > 0:
+      n = min(len(samples),self.chunk_samples - self.pending_samples)
+      # the caller may reuse its buffer, as AsyncWriter does with its ring
+      self.pending.append(samples[:n].copy())
+      self.pending_samples += n
+      samples = samples[n:]
+      if self.pending_samples == self.chunk_samples:
+        self.flush_chunk()
+
+  def flush_chunk(self):
+    if self.pending_samples == 0:
+      return
+    x = np.concatenate(self.pending).view(np.float32) * self.scale
+    payload = np.clip(np.round(x),-self.scale,self.scale).astype(self.dtype).tobytes()
+    self.bytes_in += len(payload)
+    if self.compress:
+      payload = zlib.compress(payload,1)
+    self.offsets.append(self.f.tell())
+    self.f.write(struct.pack('<II',len(payload),self.pending_samples))
+    self.f.write(payload)
+    self.bytes_out += len(payload)
+    self.samples += self.pending_samples
+    self.pending = []
+    self.pending_samples = 0
+
+  def close(self):
+    if self.f == None:
+      return
+    self.flush_chunk()
+    index_offset = self.f.tell()
+    self.f.write(np.array(self.offsets,dtype='<u8').tobytes())
+    self.f.write(struct.pack('<QQQ',len(self.offsets),self.samples,index_offset) + INDEX_MAGIC)
+    self.f.close()
+    self.f = None
+
+# (header, offset of the first chunk), reading nothing else
+def read_header(path):
+  f = open(path,'rb')
+  try:
+    if f.read(4) != MAGIC:
+      raise ValueError("%s: not an IQ archive" % path)
+    size = struct.unpack('<I',f.read(4))[0]
+    return json.loads(f.read(size).decode('utf-8')),8 + size
+  finally:
+    f.close()
+
+# read side, with the interface of CaptureReader.Capture
+class Archive():
+  def __init__(self,path,sample_rate = None):
+    self.path = path
+    self.kind = EXTENSION.lstrip('.')
+    self.channels = 1
+    self.header,self.data_offset = read_header(path)
+    self.f = open(path,'rb')
+    self.dtype = np.dtype(FORMATS[self.header['sample_format']][0])
+    self.scale = self.header['scale']
+    self.sample_rate = (sample_rate,self.header['sample_rate'])[sample_rate == None]
+    self.center_freq = self.header['center_freq']
+    self.doppler_freq = self.header['doppler_freq']
+    self.satellite = self.header['satellite']
+    self.start_time = None
+    if self.header['start_time'] != None:
+      self.start_time = datetime.fromtimestamp(self.header['start_time'])
+    self.read_index()
+    self.cached = None
+
+  def read_index(self):
+    end = os.path.getsize(self.path)
+    offsets = None
+    if end >= self.data_offset + 28:
+      self.f.seek(end - 28)
+      count,length,index_offset = struct.unpack('<QQQ',self.f.read(24))
+      if self.f.read(4) == INDEX_MAGIC:
+        self.f.seek(index_offset)
+        offsets = np.frombuffer(self.f.read(8 * count),dtype='<u8').astype(np.int64)
+        end = index_offset
+    sizes = []
+    if offsets is None:
+      offsets = []
+      position = self.data_offset
+      while position + 8 <= end:
+        self.f.seek(position)
+        stored,samples = struct.unpack('<II',self.f.read(8))
+        if position + 8 + stored > end:
+          break
+        offsets.append(position)
+        sizes.append(samples)
+        position += 8 + stored
+      offsets = np.array(offsets,dtype=np.int64)
+    else:
+      for offset in offsets:
+        self.f.seek(offset)
+        sizes.append(struct.unpack('<II',self.f.read(8))[1])
+    self.offsets = offsets
+    # first sample of every chunk, plus the total at the end
+    self.starts = np.concatenate(([0],np.cumsum(np.array(sizes,dtype=np.int64))))
+    self.length = int(self.starts[-1])
+
+  def read_chunk(self,i):
+    if self.cached != None and self.cached[0] == i:
+      return self.cached[1]
+    self.f.seek(self.offsets[i])
+    stored,samples = struct.unpack('<II',self.f.read(8))
+    payload = self.f.read(stored)
+    if self.header['compression'] == 'zlib':
+      payload = zlib.decompress(payload)
+    x = np.frombuffer(payload,dtype=self.dtype).astype(np.float32)
+    x *= 1.0 / self.scale
+    x = x.view(np.complex64)
+    self.cached = (i,x)
+    return x
+
+  # samples a to b, decoding only the chunks they fall in
+  def read(self,a,b):
+    a = min(max(a,0),self.length)
+    b = min(max(b,a),self.length)
+    if a == b:
+      return np.zeros(0,dtype=np.complex64)
+    first = int(np.searchsorted(self.starts,a,side='right')) - 1
+    last = int(np.searchsorted(self.starts,b,side='left')) - 1
+    parts = [self.read_chunk(i) for i in range(first,last + 1)]
+    x = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    return x[a - self.starts[first]:b - self.starts[first]]
+
+  def __len__(self):
+    return self.length
+
+  def duration(self):
+    return float(self.length) / self.sample_rate
+
+  def index(self,seconds):
+    i = int(round(seconds * self.sample_rate))
+    return min(max(i,0),self.length)
+
+  def at(self,start,duration = None):
+    a = self.index(start)
+    if duration == None:
+      return self.read(a,self.length)
+    return self.read(a,self.index(start + duration))
+
+  def chunks(self,chunk_size,start = 0,duration = None):
+    a = self.index(start)
+    b = self.length
+    if duration != None:
+      b = self.index(start + duration)
+    for i in range(a,b,chunk_size):
+      yield self.read(i,min(i + chunk_size,b))
+
+  def normalized(self,samples):
+    return samples
+
+  def close(self):
+    self.f.close()
+
+# streams a .raw capture into an archive named like it, taking the
+# satellite and start time from the name when it has them
+def convert(source,dest = None,sample_rate = None,center_freq = 0,doppler_freq = None,
+    sample_format = 'int8',compress = True,chunk_size = 1 << 20):
+  import CaptureReader
+  capture = CaptureReader.open_capture(source,sample_rate)
+  if dest == None:
+    dest = os.path.splitext(source)[0] + EXTENSION
+  satellite = capture.satellite
+  start_time = None
+  if capture.start_time != None:
+    start_time = time.mktime(capture.start_time.timetuple()) + capture.start_time.microsecond / 1e6
+  writer = ArchiveWriter(dest,capture.sample_rate,center_freq,(satellite,"")[satellite == None],
+    start_time,doppler_freq,sample_format,compress = compress)
+  for chunk in capture.chunks(chunk_size):
+    writer.write(chunk)
+  writer.close()
+  return dest,writer
+
+def main():
+  parser = argparse.ArgumentParser(description="convert a .raw capture to an IQ archive, or describe an archive")
+  parser.add_argument('source')
+  parser.add_argument('dest',nargs='?',default=None)
+  parser.add_argument('--sample-rate',type=float,default=None)
+  parser.add_argument('--center-freq',type=float,default=0)
+  parser.add_argument('--doppler-freq',type=float,default=None)
+  parser.add_argument('--format',choices=sorted(FORMATS.keys()),default='int8')
+  parser.add_argument('--no-compress',action='store_true')
+  options = parser.parse_args()
+  if options.source.lower().endswith(EXTENSION):
+    archive = Archive(options.source)
+    for key in sorted(archive.header.keys()):
+      print("%-14s %s" % (key,archive.header[key]))
+    print("%-14s %d in %d chunks, %.1f s" % ('samples',archive.length,len(archive.offsets),archive.duration()))
+    return 0
+  t = time.time()
+  dest,writer = convert(options.source,options.dest,options.sample_rate,options.center_freq,
+    options.doppler_freq,options.format,not options.no_compress)
+  size_in = os.path.getsize(options.source)
+  size_out = os.path.getsize(dest)
+  print("%s -> %s: %.1f MB -> %.1f MB (%.1f%%) in %.1f s" % (options.source,dest,size_in / 1e6,
+    size_out / 1e6,100.0 * size_out / max(size_in,1),time.time() - t))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
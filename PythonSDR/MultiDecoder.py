@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+import numpy as np
+
+import TapCache
+import DSPBlocks
+import APTDecoder
+import CaptureReader
+import StreamDecoder
+import PassPredictor
+
+# every NOAA satellite inside the receiver's window decoded from one IQ
+# stream. A polyphase channelizer splits the stream into channels about
+# 200 kHz apart at twice that rate; the channel nearest each downlink goes
+# to its own worker process, where a StreamDecoder tunes out the rest of
+# the offset (or follows a Doppler track) and decodes it. Overlapping
+# passes come out of a single capture and the wideband filtering is done
+# once for all of them.
+
+SPACING = 200e3
+# widest APT signal, FM deviation plus the subcarrier's sidebands
+APT_HALF_WIDTH = 21e3
+
+class Channel():
+  def __init__(self,satellite,downlink,index,freq):
+    self.satellite = satellite
+    self.downlink = downlink
+    # channelizer bin, and the RF frequency it is centered on
+    self.index = index
+    self.freq = freq
+
+# channel count, decimation, prototype taps and the Channel of every
+# satellite in the window; satellites that don't fit are left out
+def plan(sample_rate,center_freq,downlinks,spacing = SPACING):
+  channels = max(2,int(round(sample_rate / spacing)))
+  decim = max(1,channels // 2)
+  spacing = sample_rate / channels
+  # the passband covers the farthest a downlink can be from its bin, the
+  # stopband starts where the decimated rate would fold it back in
+  taps = TapCache.low_pass(1,sample_rate,spacing,0.75 * spacing)
+  layout = []
+  for satellite,downlink in sorted(downlinks.items()):
+    offset = downlink - center_freq
+    if abs(offset) + APT_HALF_WIDTH > sample_rate / 2:
+      continue
+    index = int(round(offset / spacing))
+    layout.append(Channel(satellite,downlink,index,center_freq + index * spacing))
+  return channels,decim,taps,layout
+
+# offset and Doppler track for the StreamDecoder of a channel, whose mixer
+# takes the channel from its center to the downlink. The track already
+# ends at the channel's center, so there is no fixed offset on top of it
+def tuning(channel,tle_path = None,station = None,start_time = None,hours = 3):
+  if tle_path == None:
+    return channel.freq - channel.downlink,None
+  orbit = PassPredictor.Orbit(PassPredictor.read_tle(tle_path,channel.satellite))
+  track = PassPredictor.correction_track(orbit,station,channel.downlink,channel.freq,
+    start_time,start_time + hours * 3600)
+  return 0,track
+
+# runs in a worker process: decodes one channel from the chunks on its queue
+# until a None arrives, then reports (satellite, path, lines) on results
+def channel_worker(satellite,rate,offset,track,start_time,path,chunks,results):
+  decoder = StreamDecoder.StreamDecoder(sample_rate = rate,offset = offset,track = track,start_time = start_time)
+  def stream():
+    while True:
+      chunk = chunks.get()
+      if chunk is None:
+        return
+      yield chunk
+  f = open(path,'wb')
+  count = 0
+  for row in decoder.lines(stream()):
+    APTDecoder.to_uchar(row).tofile(f)
+    count += 1
+  f.close()
+  results.put((satellite,path,count))
+
+class MultiDecoder():
+  def __init__(self,sample_rate,center_freq,downlinks = PassPredictor.DOWNLINKS,
+      dir_path = "",stamp = None,tle_path = None,station = None,start_time = None,queue_size = 8):
+    self.sample_rate = float(sample_rate)
+    self.center_freq = center_freq
+    channels,decim,taps,self.plan = plan(self.sample_rate,center_freq,downlinks)
+    self.channel_rate = self.sample_rate / decim
+    self.channelizer = DSPBlocks.Channelizer(taps,channels,decim,[c.index for c in self.plan])
+    if stamp == None:
+      stamp = datetime.now().strftime(CaptureReader.TIME_FORMAT)
+    if start_time == None:
+      start_time = time.time()
+    self.results = multiprocessing.Queue()
+    self.queues = []
+    self.workers = []
+    self.paths = []
+    for channel in self.plan:
+      offset,track = tuning(channel,tle_path,station,start_time)
+      path = dir_path + channel.satellite + "_" + stamp + "_lines.dat"
+      chunks = multiprocessing.Queue(queue_size)
+      worker = multiprocessing.Process(target = channel_worker,args = (channel.satellite,
+        self.channel_rate,offset,track,start_time,path,chunks,self.results))
+      self.queues.append(chunks)
+      self.workers.append(worker)
+      self.paths.append(path)
+
+  def start(self):
+    for worker in self.workers:
+      worker.start()
+
+  # wideband IQ in; blocks while a worker is more than queue_size chunks behind
+  def feed(self,chunk):
+    out = self.channelizer.process(chunk)
+    for i in range(len(self.queues)):
+      self.queues[i].put(np.ascontiguousarray(out[:,i]))
+
+  # ends every channel and returns its (satellite, path, lines)
+  def close(self):
+    for chunks in self.queues:
+      chunks.put(None)
+    done = [self.results.get() for worker in self.workers]
+    for worker in self.workers:
+      worker.join()
+    return sorted(done)
+
+# live reception: rtlsdr_source_0 into a sink that feeds the decoder
+def run_live(decoder,center_freq,gain = 40,duration = None):
+  from gnuradio import gr
+  import osmosdr
+  class IQTap(gr.sync_block):
+    def __init__(self):
+      gr.sync_block.__init__(self,name = "Channelizer Tap",in_sig = [np.complex64],out_sig = None)
+
+    def work(self, input_items, output_items):
+      decoder.feed(input_items[0])
+      return len(input_items[0])
+
+  tb = gr.top_block("Multi-satellite APT")
+  source = osmosdr.source(args="numchan=1 rtl=0")
+  source.set_sample_rate(decoder.sample_rate)
+  source.set_center_freq(center_freq,0)
+  source.set_gain_mode(False,0)
+  source.set_gain(gain,0)
+  tb.connect((source,0),(IQTap(),0))
+  tb.start()
+  t = time.time()
+  try:
+    while duration == None or time.time() - t < duration:
+      time.sleep(1)
+  except KeyboardInterrupt:
+    pass
+  tb.stop()
+  tb.wait()
+
+def main():
+  parser = argparse.ArgumentParser(description="decode every NOAA satellite in the window of one IQ stream")
+  parser.add_argument('source',help="'rtl' for the SDR, or a .raw capture")
+  parser.add_argument('--center-freq',type=float,default=137.5e6,help="frequency the stream is tuned to")
+  parser.add_argument('--sample-rate',type=float,default=CaptureReader.RAW_RATE)
+  parser.add_argument('--satellite',action='append',default=None,
+    help="decode only this satellite (repeatable; default: all known)")
+  parser.add_argument('--dir-path',default="")
+  parser.add_argument('--tle',default=None,help="TLE file, enables the Doppler correction")
+  parser.add_argument('--station',default=None,help="lat,lon[,alt] of the receiver")
+  parser.add_argument('--gain',type=float,default=40)
+  parser.add_argument('--duration',type=float,default=None,help="seconds to receive live")
+  options = parser.parse_args()
+  downlinks = PassPredictor.DOWNLINKS
+  if options.satellite != None:
+    downlinks = dict((PassPredictor.key_name(s),PassPredictor.DOWNLINKS[PassPredictor.key_name(s)]) for s in options.satellite)
+  station = None
+  if options.tle != None:
+    if options.station == None:
+      parser.error("--tle needs --station")
+    station = PassPredictor.parse_station(options.station)
+  live = options.source == 'rtl'
+  stamp = None
+  start_time = None
+  if not live:
+    capture = CaptureReader.open_capture(options.source,options.sample_rate)
+    if capture.start_time != None:
+      stamp = capture.start_time.strftime(CaptureReader.TIME_FORMAT)
+      start_time = PassPredictor.capture_start(options.source)
+    elif options.tle != None:
+      parser.error("%s: no start time in the file name for --tle" % options.source)
+  decoder = MultiDecoder(options.sample_rate,options.center_freq,downlinks,options.dir_path,
+    stamp,options.tle,station,start_time)
+  if len(decoder.plan) == 0:
+    print("no satellite within %.1f MHz +/- %.0f kHz" % (options.center_freq / 1e6,options.sample_rate / 2e3))
+    return 1
+  for channel in decoder.plan:
+    print("%-8s %.4f MHz  channel %+d  %+.1f kHz" % (channel.satellite,channel.downlink / 1e6,
+      channel.index,(channel.downlink - channel.freq) / 1e3))
+  t = time.time()
+  decoder.start()
+  if live:
+    run_live(decoder,options.center_freq,options.gain,options.duration)
+  else:
+    for chunk in capture.chunks(1 << 20):
+      decoder.feed(chunk)
+  for satellite,path,count in decoder.close():
+    print("%-8s %d lines -> %s" % (satellite,count,path))
+  print("%.1f s" % (time.time() - t))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,462 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+
+from gnuradio import analog
+from gnuradio import audio
+from gnuradio import blocks
+from gnuradio import filter
+from gnuradio import gr
+from gnuradio.filter import firdes
+
+import APTDecoder
+import APTImage
+import APTSync
+import AsyncWriter
+import CaptureReader
+import DSPBlocks
+import IQArchive
+import PassPredictor
+import ResamplePlan
+import TapCache
+
+# the "NOAA tuning and decoding (working Doppler Correction) NO GUI" flowgraph
+# as a Python top block. The source is either the RTL-SDR, a .raw capture
+# or a .wav capture. With fast=True a file is replayed as fast as the CPU
+# allows: blocks_throttle_raw is left out, and so are the audio and UDP
+# branches, which are only useful while listening live.
+#
+# With direct=True the demodulated audio goes straight to ENVELOPE_RATE,
+# a multiple of 4160 Hz, through one designed rate conversion instead of
+# 44100 -> 11025 -> 16640 -> 4160; the 11025 Hz wav recording becomes an
+# optional side branch (wav_tap).
+#
+# The Doppler correction is the center frequency of freq_xlating_fir_filter_xxx_0,
+# whose rotator keeps its phase when gpredict moves it, rather than a
+# separate full-rate signal source and multiply. With a track from
+# PassPredictor.correction_track a TrackMixer block follows the predicted
+# curve instead of gpredict's polled frequency steps.
+#
+# record_format 'int8' or 'int16' records the IQ as an IQArchive (.iqc)
+# instead of complex64 .raw; an .iqc capture replays like a .raw one.
+#
+# the .raw/.iqc, .dat and .wav recordings go through AsyncWriter rings
+# emptied on their own threads, so a slow disk never stalls the source.
+# Live, record_policy DROP gives up recording rather than samples when a
+# ring overflows and writes zeros in their place, so the recording keeps
+# its timeline; replayed files always wait for the disk.
+#
+# the image is synced and appended to filename_png line by line, readable
+# while the pass is still coming in; png_sink='satnogs' brings back
+# satnogs_noaa_apt_sink_0, which writes it once at the end.
+
+SOURCE_RTL = 'rtl'
+ENVELOPE_RATE = 3 * 4160
+
+# mixes the IQ stream with a (times, freqs) correction track; without a
+# start time the track is read against the clock from the first sample on
+class TrackMixer(gr.sync_block):
+  def __init__(self,track,sample_rate,start_time = None):
+    gr.sync_block.__init__(
+    self,
+    name = "Doppler Track Mixer",
+    in_sig = [np.complex64],
+    out_sig = [np.complex64],
+    )
+    times,freqs = track
+    self.mixer = DSPBlocks.TrackMixer(times,freqs,sample_rate,start_time)
+
+  def work(self, input_items, output_items):
+    out = output_items[0]
+    if self.mixer.start_time == None:
+      self.mixer.set_start_time(time.time())
+    np.multiply(input_items[0],self.mixer.phasors(len(out)),out)
+    return len(out)
+
+# hands a stream to an AsyncWriter; pcm turns float audio into the 16-bit
+# samples blocks_wavfile_sink_0 would write
+class RecordSink(gr.sync_block):
+  def __init__(self,writer,dtype,pcm = False):
+    gr.sync_block.__init__(
+    self,
+    name = "Record Sink",
+    in_sig = [dtype],
+    out_sig = None,
+    )
+    self.writer = writer
+    self.pcm = pcm
+
+  def work(self, input_items, output_items):
+    x = input_items[0]
+    if self.pcm:
+      x = np.clip(np.round(x * 32767),-32768,32767).astype('<i2')
+    self.writer.put(x)
+    return len(input_items[0])
+
+  def stop(self):
+    self.writer.close()
+    return True
+
+# APT envelope at 4160 Hz in, synced lines out to a growing PNG
+class APTImageSink(gr.sync_block):
+  def __init__(self,path):
+    gr.sync_block.__init__(
+    self,
+    name = "APT Image Sink",
+    in_sig = [np.float32],
+    out_sig = None,
+    )
+    self.sync = APTSync.StreamSync()
+    self.image = APTImage.ProgressivePNG(path,APTSync.LINE_WIDTH)
+
+  def work(self, input_items, output_items):
+    for row,confidence in self.sync.feed(input_items[0]):
+      self.image.add_rows(APTDecoder.to_uchar(row)[None,:])
+    return len(input_items[0])
+
+  def stop(self):
+    self.image.close()
+    return True
+
+# plays an IQArchive back as a complex stream
+class ArchiveSource(gr.sync_block):
+  def __init__(self,path):
+    gr.sync_block.__init__(
+    self,
+    name = "IQ Archive Source",
+    in_sig = None,
+    out_sig = [np.complex64],
+    )
+    self.archive = IQArchive.Archive(path)
+    self.position = 0
+
+  def work(self, input_items, output_items):
+    out = output_items[0]
+    x = self.archive.read(self.position,self.position + len(out))
+    if len(x) == 0:
+      return -1
+    out[:len(x)] = x
+    self.position += len(x)
+    return len(x)
+
+class NOAAFlowgraph(gr.top_block):
+  def __init__(self,source = SOURCE_RTL,sample_rate = 2000000,center_freq = 106.5e6,
+      bandwidth = 42000,lna_gain = 100,filter_cutoff = 10,filter_trans = 100,
+      volume = 0.8,dir_path = "",satellite = "",udp_ip_address = "localhost",
+      udp_port = 10027,filename_png = None,fast = False,record = True,gpredict = True,
+      direct = False,wav_tap = True,track = None,track_start = None,record_format = 'raw',
+      record_policy = AsyncWriter.DROP,record_buffer = 64 << 20,png_sink = 'progressive'):
+    gr.top_block.__init__(self, "CIDTE-Receptor APT NOAA-SAT")
+    self.source = source
+    self.sample_rate = sample_rate
+    self.center_freq = center_freq
+    self.doppler_freq = center_freq
+    self.bandwidth = bandwidth
+    self.lna_gain = lna_gain
+    self.filter_cutoff = filter_cutoff
+    self.filter_trans = filter_trans
+    self.volume = volume
+    self.dir_path = dir_path
+    self.satellite = satellite
+    self.udp_ip_address = udp_ip_address
+    self.udp_port = udp_port
+    self.fast = fast
+    self.record = record
+    self.gpredict = gpredict
+    self.direct = direct
+    self.wav_tap = wav_tap
+    self.track = track
+    self.track_start = track_start
+    self.record_format = record_format
+    self.record_policy = record_policy
+    self.record_buffer = record_buffer
+    self.png_sink = png_sink
+    self.live = source == SOURCE_RTL
+    self.wav_input = not self.live and source.lower().endswith('.wav')
+    now = datetime.now()
+    stamp = now.strftime("%Y.%m.%d.%H.%M.%S")
+    # what an archive's header records as its start, as a .raw has it in its name
+    self.start_time = time.mktime(now.timetuple()) + now.microsecond / 1e6
+    self.base_name = dir_path + satellite + "_" + stamp
+    if filename_png == None:
+      filename_png = self.base_name + ".png"
+    self.filename_png = filename_png
+    self.build_blocks()
+    self.connect_blocks()
+
+  def build_blocks(self):
+    if self.live:
+      import osmosdr
+      self.rtlsdr_source_0 = osmosdr.source( args="numchan=1 rtl=0" )
+      self.rtlsdr_source_0.set_sample_rate(self.sample_rate)
+      self.rtlsdr_source_0.set_center_freq(self.center_freq, 0)
+      self.rtlsdr_source_0.set_freq_corr(0, 0)
+      self.rtlsdr_source_0.set_dc_offset_mode(2, 0)
+      self.rtlsdr_source_0.set_iq_balance_mode(2, 0)
+      self.rtlsdr_source_0.set_gain_mode(False, 0)
+      self.rtlsdr_source_0.set_gain(self.lna_gain, 0)
+      self.rtlsdr_source_0.set_if_gain(self.lna_gain, 0)
+      self.rtlsdr_source_0.set_bb_gain(self.lna_gain, 0)
+      self.rtlsdr_source_0.set_antenna('', 0)
+      self.rtlsdr_source_0.set_bandwidth(self.bandwidth, 0)
+      self.iq_source = self.rtlsdr_source_0
+    elif self.wav_input:
+      self.blocks_wavfile_source_0 = blocks.wavfile_source(self.source, False)
+    else:
+      if self.source.lower().endswith(IQArchive.EXTENSION):
+        self.blocks_file_source = ArchiveSource(self.source)
+      else:
+        self.blocks_file_source = blocks.file_source(gr.sizeof_gr_complex*1, self.source, False)
+      self.iq_source = self.blocks_file_source
+      if not self.fast:
+        self.blocks_throttle_raw = blocks.throttle(gr.sizeof_gr_complex*1, self.sample_rate,True)
+        self.iq_source = self.blocks_throttle_raw
+
+    if not self.wav_input:
+      if self.track != None:
+        self.track_mixer = TrackMixer(self.track,self.sample_rate,self.track_start)
+      self.freq_xlating_fir_filter_xxx_0 = filter.freq_xlating_fir_filter_ccc(1, (TapCache.low_pass(1, self.sample_rate, self.filter_cutoff*1000, self.filter_trans*1000, firdes.WIN_HAMMING, 6.76).tolist()), self.doppler_freq-self.center_freq, self.sample_rate)
+      self.analog_wfm_rcv_0 = analog.wfm_rcv(
+        quad_rate=self.sample_rate,
+        audio_decimation=5,
+      )
+      self.audio_in_rate = self.sample_rate // 5
+      if not self.direct:
+        self.rational_resampler_xxx_0 = ResamplePlan.MultistageResampler(self.audio_in_rate, 44100, 'fff')
+        self.rational_resampler_xxx_1 = ResamplePlan.MultistageResampler(44100, 11025, 'fff')
+      else:
+        if not self.fast:
+          self.rational_resampler_xxx_0 = ResamplePlan.MultistageResampler(self.audio_in_rate, 44100, 'fff')
+        if self.record and self.wav_tap:
+          self.rational_resampler_xxx_1 = ResamplePlan.MultistageResampler(self.audio_in_rate, 11025, 'fff')
+          self.blocks_multiply_const_vxx_0_2 = blocks.multiply_const_vff((.6, ))
+      self.blocks_multiply_const_vxx_0_0 = blocks.multiply_const_vff((.6, ))
+      if self.live and self.gpredict and self.track == None:
+        import gpredict
+        self.gpredict_doppler_0 = gpredict.doppler(self.set_doppler_freq, "localhost", 4532, False)
+
+    if self.direct:
+      if self.wav_input:
+        self.envelope_in_rate = 11025
+      else:
+        self.envelope_in_rate = self.audio_in_rate
+      self.rational_resampler_env = ResamplePlan.MultistageResampler(self.envelope_in_rate, ENVELOPE_RATE, 'fff')
+      self.band_pass_filter_0 = filter.interp_fir_filter_fff(1, TapCache.band_pass(
+        1, ENVELOPE_RATE, 500, 4.2e3, 200, firdes.WIN_HAMMING, 6.76).tolist())
+      self.hilbert_fc_0 = filter.hilbert_fc(65, firdes.WIN_HAMMING, 6.76)
+      self.blocks_complex_to_mag_0 = blocks.complex_to_mag(1)
+      self.rational_resampler_xxx_1_0 = ResamplePlan.MultistageResampler(ENVELOPE_RATE, 4160, 'fff')
+    else:
+      self.band_pass_filter_0 = filter.interp_fir_filter_fff(1, TapCache.band_pass(
+        1, 11025, 500, 4.2e3, 200, firdes.WIN_HAMMING, 6.76).tolist())
+      self.rational_resampler_xxx_0_0 = ResamplePlan.MultistageResampler(11025, 16640, 'fff')
+      self.hilbert_fc_0 = filter.hilbert_fc(65, firdes.WIN_HAMMING, 6.76)
+      self.blocks_complex_to_mag_0 = blocks.complex_to_mag(1)
+      self.rational_resampler_xxx_1_0 = ResamplePlan.MultistageResampler(16640, 4160, 'fff')
+    if self.png_sink == 'satnogs':
+      import satnogs
+      self.satnogs_noaa_apt_sink_0 = satnogs.noaa_apt_sink(self.filename_png, 2080, 1800, True, False)
+      self.image_sink = self.satnogs_noaa_apt_sink_0
+    else:
+      self.image_sink = APTImageSink(self.filename_png)
+
+    if self.record:
+      self.blocks_multiply_const_vxx_0_1 = blocks.multiply_const_vff((255, ))
+      self.blocks_float_to_uchar_0 = blocks.float_to_uchar()
+      policy = (AsyncWriter.BLOCK,self.record_policy)[self.live]
+      self.recorders = []
+      writer = AsyncWriter.open_file(self.base_name + ".dat", capacity = 1 << 20, block = 64 << 10, policy = policy)
+      self.blocks_file_sink_0_0 = RecordSink(writer, np.uint8)
+      self.recorders.append(('dat', writer))
+      if not self.wav_input and (self.wav_tap or not self.direct):
+        writer = AsyncWriter.open_wav(self.base_name + ".wav", 11025, capacity = 4 << 20, block = 256 << 10, policy = policy)
+        self.blocks_wavfile_sink_0 = RecordSink(writer, np.float32, pcm = True)
+        self.recorders.append(('wav', writer))
+      if self.live:
+        if self.record_format != 'raw':
+          archive = IQArchive.ArchiveWriter(self.base_name + IQArchive.EXTENSION, self.sample_rate,
+            self.center_freq, self.satellite, self.start_time, self.doppler_freq, sample_format = self.record_format)
+          writer = AsyncWriter.open_archive(archive, capacity = self.record_buffer, policy = policy)
+        else:
+          writer = AsyncWriter.open_file(self.base_name + ".raw", capacity = self.record_buffer, policy = policy)
+        self.blocks_file_sink_0 = RecordSink(writer, np.complex64)
+        self.recorders.append(('iq', writer))
+
+    # branches that only matter while someone is listening
+    if not self.fast:
+      self.blocks_multiply_const_vxx_0 = blocks.multiply_const_vff((self.volume, ))
+      self.audio_sink_0_0 = audio.sink(44100, '', True)
+      if self.wav_input:
+        self.rational_resampler_xxx_2 = filter.rational_resampler_fff(
+          interpolation=4,
+          decimation=1,
+          taps=None,
+          fractional_bw=None,
+        )
+      else:
+        self.blocks_udp_sink_0 = blocks.udp_sink(gr.sizeof_gr_complex*1, self.udp_ip_address, self.udp_port, 1472, True)
+
+  def connect_blocks(self):
+    if self.wav_input:
+      if self.direct:
+        self.connect((self.blocks_wavfile_source_0, 0), (self.rational_resampler_env, 0))
+        self.connect((self.rational_resampler_env, 0), (self.band_pass_filter_0, 0))
+      else:
+        self.connect((self.blocks_wavfile_source_0, 0), (self.band_pass_filter_0, 0))
+      if not self.fast:
+        self.connect((self.blocks_wavfile_source_0, 0), (self.rational_resampler_xxx_2, 0))
+        self.connect((self.rational_resampler_xxx_2, 0), (self.blocks_multiply_const_vxx_0, 0))
+        self.connect((self.blocks_multiply_const_vxx_0, 0), (self.audio_sink_0_0, 0))
+    else:
+      if not self.live and not self.fast:
+        self.connect((self.blocks_file_source, 0), (self.blocks_throttle_raw, 0))
+      if self.live and self.record:
+        self.connect((self.iq_source, 0), (self.blocks_file_sink_0, 0))
+      if not self.fast:
+        self.connect((self.iq_source, 0), (self.blocks_udp_sink_0, 0))
+      if self.track != None:
+        self.connect((self.iq_source, 0), (self.track_mixer, 0))
+        self.connect((self.track_mixer, 0), (self.freq_xlating_fir_filter_xxx_0, 0))
+      else:
+        self.connect((self.iq_source, 0), (self.freq_xlating_fir_filter_xxx_0, 0))
+      self.connect((self.freq_xlating_fir_filter_xxx_0, 0), (self.analog_wfm_rcv_0, 0))
+      if not self.fast:
+        self.connect((self.analog_wfm_rcv_0, 0), (self.rational_resampler_xxx_0, 0))
+        self.connect((self.rational_resampler_xxx_0, 0), (self.blocks_multiply_const_vxx_0, 0))
+        self.connect((self.blocks_multiply_const_vxx_0, 0), (self.audio_sink_0_0, 0))
+      if self.direct:
+        self.connect((self.analog_wfm_rcv_0, 0), (self.rational_resampler_env, 0))
+        self.connect((self.rational_resampler_env, 0), (self.blocks_multiply_const_vxx_0_0, 0))
+        self.connect((self.blocks_multiply_const_vxx_0_0, 0), (self.band_pass_filter_0, 0))
+        if self.record and self.wav_tap:
+          self.connect((self.analog_wfm_rcv_0, 0), (self.rational_resampler_xxx_1, 0))
+          self.connect((self.rational_resampler_xxx_1, 0), (self.blocks_multiply_const_vxx_0_2, 0))
+          self.connect((self.blocks_multiply_const_vxx_0_2, 0), (self.blocks_wavfile_sink_0, 0))
+      else:
+        if self.fast:
+          self.connect((self.analog_wfm_rcv_0, 0), (self.rational_resampler_xxx_0, 0))
+        self.connect((self.rational_resampler_xxx_0, 0), (self.rational_resampler_xxx_1, 0))
+        self.connect((self.rational_resampler_xxx_1, 0), (self.blocks_multiply_const_vxx_0_0, 0))
+        self.connect((self.blocks_multiply_const_vxx_0_0, 0), (self.band_pass_filter_0, 0))
+        if self.record:
+          self.connect((self.blocks_multiply_const_vxx_0_0, 0), (self.blocks_wavfile_sink_0, 0))
+    if self.direct:
+      self.connect((self.band_pass_filter_0, 0), (self.hilbert_fc_0, 0))
+    else:
+      self.connect((self.band_pass_filter_0, 0), (self.rational_resampler_xxx_0_0, 0))
+      self.connect((self.rational_resampler_xxx_0_0, 0), (self.hilbert_fc_0, 0))
+    self.connect((self.hilbert_fc_0, 0), (self.blocks_complex_to_mag_0, 0))
+    self.connect((self.blocks_complex_to_mag_0, 0), (self.rational_resampler_xxx_1_0, 0))
+    self.connect((self.rational_resampler_xxx_1_0, 0), (self.image_sink, 0))
+    if self.record:
+      self.connect((self.rational_resampler_xxx_1_0, 0), (self.blocks_multiply_const_vxx_0_1, 0))
+      self.connect((self.blocks_multiply_const_vxx_0_1, 0), (self.blocks_float_to_uchar_0, 0))
+      self.connect((self.blocks_float_to_uchar_0, 0), (self.blocks_file_sink_0_0, 0))
+
+  def get_doppler_freq(self):
+    return self.doppler_freq
+
+  def set_doppler_freq(self, doppler_freq):
+    self.doppler_freq = doppler_freq
+    if not self.wav_input and self.track == None:
+      self.freq_xlating_fir_filter_xxx_0.set_center_freq(self.doppler_freq-self.center_freq)
+
+  # (name, AsyncWriter.stats()) of every recording
+  def record_stats(self):
+    if not self.record:
+      return []
+    return [(name,writer.stats()) for name,writer in self.recorders]
+
+  # seconds of signal held in the replayed file
+  def source_duration(self):
+    if self.live:
+      return None
+    capture = CaptureReader.open_capture(self.source,self.sample_rate)
+    duration = capture.duration()
+    capture.close()
+    return duration
+
+def main():
+  parser = argparse.ArgumentParser(description="NOAA APT receiver and decoder")
+  parser.add_argument('source',nargs='?',default=SOURCE_RTL,
+    help="'rtl' for the SDR, or a .raw/.wav capture to replay")
+  parser.add_argument('--sample-rate',type=int,default=2000000)
+  parser.add_argument('--center-freq',type=float,default=106.5e6)
+  parser.add_argument('--satellite',default="")
+  parser.add_argument('--dir-path',default="")
+  parser.add_argument('--png',default=None)
+  parser.add_argument('--satnogs-png',action='store_true',
+    help="write the image with satnogs_noaa_apt_sink_0 at the end instead of line by line")
+  parser.add_argument('--fast',action='store_true',
+    help="replay a file as fast as possible, without throttle, audio or UDP")
+  parser.add_argument('--no-record',action='store_true')
+  parser.add_argument('--record-format',choices=('raw','int8','int16'),default='raw',
+    help="live IQ as complex64 .raw, or as an int8/int16 .iqc archive")
+  parser.add_argument('--record-policy',choices=(AsyncWriter.DROP,AsyncWriter.BLOCK),default=AsyncWriter.DROP,
+    help="live, when the disk can't keep up: drop recording, or make the radio wait")
+  parser.add_argument('--record-buffer',type=int,default=64,help="IQ recording buffer, MB")
+  parser.add_argument('--direct',action='store_true',
+    help="take the demodulated audio straight to the envelope rate")
+  parser.add_argument('--no-wav',action='store_true',
+    help="in --direct mode, skip the 11025 Hz wav recording")
+  parser.add_argument('--tle',default=None,
+    help="TLE file; correct Doppler from the predicted pass instead of gpredict")
+  parser.add_argument('--station',default=None,help="lat,lon[,alt] of the antenna, with --tle")
+  parser.add_argument('--track-hours',type=float,default=1.0,
+    help="live: how long from now the predicted correction covers")
+  options = parser.parse_args()
+  if options.fast and options.source == SOURCE_RTL:
+    parser.error("--fast only applies to file replay")
+  track = None
+  track_start = None
+  if options.tle != None:
+    if options.station == None:
+      parser.error("--tle needs --station")
+    station = PassPredictor.parse_station(options.station)
+    satellite = options.satellite
+    if options.source == SOURCE_RTL:
+      if satellite == "":
+        parser.error("--tle needs --satellite when receiving live")
+      orbit = PassPredictor.Orbit(PassPredictor.read_tle(options.tle,satellite))
+      downlink = PassPredictor.DOWNLINKS.get(PassPredictor.key_name(satellite),options.center_freq)
+      now = time.time()
+      track = PassPredictor.correction_track(orbit,station,downlink,options.center_freq,
+        now,now + options.track_hours * 3600)
+    elif not options.source.lower().endswith('.wav'):
+      track = PassPredictor.capture_track(options.source,options.tle,station,options.sample_rate,
+        (satellite,None)[satellite == ""],options.center_freq)
+      track_start = PassPredictor.capture_start(options.source)
+  tb = NOAAFlowgraph(source = options.source,sample_rate = options.sample_rate,
+    center_freq = options.center_freq,satellite = options.satellite,
+    dir_path = options.dir_path,filename_png = options.png,fast = options.fast,
+    record = not options.no_record,direct = options.direct,wav_tap = not options.no_wav,
+    track = track,track_start = track_start,record_format = options.record_format,
+    record_policy = options.record_policy,record_buffer = options.record_buffer << 20,
+    png_sink = ('progressive','satnogs')[options.satnogs_png])
+  t = time.time()
+  tb.start()
+  try:
+    if tb.live:
+      raw_input('Press Enter to quit: ')
+    else:
+      tb.wait()
+  except (EOFError,KeyboardInterrupt):
+    pass
+  tb.stop()
+  tb.wait()
+  elapsed = time.time() - t
+  for name,stats in tb.record_stats():
+    print("%-4s %.1f MB written, %.1f MB dropped in %d overflows, slowest write %.3f s" % (name,
+      stats['written'] / 1e6,stats['dropped'] / 1e6,stats['overflows'],stats['slowest_write']))
+  duration = tb.source_duration()
+  if duration != None and elapsed > 0:
+    print("replayed %.1f s of signal in %.1f s, real-time factor %.1fx" % (duration,elapsed,duration/elapsed))
+
+if __name__ == '__main__':
+  main()
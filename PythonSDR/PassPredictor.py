@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import calendar
+from datetime import datetime
+import numpy as np
+
+# satellite passes and Doppler curves from a local TLE file, without
+# gpredict. The orbit is propagated from the TLE mean elements as a
+# Kepler ellipse whose node and perigee drift under J2, with the TLE's
+# mean motion derivative for drag. Without SGP4's periodic terms the
+# position is off by 10-20 km, which near culmination puts the Doppler
+# up to ~50 Hz away at 137 MHz: nothing next to an APT signal 34 kHz wide,
+# and smooth, unlike the steps of a polled correction.
+#
+# times are Unix seconds throughout; every function takes an array of
+# them and evaluates the whole pass in one go
+
+MU = 398600.4418          # km^3/s^2
+EARTH_RADIUS = 6378.137   # km, WGS84
+FLATTENING = 1 / 298.257223563
+J2 = 1.08262668e-3
+EARTH_ROTATION = 7.2921150e-5   # rad/s
+LIGHT_SPEED = 299792.458  # km/s
+
+# APT downlinks, Hz, keyed as in the capture file names
+DOWNLINKS = {
+  'NOAA15' : 137.62e6,
+  'NOAA18' : 137.9125e6,
+  'NOAA19' : 137.1e6,
+}
+
+class TLE():
+  def __init__(self,name,line1,line2):
+    self.name = name.strip()
+    self.line1 = line1
+    self.line2 = line2
+    year = int(line1[18:20])
+    year += (2000,1900)[year >= 57]
+    day = float(line1[20:32])
+    self.epoch = calendar.timegm((year,1,1,0,0,0)) + (day - 1) * 86400
+    # first derivative of mean motion over two, rev/day^2
+    self.ndot2 = float(line1[33:43])
+    self.inclination = np.radians(float(line2[8:16]))
+    self.raan = np.radians(float(line2[17:25]))
+    self.eccentricity = float("0." + line2[26:33].strip())
+    self.arg_perigee = np.radians(float(line2[34:42]))
+    self.mean_anomaly = np.radians(float(line2[43:51]))
+    self.mean_motion = float(line2[52:63])
+
+  def __repr__(self):
+    return "TLE(%s, epoch %s)" % (self.name,datetime.utcfromtimestamp(self.epoch).strftime("%Y-%m-%d %H:%M:%S"))
+
+def key_name(name):
+  return name.replace(" ","").replace("-","").upper()
+
+# every element set in a file of name / line 1 / line 2 triplets;
+# name matching ignores case, spaces and dashes, so NOAA19 finds NOAA 19
+def read_tle(path,name = None):
+  f = open(path)
+  lines = [x.rstrip() for x in f if x.strip() != '']
+  f.close()
+  sets = []
+  i = 0
+  while i < len(lines):
+    if lines[i].startswith('1 ') and i + 1 < len(lines) and lines[i+1].startswith('2 '):
+      sets.append(TLE("",lines[i],lines[i+1]))
+      i += 2
+    elif i + 2 < len(lines) and lines[i+1].startswith('1 ') and lines[i+2].startswith('2 '):
+      sets.append(TLE(lines[i],lines[i+1],lines[i+2]))
+      i += 3
+    else:
+      i += 1
+  if name == None:
+    return sets
+  for tle in sets:
+    if key_name(tle.name) == key_name(name):
+      return tle
+  raise ValueError("%s: no element set for %s" % (path,name))
+
+# Greenwich mean sidereal angle, radians
+def gmst(times):
+  d = np.asarray(times,dtype=np.float64) / 86400.0 - 10957.5
+  return np.radians((280.46061837 + 360.98564736629 * d) % 360.0)
+
+class Station():
+  def __init__(self,latitude,longitude,altitude = 0.0):
+    self.latitude = latitude
+    self.longitude = longitude
+    # meters
+    self.altitude = altitude
+    lat = np.radians(latitude)
+    lon = np.radians(longitude)
+    e2 = FLATTENING * (2 - FLATTENING)
+    n = EARTH_RADIUS / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+    h = altitude / 1000.0
+    self.position = np.array([
+      (n + h) * np.cos(lat) * np.cos(lon),
+      (n + h) * np.cos(lat) * np.sin(lon),
+      (n * (1 - e2) + h) * np.sin(lat)])
+    # local east, north and up unit vectors, Earth fixed
+    self.east = np.array([-np.sin(lon),np.cos(lon),0.0])
+    self.north = np.array([-np.sin(lat) * np.cos(lon),-np.sin(lat) * np.sin(lon),np.cos(lat)])
+    self.up = np.array([np.cos(lat) * np.cos(lon),np.cos(lat) * np.sin(lon),np.sin(lat)])
+
+class Orbit():
+  def __init__(self,tle):
+    self.tle = tle
+    self.n0 = tle.mean_motion * 2 * np.pi / 86400.0
+    self.ndot2 = tle.ndot2 * 2 * np.pi / 86400.0 ** 2
+    self.a = (MU / self.n0 ** 2) ** (1.0 / 3)
+    e = tle.eccentricity
+    p = self.a * (1 - e * e)
+    k = 1.5 * J2 * (EARTH_RADIUS / p) ** 2 * self.n0
+    i = tle.inclination
+    self.raan_rate = -k * np.cos(i)
+    self.perigee_rate = k * (2 - 2.5 * np.sin(i) ** 2)
+
+  # inertial position (km) and velocity (km/s), each (n,3)
+  def state(self,times):
+    tle = self.tle
+    dt = np.asarray(times,dtype=np.float64) - tle.epoch
+    e = tle.eccentricity
+    m = tle.mean_anomaly + self.n0 * dt + self.ndot2 * dt * dt
+    raan = tle.raan + self.raan_rate * dt
+    w = tle.arg_perigee + self.perigee_rate * dt
+    # Kepler's equation, Newton steps; e is tiny for these orbits
+    ea = m.copy()
+    for k in range(6):
+      ea -= (ea - e * np.sin(ea) - m) / (1 - e * np.cos(ea))
+    cos_e = np.cos(ea)
+    sin_e = np.sin(ea)
+    root = np.sqrt(1 - e * e)
+    x = self.a * (cos_e - e)
+    y = self.a * root * sin_e
+    r = self.a * (1 - e * cos_e)
+    speed = np.sqrt(MU * self.a) / r
+    vx = -speed * sin_e
+    vy = speed * root * cos_e
+    ci = np.cos(tle.inclination)
+    si = np.sin(tle.inclination)
+    co = np.cos(raan)
+    so = np.sin(raan)
+    cw = np.cos(w)
+    sw = np.sin(w)
+    p = np.stack((co * cw - so * sw * ci,so * cw + co * sw * ci,sw * si),axis=-1)
+    q = np.stack((-co * sw - so * cw * ci,-so * sw + co * cw * ci,cw * si),axis=-1)
+    return x[:,None] * p + y[:,None] * q,vx[:,None] * p + vy[:,None] * q
+
+  # Earth fixed position and velocity
+  def fixed_state(self,times):
+    times = np.atleast_1d(np.asarray(times,dtype=np.float64))
+    r,v = self.state(times)
+    g = gmst(times)
+    c = np.cos(g)
+    s = np.sin(g)
+    rf = np.stack((c * r[:,0] + s * r[:,1],-s * r[:,0] + c * r[:,1],r[:,2]),axis=-1)
+    vf = np.stack((c * v[:,0] + s * v[:,1],-s * v[:,0] + c * v[:,1],v[:,2]),axis=-1)
+    # remove the frame rotation, w x r
+    vf[:,0] += EARTH_ROTATION * rf[:,1]
+    vf[:,1] -= EARTH_ROTATION * rf[:,0]
+    return rf,vf
+
+  # elevation and azimuth (degrees), range (km) and range rate (km/s)
+  def look(self,station,times):
+    rf,vf = self.fixed_state(times)
+    rho = rf - station.position
+    distance = np.sqrt(np.sum(rho * rho,axis=1))
+    rate = np.sum(rho * vf,axis=1) / distance
+    elevation = np.degrees(np.arcsin(rho.dot(station.up) / distance))
+    azimuth = np.degrees(np.arctan2(rho.dot(station.east),rho.dot(station.north))) % 360
+    return elevation,azimuth,distance,rate
+
+  # frequency received from a transmitter on the satellite
+  def received(self,station,times,downlink):
+    rate = self.look(station,times)[3]
+    return downlink * (1 - rate / LIGHT_SPEED)
+
+class Pass():
+  def __init__(self,aos,tca,los,max_elevation):
+    self.aos = aos
+    self.tca = tca
+    self.los = los
+    self.max_elevation = max_elevation
+
+  def duration(self):
+    return self.los - self.aos
+
+  def __repr__(self):
+    f = "%Y-%m-%d %H:%M:%S"
+    return "Pass(%s - %s, max %.1f deg)" % (time.strftime(f,time.localtime(self.aos)),time.strftime(f,time.localtime(self.los)),self.max_elevation)
+
+# passes rising above min_elevation within hours of start; found on a
+# coarse grid, then AOS, LOS and the culmination to the second
+def find_passes(orbit,station,start,hours = 24,min_elevation = 0.0,step = 30.0):
+  times = start + np.arange(0,hours * 3600.0 + step,step)
+  above = orbit.look(station,times)[0] > min_elevation
+  edges = np.flatnonzero(np.diff(above.astype(np.int8)))
+  rises = [i for i in edges if not above[i]]
+  sets = [i for i in edges if above[i]]
+  if above[0]:
+    rises.insert(0,None)
+  passes = []
+  for rise in rises:
+    later = [s for s in sets if rise == None or s > rise]
+    if len(later) == 0:
+      break
+    a = (times[rise],times[0])[rise == None]
+    b = times[later[0] + 1]
+    fine = np.arange(a,b + 1.0,1.0)
+    elevation = orbit.look(station,fine)[0]
+    up = np.flatnonzero(elevation > min_elevation)
+    if len(up) == 0:
+      continue
+    top = int(np.argmax(elevation))
+    passes.append(Pass(fine[up[0]],fine[top],fine[up[-1]],float(elevation[top])))
+  return passes
+
+# mixer frequency against time that brings the downlink, received at its
+# Doppler shifted frequency, back to where it would be without motion,
+# for a receiver tuned to center_freq: center_freq - received(t)
+def correction_track(orbit,station,downlink,center_freq,start,end,step = 1.0):
+  times = np.arange(start,end + step,step)
+  return times,center_freq - orbit.received(station,times,downlink)
+
+# Unix time of the first sample of a capture: an archive's header, or the
+# local time stamp in the name the flowgraph gave it; None when unknown
+def capture_start(path):
+  import CaptureReader
+  import IQArchive
+  if path.lower().endswith(IQArchive.EXTENSION):
+    return IQArchive.read_header(path)[0]['start_time']
+  stamp = CaptureReader.parse_name(path)[1]
+  if stamp == None:
+    return None
+  return time.mktime(stamp.timetuple()) + stamp.microsecond / 1e6
+
+# correction track covering a whole capture, from its name and length
+def capture_track(path,tle_path,station,sample_rate = 2e6,satellite = None,center_freq = None,downlink = None):
+  import CaptureReader
+  if satellite == None:
+    satellite = CaptureReader.parse_name(path)[0]
+  if downlink == None:
+    downlink = DOWNLINKS[key_name(satellite)]
+  if center_freq == None:
+    center_freq = downlink
+  start = capture_start(path)
+  if start == None:
+    raise ValueError("%s: no start time in the header or the file name" % path)
+  capture = CaptureReader.open_capture(path,sample_rate)
+  end = start + capture.duration()
+  capture.close()
+  orbit = Orbit(read_tle(tle_path,satellite))
+  return correction_track(orbit,station,downlink,center_freq,start,end)
+
+# "lat,lon[,alt]" in degrees and meters
+def parse_station(text):
+  values = [float(x) for x in text.split(',')]
+  return Station(*values)
+
+if __name__ == "__main__":
+  if len(sys.argv) < 4:
+    print("usage: %s tle_file satellite lat,lon[,alt] [hours] [frequency]" % sys.argv[0])
+    sys.exit(1)
+  tle = read_tle(sys.argv[1],sys.argv[2])
+  station = parse_station(sys.argv[3])
+  hours = float(sys.argv[4]) if len(sys.argv) > 4 else 24
+  frequency = float(sys.argv[5]) if len(sys.argv) > 5 else 137.1e6
+  orbit = Orbit(tle)
+  print(tle)
+  for p in find_passes(orbit,station,time.time(),hours):
+    f = orbit.received(station,np.array([p.aos,p.los]),frequency)
+    print("%s  %+6.0f Hz .. %+6.0f Hz" % (p,f[0] - frequency,f[1] - frequency))
@@ -1,29 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import re
+import StartupTrace
 import sys
 import os
-import ast
-import time
-import struct
-import signal
-import numpy as np
-import glob
-from gnuradio import gr
 
 from PyQt5 import Qt
 from PyQt5 import QtCore,QtGui
 from PyQt5.QtWidgets import QWidget,QMainWindow,QHeaderView, QMessageBox
-
-import osmosdr
+StartupTrace.mark('import PyQt5')
 
 from PythonSDR_GUI import Ui_MainWindow
 import Radio
+StartupTrace.mark('import Radio')
 import FFTDisp
 import TextEntry
 import Combo
 import Waterfall
+import DisplayScheduler
+StartupTrace.mark('import display modules')
+
+# carries the frame-ready notification from the GNU Radio thread
+# to the Qt thread
+class DrawGraphics(QtCore.QObject):
+    draw = QtCore.pyqtSignal() 
 
 class PythonSDR(QMainWindow, Ui_MainWindow):
   def __init__(self,app):
@@ -35,8 +35,13 @@ class PythonSDR(QMainWindow, Ui_MainWindow):
     self.setWindowTitle("PythonSDR - GMC")
     self.imageLabel.setPixmap(QtGui.QPixmap("datos.jpg"))
     app.aboutToQuit.connect(self.app_quit)
-    self.graphic_data = None
+    self.frame_queue = None
+    self.spectrum = True
+    self.audio_output = True
+    self.drawgr = DrawGraphics()
+    self.drawgr.draw.connect(self.draw_fft_disp)
     self.config = self.get_default_config()
+    self.display_scheduler = DisplayScheduler.DisplayScheduler(self.config)
     self.full_rebuild_flag = True
     self.running = False
     self.enabled = False
@@ -100,6 +105,7 @@ class PythonSDR(QMainWindow, Ui_MainWindow):
     # before modifying it
     QtCore.QTimer.singleShot(100, self.first_read_config)
               
+  @StartupTrace.traced('first_read_config')
   def first_read_config(self):
     self.assign_freq(self.config['freq'])
     self.update_radio_values()
@@ -112,6 +118,9 @@ class PythonSDR(QMainWindow, Ui_MainWindow):
     QtCore.QTimer.singleShot(100, self.run_stop)
     self.waterfall_widget = Waterfall.WaterfallWidget(self,self.config,self.waterfall_layout)
     self.fft_widget = FFTDisp.FFTDispWidget(self,self.config,self.fft_disp_layout)
+    self.display_timer = QtCore.QTimer()
+    self.display_timer.timeout.connect(self.adapt_display)
+    self.display_timer.start(int(self.config['display_adapt_interval'] * 1000))
     self.enabled = True
   
   def get_default_config(self):
@@ -129,6 +138,17 @@ class PythonSDR(QMainWindow, Ui_MainWindow):
       'disp_trace_color' : '#ffff00',
       'disp_text_color' : '#80c0ff',
       'disp_vline_color' : '#c00000',
+      # directory for filter designs kept across restarts, '' disables it
+      'tap_cache_dir' : '',
+      # device capabilities kept across restarts, '' disables the file
+      'device_cache_file' : '~/.pythonsdr/devices.json',
+      # spectrum frame rate policy: share of one core the display may
+      # use, the frame rate range, and pausing while it can't be seen
+      'display_cpu_budget' : 0.2,
+      'display_min_rate' : 5,
+      'display_max_rate' : 60,
+      'display_pause_hidden' : True,
+      'display_adapt_interval' : 1.0,
     }
     return defaults
       
@@ -212,20 +232,47 @@ class PythonSDR(QMainWindow, Ui_MainWindow):
  
   def critical_change(self,value,name = None):
     if self.enabled:
+      # a running radio swaps only the affected blocks and keeps
+      # the device streaming; anything else gets a full rebuild
+      if self.running and not self.full_rebuild_flag and self.radio.reconfigure(self.config):
+        return
       self.full_rebuild_flag = True
       self.run_stop()
   
+  # called by Radio, see RadioController for the headless versions
+  def device_available(self,found):
+    self.run_stop_button.setEnabled(found)
+    
+  def frame_ready(self):
+    self.drawgr.draw.emit()
+    
   def message_dialog(self,title,message):
     mb = QMessageBox (QMessageBox.Warning,title,message,QMessageBox.Ok)
     mb.exec_()
        
   def draw_fft_disp(self):
-    if self.graphic_data != None:
+    if self.frame_queue == None:
+      return
+    frame = self.frame_queue.acquire()
+    if frame is not None:
       #sya = self.config['dbscale_lo']
       #syb = self.config['dbscale_hi']
       # note Y axis reversal
-      self.fft_widget.accept_data(self.graphic_data)
-      self.graphic_data = None
+      self.fft_widget.accept_data(frame)
+      self.frame_queue.release()
+      self.display_scheduler.frame()
+      
+  # follows the display's drawing cost with the spectrum frame rate,
+  # and stops the spectrum while nothing of it is visible
+  def adapt_display(self):
+    if not self.running:
+      return
+    visible = not self.isMinimized() and (self.fft_widget.isVisible() or self.waterfall_widget.isVisible())
+    if self.display_scheduler.set_visible(visible):
+      self.radio.set_spectrum_enabled(not self.display_scheduler.paused)
+    rate = self.display_scheduler.update()
+    if rate != None:
+      self.radio.set_display_rate(rate)
       
   def set_bandwidth(self,value = None,string = None):
     if self.radio.osmosdr_source != None and string != None:
@@ -237,6 +284,8 @@ class PythonSDR(QMainWindow, Ui_MainWindow):
     self.running = False
     self.enabled = False
     self.start_process(False)
+    if self.frame_queue != None:
+      print("display frames: %(produced)d produced, %(dropped)d dropped, %(displayed)d displayed" % self.frame_queue.stats())
     Qt.QApplication.quit()   
 
 if __name__ == "__main__":
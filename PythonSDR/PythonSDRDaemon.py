@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import ast
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+
+from gnuradio import gr
+
+import RadioController
+import Radio
+import APTDecoder
+import APTImage
+import APTSync
+
+# unattended receive-and-decode: the same Radio as the Qt window, driven
+# by a plain RadioController, with no display and no sound card. The
+# demodulated audio goes through the APT demodulator and line sync and
+# every line is appended to <satellite>_<stamp>_lines.dat as it completes,
+# and to <satellite>_<stamp>.png, which stays viewable during the pass.
+
+class APTTap(gr.sync_block):
+  def __init__(self,audio_rate,path,path_png = None):
+    gr.sync_block.__init__(
+    self,
+    name = "APT Tap",
+    in_sig = [np.float32],
+    out_sig = None,
+    )
+    self.demod = APTDecoder.APTDemodulator(audio_rate = audio_rate)
+    self.sync = APTSync.StreamSync()
+    self.path = path
+    self.f = open(path,'wb')
+    self.image = None
+    if path_png != None:
+      self.image = APTImage.ProgressivePNG(path_png,APTSync.LINE_WIDTH)
+    self.lines = 0
+
+  def work(self, input_items, output_items):
+    samples = input_items[0]
+    self.write_rows(self.sync.feed(self.demod.feed(samples)))
+    self.f.flush()
+    return len(samples)
+
+  def write_rows(self,rows):
+    for row,confidence in rows:
+      row = APTDecoder.to_uchar(row)
+      row.tofile(self.f)
+      if self.image != None:
+        self.image.add_rows(row[None,:])
+      self.lines += 1
+
+  def close(self):
+    self.write_rows(self.sync.feed(self.demod.flush()))
+    self.f.close()
+    if self.image != None:
+      self.image.close()
+
+def get_default_config():
+  defaults = {
+    'freq' : 137100000,
+    'sample_rate' : 2000000,
+    'audio_rate' : 48000,
+    # zero keeps the device's bandwidth
+    'bandwidth' : 0,
+    'audio_output' : False,
+    'tap_cache_dir' : '',
+    'device_cache_file' : '~/.pythonsdr/devices.json',
+    'dir_path' : '.',
+    'satellite' : 'NOAA19',
+  }
+  return defaults
+
+# a config file holds a Python dict literal, any key of the defaults
+def read_config(path):
+  config = get_default_config()
+  if path != None:
+    f = open(path)
+    config.update(ast.literal_eval(f.read()))
+    f.close()
+  return config
+
+def main():
+  parser = argparse.ArgumentParser(description="receive and decode NOAA APT with no display")
+  parser.add_argument('--config',default=None,help="file with a dict of settings")
+  parser.add_argument('--freq',type=float,default=None)
+  parser.add_argument('--sample-rate',type=float,default=None)
+  parser.add_argument('--audio-rate',type=int,default=None)
+  parser.add_argument('--satellite',default=None)
+  parser.add_argument('--output-dir',default=None)
+  parser.add_argument('--duration',type=float,default=None,help="seconds to record (default: until interrupted)")
+  parser.add_argument('--audio',action='store_true',help="also play the audio")
+  options = parser.parse_args()
+  config = read_config(options.config)
+  for key,value in (('freq',options.freq),('sample_rate',options.sample_rate),
+      ('audio_rate',options.audio_rate),('satellite',options.satellite),('dir_path',options.output_dir)):
+    if value != None:
+      config[key] = value
+  if options.audio:
+    config['audio_output'] = True
+
+  controller = RadioController.RadioController(config)
+  radio = Radio.Radio(controller)
+  controller.radio = radio
+  radio.initialize_radio(config)
+  if radio.error or not radio.device_found:
+    return 1
+  radio.osmosdr_source.set_center_freq(int(config['freq']), 0)
+  radio.update_freq_xlating_fir_filter()
+
+  stamp = datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
+  base = os.path.join(config['dir_path'],config['satellite'] + "_" + stamp)
+  path = base + "_lines.dat"
+  tap = APTTap(radio.audio_rate,path,base + ".png")
+  radio.add_audio_tap(tap)
+
+  print("receiving %.4f MHz at %d S/s -> %s" % (config['freq'] / 1e6,radio.sample_rate,path))
+  radio.start()
+  t = time.time()
+  try:
+    while options.duration == None or time.time() - t < options.duration:
+      time.sleep(1)
+  except KeyboardInterrupt:
+    pass
+  radio.stop()
+  radio.wait()
+  tap.close()
+  print("%d lines in %.1f s" % (tap.lines,time.time() - t))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -1,32 +1,39 @@
 #!/usr/bin/env python2
 # -*- coding: utf-8 -*-
 
-import re
-import sys
 import os
-import time
-import struct
-import signal
 import numpy as np
 
-import osmosdr
-
-from PyQt5 import QtCore
-from PyQt5 import QtGui
-from PyQt5.QtWidgets import QWidget
-
-from gnuradio import analog
-from gnuradio import audio
-from gnuradio import blocks
-from gnuradio import filter
 from gnuradio import gr
-from gnuradio.filter import firdes
-from gnuradio.fft import logpwrfft
 
-import sip
+import StartupTrace
+import TapCache
+import FrameQueue
+import DeviceCache
 
-class DrawGraphics(QtCore.QObject):
-    draw = QtCore.pyqtSignal() 
+# the block libraries and the SDR driver are loaded when a radio is first
+# initialized, after the window is up, see load_blocks
+osmosdr = None
+analog = None
+audio = None
+blocks = None
+filter = None
+firdes = None
+logpwrfft = None
+ResamplePlan = None
+
+def load_blocks():
+  global osmosdr,analog,audio,blocks,filter,firdes,logpwrfft,ResamplePlan
+  if osmosdr != None:
+    return
+  analog = StartupTrace.load('gnuradio.analog')
+  audio = StartupTrace.load('gnuradio.audio')
+  blocks = StartupTrace.load('gnuradio.blocks')
+  filter = StartupTrace.load('gnuradio.filter')
+  firdes = filter.firdes
+  logpwrfft = StartupTrace.load('gnuradio.fft.logpwrfft')
+  ResamplePlan = StartupTrace.load('ResamplePlan')
+  osmosdr = StartupTrace.load('osmosdr')
 
 # a convenience class to acquire data from Gnuradio
     
@@ -41,22 +48,24 @@ class MyVectorSink(gr.sync_block):
     in_sig = [(np.float32,self.sz)],
     out_sig = None,
     )
-    # event-related
-    self.drawgr = DrawGraphics()
-    self.drawgr.draw.connect(self.main.draw_fft_disp)
+    # frames go to the display through a preallocated ring
+    self.queue = FrameQueue.FrameQueue(self.sz)
+    self.main.frame_queue = self.queue
 
   def work(self, input_items, output_items):
-    if(self.main.graphic_data == None):
-      data = np.fft.fftshift(input_items)
-      self.main.graphic_data = data[0][0].tolist()
-      self.drawgr.draw.emit()
-    return len(input_items)
+    frames = input_items[0]
+    # only the newest frame of the batch is offered to the display
+    self.queue.discard(len(frames) - 1)
+    if self.queue.put(frames[-1],True):
+      self.main.frame_ready()
+    return len(frames)
      
-class Radio(gr.top_block,QWidget):
+# main is the PythonSDR window or a RadioController.RadioController;
+# Radio itself has no Qt dependency
+class Radio(gr.top_block):
   def __init__(self,main):
     self.main = main
     gr.top_block.__init__(self, "Top Block")
-    QWidget.__init__(self)    
     self.fir_offset_f = 0
     self.cw_offset = 0
     self.blocks_multiply_const_volume = None
@@ -80,12 +89,22 @@ class Radio(gr.top_block,QWidget):
     self.device_found = False
     self.currently_configured_device = None
     self.error = False
+    self.audio_sink_rate = None
+    # settings the running graph was last built or reconfigured for
+    self.applied = None
+    # the FFT display branch, paused while the display can't be seen; a
+    # rebuilt radio starts out the way the scheduler left the old one
+    self.spectrum_enabled = main.spectrum and (main.display_scheduler is None or not main.display_scheduler.paused)
+    # extra consumers of the demodulated audio, such as a decoder
+    self.audio_taps = []
     #self.if_offset_f = 0
     
   def ntrp(self,x,xa,xb,ya,yb):
     return (x-xa) * (yb-ya) / (xb-xa) + ya
     
+  @StartupTrace.traced('initialize_radio')
   def initialize_radio(self,config,run = False):
+    load_blocks()
     # intermediate frequency constants
     self.if_sample_rate = int(240e3)
     self.ssb_hi = 3000
@@ -105,6 +124,10 @@ class Radio(gr.top_block,QWidget):
     self.update_offset_values()
     self.device_name = 'RTL-SDR'
     self.device_driver_name = 'rtl'
+    if config.get('tap_cache_dir'):
+      TapCache.shared.set_directory(os.path.expanduser(config['tap_cache_dir']))
+    if 'device_cache_file' in config:
+      DeviceCache.shared.set_path(config['device_cache_file'])
     self.configure_source_controls()
     
         
@@ -164,7 +187,7 @@ class Radio(gr.top_block,QWidget):
       else:
         rate = self.audio_rate
         
-      fir_taps = firdes.complex_band_pass(1, rate, -rate/2, rate/2,rate/2)
+      fir_taps = TapCache.complex_band_pass(1, rate, -rate/2, rate/2,rate/2).tolist()
       if self.freq_xlating_fir_filter == None:
         self.freq_xlating_fir_filter = filter.freq_xlating_fir_filter_ccc(1, (fir_taps), self.compute_offset_f(False), rate)
       else:
@@ -183,17 +206,19 @@ class Radio(gr.top_block,QWidget):
     ssb_bw = (5000,2400,1800)[value]
     cw_bw = (self.cw_base*2/3,self.cw_base/2,self.cw_base/3)[value]
     
-    am_taps = firdes.low_pass(
-      1, self.audio_rate, am_bw, 500, firdes.WIN_HAMMING, 6.76)
-    fm_taps = firdes.low_pass(
-      1, self.audio_rate, fm_bw, 500, firdes.WIN_HAMMING, 6.76)
-    wfm_taps = firdes.low_pass(
-      1, self.if_sample_rate, wfm_bw, 4e3, firdes.WIN_HAMMING, 6.76)
-    ssb_taps = firdes.low_pass(
-      1, self.audio_rate, ssb_bw, 100, firdes.WIN_HAMMING, 6.76)
+    # designs come from the shared cache, so switching back to a
+    # bandwidth or rate used before costs nothing
+    am_taps = TapCache.low_pass(
+      1, self.audio_rate, am_bw, 500, firdes.WIN_HAMMING, 6.76).tolist()
+    fm_taps = TapCache.low_pass(
+      1, self.audio_rate, fm_bw, 500, firdes.WIN_HAMMING, 6.76).tolist()
+    wfm_taps = TapCache.low_pass(
+      1, self.if_sample_rate, wfm_bw, 4e3, firdes.WIN_HAMMING, 6.76).tolist()
+    ssb_taps = TapCache.low_pass(
+      1, self.audio_rate, ssb_bw, 100, firdes.WIN_HAMMING, 6.76).tolist()
     #print("CW Base: %d - %d - %d" % (self.cw_base-cw_bw,self.cw_base + cw_bw,self.audio_rate))
-    cw_taps = firdes.band_pass(
-      1, self.audio_rate, self.cw_base-cw_bw,self.cw_base+cw_bw, 100, firdes.WIN_HAMMING, 6.76)
+    cw_taps = TapCache.band_pass(
+      1, self.audio_rate, self.cw_base-cw_bw,self.cw_base+cw_bw, 100, firdes.WIN_HAMMING, 6.76).tolist()
     
     if self.low_pass_filter_am == None:
       self.low_pass_filter_am = filter.fir_filter_ccf(1, am_taps)
@@ -220,22 +245,9 @@ class Radio(gr.top_block,QWidget):
     else:
       self.band_pass_filter_cw.set_taps(cw_taps)
       
-  # calculate gcd using Euclid's algorithm
-  def gcd(self,a, b):
-    while b:
-        a, b = b, a%b
-    return a
-    
-  def compute_dec_interp(self,a,b):
-    a = int(a)
-    b = int(b)
-    gcd = self.gcd(a,b)
-    dec = a/gcd
-    interp = b/gcd
-    return dec,interp
-    
   # reference at  https://github.com/osmocom/gr-osmosdr/blob/master/include/osmosdr/source.h
 
+  @StartupTrace.traced('configure_source_controls')
   def configure_source_controls(self):
     if self.osmosdr_source == None or self.device_driver_name != self.currently_configured_device:
       self.osmosdr_source = osmosdr.source( args="numchan=1 %s" % self.device_driver_name)
@@ -244,18 +256,19 @@ class Radio(gr.top_block,QWidget):
     # this is required to allow a change in bandwidth
     self.osmosdr_source.set_bandwidth(1)
     
-    self.gain_names = self.osmosdr_source.get_gain_names()
+    caps = self.source_capabilities()
+    self.gain_names = caps['gain_names']
     if len(self.gain_names) == 0:
       # no device found
-      self.main.run_stop_button.setEnabled(False)
       self.device_found = False
+      self.main.device_available(False)
     else:
       self.device_found = True
       self.osmosdr_source.set_gain(100,'LNA',0)
       print("LNA gain: 100")
-      self.main.run_stop_button.setEnabled(True)
+      self.main.device_available(True)
       
-    rng = self.osmosdr_source.get_bandwidth_range().values()
+    rng = caps['bandwidths']
     if len(rng) == 0:
       self.bandwidth_range = ["%d" % 10**x for x in range(3,9,1)]
     else:
@@ -264,7 +277,7 @@ class Radio(gr.top_block,QWidget):
     self.main.bandwidth_control.enable(True)
     self.main.bandwidth_control.set_value()
     
-    rng = self.osmosdr_source.get_sample_rates().values()
+    rng = caps['sample_rates']
     if len(rng) == 0:
       rates = [int(x*10e6) for x in range(1,24,1)]
     else:
@@ -285,7 +298,28 @@ class Radio(gr.top_block,QWidget):
     if self.device_found:
       self.osmosdr_source.set_sample_rate(self.sample_rate)
 
+  # gain stages and ranges of the open device, from the capability cache
+  # when this device has been probed before. The gain stages are always
+  # asked for: it's quick, and an absent device reports none, which no
+  # cached entry may hide
+  def source_capabilities(self):
+    gain_names = list(self.osmosdr_source.get_gain_names())
+    if len(gain_names) == 0:
+      return {'gain_names' : [],'bandwidths' : [],'sample_rates' : []}
+    version = getattr(osmosdr,'__version__','')
+    identity = DeviceCache.shared.identify(osmosdr,self.device_driver_name)
+    caps = DeviceCache.shared.get(self.device_driver_name,identity,version)
+    if caps == None:
+      caps = {
+        'gain_names' : gain_names,
+        'bandwidths' : list(self.osmosdr_source.get_bandwidth_range().values()),
+        'sample_rates' : list(self.osmosdr_source.get_sample_rates().values()),
+      }
+      DeviceCache.shared.put(self.device_driver_name,identity,caps,version)
+    return caps
+    
   # initial setup
+  @StartupTrace.traced('build_blocks')
   def build_blocks(self,config):
     if not self.device_found:
       return
@@ -295,7 +329,8 @@ class Radio(gr.top_block,QWidget):
     fft_size = 4096
     volume = 0.6
     print("Volumen: %s" % volume)
-    frame_rate = 60
+    # the display scheduler adjusts this while running
+    frame_rate = 60 if self.main.display_scheduler is None else self.main.display_scheduler.rate
     average = 0.50
     ssb_lo = self.ssb_lo
     ssb_hi = self.ssb_hi
@@ -304,14 +339,6 @@ class Radio(gr.top_block,QWidget):
       
     self.audio_dec_nrw = 1
     
-    self.dec_nrw, self.interp_nrw = self.compute_dec_interp(self.sample_rate,self.audio_rate)
-    
-    self.audio_dec_wid = self.if_sample_rate / self.audio_rate
-    
-    self.dec_wid, self.interp_wid = self.compute_dec_interp(self.sample_rate,self.if_sample_rate)
-    
-    self.configure_source_controls()
-    
     self.create_update_freq_xlating_fir_filter()
     
     self.analog_agc_cc = analog.agc2_cc(1e-1, 1e-2, 1.0, 1.0)
@@ -320,19 +347,7 @@ class Radio(gr.top_block,QWidget):
     self.analog_agc_ff = analog.agc2_ff(1e-1, 1e-2, 1.0, 1.0)
     self.analog_agc_ff.set_max_gain(1)
     
-    self.rational_resampler_wid = filter.rational_resampler_ccc(
-      decimation=self.dec_wid,
-      interpolation=self.interp_wid,
-      taps=None,
-      fractional_bw=None,
-        )
-        
-    self.rational_resampler_nrw = filter.rational_resampler_ccc(
-      decimation=self.dec_nrw,
-      interpolation=self.interp_nrw,
-      taps=None,
-      fractional_bw=None,
-        )
+    self.build_resamplers()
         
     self.analog_pwr_squelch = analog.pwr_squelch_cc(self.squelch_level, 1e-4, 0, True)
     
@@ -345,17 +360,7 @@ class Radio(gr.top_block,QWidget):
      
     self.blocks_complex_to_mag_am = blocks.complex_to_mag(1)
       
-    self.analog_nbfm_rcv = analog.nbfm_rx(
-        audio_rate=self.audio_rate,
-        quad_rate=self.audio_rate,
-        tau=75e-6,
-        max_dev=6e3,
-        )
-      
-    self.analog_wfm_rcv = analog.wfm_rcv(
-        quad_rate=self.if_sample_rate,
-        audio_decimation=self.audio_dec_wid,
-      )
+    self.build_demodulators()
       
     self.hilbert_fc_2 = filter.hilbert_fc(self.hilbert_taps_ssb, firdes.WIN_HAMMING, 6.76)
     self.hilbert_fc_1 = filter.hilbert_fc(self.hilbert_taps_ssb, firdes.WIN_HAMMING, 6.76)
@@ -386,15 +391,51 @@ class Radio(gr.top_block,QWidget):
     
     self.blocks_multiply_const_volume = blocks.multiply_const_vff((volume, ))
         
-    # only create this once
-    if self.audio_sink == None:
+    # only create this once, unless the audio rate changes
+    self.build_audio_sink()
+       
+  # blocks whose construction depends on the sample or audio rate
+  def build_resamplers(self):
+    # small integer decimation stages plus one short polyphase stage
+    # instead of a single huge rational resampler
+    self.rational_resampler_wid = ResamplePlan.MultistageResampler(
+      self.sample_rate,self.if_sample_rate,'ccf')
+        
+    self.rational_resampler_nrw = ResamplePlan.MultistageResampler(
+      self.sample_rate,self.audio_rate,'ccf')
+  
+  def build_demodulators(self):
+    self.audio_dec_wid = self.if_sample_rate / self.audio_rate
+    
+    self.analog_nbfm_rcv = analog.nbfm_rx(
+        audio_rate=self.audio_rate,
+        quad_rate=self.audio_rate,
+        tau=75e-6,
+        max_dev=6e3,
+        )
+      
+    self.analog_wfm_rcv = analog.wfm_rcv(
+        quad_rate=self.if_sample_rate,
+        audio_decimation=self.audio_dec_wid,
+      )
+      
+  def build_audio_sink(self):
+    if not self.main.audio_output:
+      # headless: the chain still needs somewhere to end
+      if self.audio_sink == None:
+        self.audio_sink = blocks.null_sink(gr.sizeof_float)
+      return
+    if self.audio_sink == None or self.audio_sink_rate != self.audio_rate:
       try:
         self.audio_sink = audio.sink(self.audio_rate, '', True)
+        self.audio_sink_rate = self.audio_rate
       except Exception as e:
         self.main.message_dialog("Audio Error","A problem has come up while accessing the audio system: %s" % e)
         self.error = True
         self.audio_sink = None
-       
+        self.audio_sink_rate = None
+    
+  @StartupTrace.traced('connect_blocks')
   def connect_blocks(self,config):
     self.disconnect_all()
     
@@ -404,79 +445,202 @@ class Radio(gr.top_block,QWidget):
     self.cw_offset = self.test_set_cw_offset()
     self.rebuild_filters(config)
     
-    self.connect((self.osmosdr_source, 0), (self.logpwrfft, 0))
-    self.connect((self.logpwrfft, 0), (self.fft_vector_sink, 0))
+    if self.mode in (self.main.MODE_USB,self.main.MODE_LSB,self.main.MODE_CW_USB,self.main.MODE_CW_LSB):
+      self.create_usb_lsb_switch()
+    
+    for edge in self.graph_edges():
+      self.connect(*edge)
+    self.applied = self.current_settings()
+    
+  # every connection of the graph for the current mode, so a settings
+  # change can be applied as the difference between two edge lists
+  def graph_edges(self):
+    edges = []
+    if self.spectrum_enabled:
+      edges += [
+        ((self.osmosdr_source, 0), (self.logpwrfft, 0)),
+        ((self.logpwrfft, 0), (self.fft_vector_sink, 0)),
+      ]
 
     if self.mode == self.main.MODE_AM:
-      self.connect((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0))
-      self.connect((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0))
-      self.connect((self.freq_xlating_fir_filter, 0), (self.low_pass_filter_am, 0))
-      self.connect((self.low_pass_filter_am, 0), (self.analog_pwr_squelch, 0))
-      self.connect((self.analog_pwr_squelch, 0), (self.analog_agc_cc, 0))
-      self.connect((self.analog_agc_cc, 0), (self.blocks_complex_to_mag_am, 0))
-      self.connect((self.blocks_complex_to_mag_am, 0), (self.blocks_multiply_const_volume, 0))
-      self.connect((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0))
+      edges += [
+        ((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0)),
+        ((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0)),
+        ((self.freq_xlating_fir_filter, 0), (self.low_pass_filter_am, 0)),
+        ((self.low_pass_filter_am, 0), (self.analog_pwr_squelch, 0)),
+        ((self.analog_pwr_squelch, 0), (self.analog_agc_cc, 0)),
+        ((self.analog_agc_cc, 0), (self.blocks_complex_to_mag_am, 0)),
+        ((self.blocks_complex_to_mag_am, 0), (self.blocks_multiply_const_volume, 0)),
+        ((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0)),
+      ]
 
     elif self.mode == self.main.MODE_FM:
-      self.connect((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0))
-      self.connect((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0))
-      self.connect((self.freq_xlating_fir_filter, 0), (self.low_pass_filter_fm, 0))
-      self.connect((self.low_pass_filter_fm, 0), (self.analog_pwr_squelch, 0))
-      self.connect((self.analog_pwr_squelch, 0), (self.analog_agc_cc, 0))
-      self.connect((self.analog_agc_cc, 0), (self.analog_nbfm_rcv, 0))
-      self.connect((self.analog_nbfm_rcv, 0), (self.blocks_multiply_const_volume, 0))
-      self.connect((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0))
+      edges += [
+        ((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0)),
+        ((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0)),
+        ((self.freq_xlating_fir_filter, 0), (self.low_pass_filter_fm, 0)),
+        ((self.low_pass_filter_fm, 0), (self.analog_pwr_squelch, 0)),
+        ((self.analog_pwr_squelch, 0), (self.analog_agc_cc, 0)),
+        ((self.analog_agc_cc, 0), (self.analog_nbfm_rcv, 0)),
+        ((self.analog_nbfm_rcv, 0), (self.blocks_multiply_const_volume, 0)),
+        ((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0)),
+      ]
      
     elif self.mode == self.main.MODE_WFM:
-      self.connect((self.osmosdr_source, 0), (self.rational_resampler_wid, 0))
-      self.connect((self.rational_resampler_wid, 0), (self.freq_xlating_fir_filter, 0))
-      self.connect((self.freq_xlating_fir_filter, 0), (self.low_pass_filter_wfm, 0))
-      self.connect((self.low_pass_filter_wfm, 0), (self.analog_pwr_squelch, 0))
-      self.connect((self.analog_pwr_squelch, 0), (self.analog_agc_cc, 0))
-      self.connect((self.analog_agc_cc, 0), (self.analog_wfm_rcv, 0)) 
-      self.connect((self.analog_wfm_rcv, 0), (self.blocks_multiply_const_volume, 0))
-      self.connect((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0))
+      edges += [
+        ((self.osmosdr_source, 0), (self.rational_resampler_wid, 0)),
+        ((self.rational_resampler_wid, 0), (self.freq_xlating_fir_filter, 0)),
+        ((self.freq_xlating_fir_filter, 0), (self.low_pass_filter_wfm, 0)),
+        ((self.low_pass_filter_wfm, 0), (self.analog_pwr_squelch, 0)),
+        ((self.analog_pwr_squelch, 0), (self.analog_agc_cc, 0)),
+        ((self.analog_agc_cc, 0), (self.analog_wfm_rcv, 0)),
+        ((self.analog_wfm_rcv, 0), (self.blocks_multiply_const_volume, 0)),
+        ((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0)),
+      ]
       
-    elif self.mode == self.main.MODE_USB or self.mode == self.main.MODE_LSB:
-      self.create_usb_lsb_switch()
-      self.connect((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0))
-      self.connect((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0))
-      self.connect((self.freq_xlating_fir_filter, 0), (self.analog_pwr_squelch, 0))
-      self.connect((self.analog_pwr_squelch, 0), (self.blocks_complex_to_float_ssb, 0))
-      self.connect((self.blocks_complex_to_float_ssb, 0), (self.hilbert_fc_1, 0))
-      self.connect((self.blocks_complex_to_float_ssb, 1), (self.hilbert_fc_2, 0))
-      self.connect((self.hilbert_fc_1, 0), (self.blocks_complex_to_real, 0))
-      self.connect((self.hilbert_fc_2, 0), (self.blocks_complex_to_imag, 0))
-      self.connect((self.blocks_complex_to_imag, 0), (self.blocks_multiply_const_ssb, 0))
-      self.connect((self.blocks_multiply_const_ssb, 0), (self.blocks_add, 1))
-      self.connect((self.blocks_complex_to_real, 0), (self.blocks_add, 0))
-      self.connect((self.blocks_add, 0), (self.low_pass_filter_ssb, 0))
-      self.connect((self.low_pass_filter_ssb, 0), (self.analog_pwr_squelch_ssb, 0))
-      self.connect((self.analog_pwr_squelch_ssb, 0), (self.analog_agc_ff, 0))
-      self.connect((self.analog_agc_ff, 0), (self.blocks_multiply_const_volume, 0))
-      self.connect((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0))
-        
-    elif self.mode == self.main.MODE_CW_USB or self.mode == self.main.MODE_CW_LSB:
-      self.create_usb_lsb_switch()
-      self.connect((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0))
-      self.connect((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0))
-      self.connect((self.freq_xlating_fir_filter, 0), (self.analog_pwr_squelch, 0))
-      self.connect((self.analog_pwr_squelch, 0), (self.blocks_complex_to_float_ssb, 0))
-      self.connect((self.blocks_complex_to_float_ssb, 0), (self.hilbert_fc_1, 0))
-      self.connect((self.blocks_complex_to_float_ssb, 1), (self.hilbert_fc_2, 0))
-      self.connect((self.hilbert_fc_1, 0), (self.blocks_complex_to_real, 0))
-      self.connect((self.hilbert_fc_2, 0), (self.blocks_complex_to_imag, 0))
-      self.connect((self.blocks_complex_to_imag, 0), (self.blocks_multiply_const_ssb, 0))
-      self.connect((self.blocks_multiply_const_ssb, 0), (self.blocks_add, 1))
-      self.connect((self.blocks_complex_to_real, 0), (self.blocks_add, 0))
-      self.connect((self.blocks_add, 0), (self.band_pass_filter_cw, 0))
-      self.connect((self.band_pass_filter_cw, 0), (self.analog_pwr_squelch_ssb, 0))
-      self.connect((self.analog_pwr_squelch_ssb, 0), (self.analog_agc_ff, 0))
-      self.connect((self.analog_agc_ff, 0), (self.blocks_multiply_const_volume, 0))
-
-      self.connect((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0))
+    elif self.mode in (self.main.MODE_USB,self.main.MODE_LSB,self.main.MODE_CW_USB,self.main.MODE_CW_LSB):
+      # SSB and CW share everything but the audio filter
+      if self.mode == self.main.MODE_USB or self.mode == self.main.MODE_LSB:
+        audio_filter = self.low_pass_filter_ssb
+      else:
+        audio_filter = self.band_pass_filter_cw
+      edges += [
+        ((self.osmosdr_source, 0), (self.rational_resampler_nrw, 0)),
+        ((self.rational_resampler_nrw, 0), (self.freq_xlating_fir_filter, 0)),
+        ((self.freq_xlating_fir_filter, 0), (self.analog_pwr_squelch, 0)),
+        ((self.analog_pwr_squelch, 0), (self.blocks_complex_to_float_ssb, 0)),
+        ((self.blocks_complex_to_float_ssb, 0), (self.hilbert_fc_1, 0)),
+        ((self.blocks_complex_to_float_ssb, 1), (self.hilbert_fc_2, 0)),
+        ((self.hilbert_fc_1, 0), (self.blocks_complex_to_real, 0)),
+        ((self.hilbert_fc_2, 0), (self.blocks_complex_to_imag, 0)),
+        ((self.blocks_complex_to_imag, 0), (self.blocks_multiply_const_ssb, 0)),
+        ((self.blocks_multiply_const_ssb, 0), (self.blocks_add, 1)),
+        ((self.blocks_complex_to_real, 0), (self.blocks_add, 0)),
+        ((self.blocks_add, 0), (audio_filter, 0)),
+        ((audio_filter, 0), (self.analog_pwr_squelch_ssb, 0)),
+        ((self.analog_pwr_squelch_ssb, 0), (self.analog_agc_ff, 0)),
+        ((self.analog_agc_ff, 0), (self.blocks_multiply_const_volume, 0)),
+        ((self.blocks_multiply_const_volume, 0), (self.audio_sink, 0)),
+      ]
 
     else:
       print("mode error -- no recognizable mode selected.")
       
-    
\ No newline at end of file
+    # taps take the audio from wherever the volume control does
+    for (a,pa),(b,pb) in list(edges):
+      if b is self.blocks_multiply_const_volume:
+        for tap in self.audio_taps:
+          edges.append(((a, pa), (tap, 0)))
+    return edges
+    
+  def current_settings(self):
+    return {
+      'sample_rate' : self.sample_rate,
+      'audio_rate' : self.audio_rate,
+      'mode' : self.mode,
+      'device' : self.device_driver_name,
+    }
+    
+  # blocks are compared by identity, a replaced block is a new edge
+  def edge_key(self,edge):
+    (a,pa),(b,pb) = edge
+    return (id(a),pa,id(b),pb)
+    
+  def apply_edges(self,old_edges,new_edges):
+    old_keys = set(self.edge_key(e) for e in old_edges)
+    new_keys = set(self.edge_key(e) for e in new_edges)
+    for edge in old_edges:
+      if self.edge_key(edge) not in new_keys:
+        self.disconnect(*edge)
+    for edge in new_edges:
+      if self.edge_key(edge) not in old_keys:
+        self.connect(*edge)
+        
+  # applies a sample rate, audio rate or mode change to the running graph
+  # without reopening the device: the source gets a setter call, blocks
+  # that can only be built for one rate are replaced, and just the edges
+  # around them are reconnected. Returns False when a full rebuild is
+  # needed instead (nothing built yet, or a different device).
+  def reconfigure(self,config):
+    if self.applied == None or self.error or not self.device_found:
+      return False
+    if self.device_driver_name != self.currently_configured_device:
+      return False
+    sample_rate = self.main.sample_rate_control.get_value()
+    audio_rate = self.main.audio_rate_control.get_value()
+    rate_changed = sample_rate != self.applied['sample_rate']
+    audio_changed = audio_rate != self.applied['audio_rate']
+    mode_changed = self.mode != self.applied['mode']
+    if not (rate_changed or audio_changed or mode_changed):
+      return True
+    
+    old_edges = self.graph_edges()
+    self.sample_rate = sample_rate
+    self.audio_rate = audio_rate
+    
+    # build replacements while the graph is still running
+    if rate_changed or audio_changed:
+      self.build_resamplers()
+    if audio_changed:
+      self.build_demodulators()
+    if audio_changed or mode_changed:
+      # its rate is fixed at construction and follows the mode
+      self.freq_xlating_fir_filter = None
+      self.cw_offset = self.test_set_cw_offset()
+      self.create_update_freq_xlating_fir_filter()
+      self.rebuild_filters(config)
+    if mode_changed:
+      self.create_usb_lsb_switch()
+    
+    self.lock()
+    try:
+      if audio_changed:
+        # the sound device may only take one stream, so the old sink is
+        # let go of before the new one opens it
+        released = [e for e in old_edges if e[1][0] is self.audio_sink]
+        for edge in released:
+          self.disconnect(*edge)
+        old_edges = [e for e in old_edges if e[1][0] is not self.audio_sink]
+        if self.main.audio_output:
+          self.audio_sink = None
+        self.build_audio_sink()
+        if self.error:
+          return False
+      if rate_changed:
+        self.osmosdr_source.set_sample_rate(sample_rate)
+        self.logpwrfft.set_sample_rate(sample_rate)
+      self.apply_edges(old_edges,self.graph_edges())
+    finally:
+      self.unlock()
+    self.applied = self.current_settings()
+    return True
+    
+  def add_audio_tap(self,block):
+    old_edges = self.graph_edges()
+    self.audio_taps.append(block)
+    if self.applied != None:
+      self.lock()
+      try:
+        self.apply_edges(old_edges,self.graph_edges())
+      finally:
+        self.unlock()
+    
+  def set_display_rate(self,rate):
+    if self.logpwrfft != None:
+      self.logpwrfft.set_vec_rate(rate)
+      
+  # connects or disconnects the spectrum branch without touching the
+  # demodulator chain
+  def set_spectrum_enabled(self,enabled):
+    if enabled == self.spectrum_enabled:
+      return
+    if self.applied == None:
+      self.spectrum_enabled = enabled
+      return
+    old_edges = self.graph_edges()
+    self.spectrum_enabled = enabled
+    self.lock()
+    try:
+      self.apply_edges(old_edges,self.graph_edges())
+    finally:
+      self.unlock()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# what Radio needs from whoever drives it. The Qt window provides the same
+# attributes and methods with its widgets; this plain version lets Radio
+# run with no display at all.
+
+MODE_AM = 0
+MODE_FM = 1
+MODE_WFM = 2
+MODE_USB = 3
+MODE_LSB = 4
+MODE_CW_USB = 5
+MODE_CW_LSB = 6
+
+BW_WIDE = 0
+BW_MEDIUM = 1
+BW_NARROW = 2
+
+# stands in for a Combo or TextEntry: the configured value lives in the
+# config dict, and once the device has reported its choices the nearest
+# one is used; zero stays zero, meaning the device's default
+class Setting():
+  def __init__(self,config,config_name,function = None):
+    self.config = config
+    self.config_name = config_name
+    self.function = function
+    self.content = None
+    self.enabled = False
+
+  def enable(self,value):
+    self.enabled = value
+
+  def set_content(self,content):
+    self.content = content
+
+  def get_value(self,value = None):
+    if value != None:
+      self.config[self.config_name] = value
+    value = self.config[self.config_name]
+    if self.content and float(value) > 0:
+      value = min(self.content,key=lambda x: abs(float(x) - float(value)))
+    return int(float(value))
+
+  def set_value(self,value = None):
+    value = self.get_value(value)
+    if self.function != None:
+      self.function(value)
+
+class RadioController():
+  MODE_AM = MODE_AM
+  MODE_FM = MODE_FM
+  MODE_WFM = MODE_WFM
+  MODE_USB = MODE_USB
+  MODE_LSB = MODE_LSB
+  MODE_CW_USB = MODE_CW_USB
+  MODE_CW_LSB = MODE_CW_LSB
+
+  BW_WIDE = BW_WIDE
+  BW_MEDIUM = BW_MEDIUM
+  BW_NARROW = BW_NARROW
+
+  def __init__(self,config):
+    self.config = config
+    self.full_rebuild_flag = True
+    self.frame_queue = None
+    self.display_scheduler = None
+    # no FFT display and no sound card unless asked for
+    self.spectrum = False
+    self.audio_output = config.get('audio_output',False)
+    self.sample_rate_control = Setting(config,'sample_rate')
+    self.audio_rate_control = Setting(config,'audio_rate')
+    self.bandwidth_control = Setting(config,'bandwidth',self.set_bandwidth)
+    self.radio = None
+
+  def set_bandwidth(self,bw):
+    # zero leaves the device's own choice
+    if self.radio != None and self.radio.osmosdr_source != None and bw > 0:
+      self.radio.osmosdr_source.set_bandwidth(bw,0)
+
+  def device_available(self,found):
+    if not found:
+      print("no SDR device found")
+
+  def frame_ready(self):
+    pass
+
+  def message_dialog(self,title,message):
+    print("%s: %s" % (title,message))
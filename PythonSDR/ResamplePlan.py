@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import FilterDesign
+import TapCache
+
+try:
+  from gnuradio import gr
+  from gnuradio import blocks
+  from gnuradio import filter as gr_filter
+except ImportError:
+  gr = None
+
+# turns an arbitrary input/output rate pair into a chain of small integer
+# decimation stages followed by, at most, one short polyphase stage.
+#
+# a single rational resampler such as 400000:44100 runs its polyphase
+# filter at the full input rate and needs thousands of taps; decimating
+# by 8 first with cheap wide-transition filters leaves a 50000:44100
+# stage whose filter only has to be sharp at the low rate.
+
+def gcd(a,b):
+  while b:
+    a, b = b, a%b
+  return a
+
+def prime_factors(n):
+  factors = []
+  p = 2
+  while p * p <= n:
+    while n % p == 0:
+      factors.append(p)
+      n //= p
+    p += 1
+  if n > 1:
+    factors.append(n)
+  return factors
+
+class Stage():
+  def __init__(self,in_rate,interp,decim,taps):
+    self.in_rate = in_rate
+    self.interp = interp
+    self.decim = decim
+    self.taps = taps
+    self.out_rate = in_rate * interp // decim
+
+  # multiply-accumulates per input sample
+  def cost(self):
+    return float(len(self.taps)) / self.decim
+
+  def __repr__(self):
+    return "Stage(%d -> %d, %d/%d, %d taps)" % (self.in_rate,self.out_rate,self.interp,self.decim,len(self.taps))
+
+class ResamplePlan():
+  def __init__(self,in_rate,out_rate,fractional_bw = 0.4,max_stage = 8,
+      window = FilterDesign.WIN_HAMMING,beta = 6.76):
+    self.in_rate = int(in_rate)
+    self.out_rate = int(out_rate)
+    g = gcd(self.in_rate,self.out_rate)
+    self.interp = self.out_rate // g
+    self.decim = self.in_rate // g
+    self.max_stage = max_stage
+    self.window = window
+    self.beta = beta
+    # edge of the band that must come through untouched; fractional_bw
+    # has the same meaning as in rational_resampler_xxx (0.5 = Nyquist)
+    self.passband = fractional_bw * min(self.in_rate,self.out_rate)
+    self.stages = []
+    self.design()
+
+  # largest divisor of the decimation that keeps the rate above the output
+  def integer_decimation(self):
+    best = 1
+    limit = self.in_rate // self.out_rate
+    for d in range(1,min(limit,self.decim)+1):
+      if self.decim % d == 0:
+        best = d
+    return best
+
+  # split a decimation factor into stages no larger than max_stage,
+  # biggest first while the rate is still high and filters are cheap
+  def split(self,d):
+    stages = []
+    for p in sorted(prime_factors(d),reverse = True):
+      if len(stages) > 0 and stages[-1] * p <= self.max_stage:
+        stages[-1] *= p
+      else:
+        stages.append(p)
+    return stages
+
+  def design(self):
+    rate = self.in_rate
+    d = self.integer_decimation()
+    for factor in self.split(d):
+      out = rate // factor
+      # aliases may land in the transition band as long as they stay
+      # clear of the final pass band
+      transition = out - 2 * self.passband
+      taps = TapCache.low_pass(1,rate,out / 2.0,transition,self.window,self.beta)
+      self.stages.append(Stage(rate,1,factor,taps))
+      rate = out
+    interp = self.interp
+    decim = self.decim // d
+    if interp != 1 or decim != 1:
+      poly_rate = rate * interp
+      edge = min(rate,rate * interp // decim) / 2.0
+      transition = 2 * (edge - self.passband)
+      taps = TapCache.low_pass(interp,poly_rate,edge,transition,self.window,self.beta)
+      self.stages.append(Stage(rate,interp,decim,taps))
+
+  def cost(self):
+    total = 0.0
+    scale = 1.0
+    for stage in self.stages:
+      total += scale * stage.cost()
+      scale *= float(stage.interp) / stage.decim
+    return total
+
+  def __repr__(self):
+    return "ResamplePlan(%d -> %d: %s)" % (self.in_rate,self.out_rate,", ".join(repr(s) for s in self.stages))
+
+if gr != None:
+  # the plan as a drop-in replacement for filter.rational_resampler_xxx;
+  # item is 'ccf' for complex streams and 'fff' for float streams
+  class MultistageResampler(gr.hier_block2):
+    def __init__(self,in_rate,out_rate,item = 'fff',fractional_bw = 0.4):
+      if item == 'ccf':
+        size = gr.sizeof_gr_complex
+      else:
+        size = gr.sizeof_float
+      gr.hier_block2.__init__(self,"Multistage Resampler",
+        gr.io_signature(1,1,size),gr.io_signature(1,1,size))
+      self.plan = ResamplePlan(in_rate,out_rate,fractional_bw)
+      self.stage_blocks = []
+      for stage in self.plan.stages:
+        taps = stage.taps.tolist()
+        if stage.interp == 1:
+          if item == 'ccf':
+            b = gr_filter.fir_filter_ccf(stage.decim,taps)
+          else:
+            b = gr_filter.fir_filter_fff(stage.decim,taps)
+        else:
+          if item == 'ccf':
+            b = gr_filter.rational_resampler_ccf(stage.interp,stage.decim,taps)
+          else:
+            b = gr_filter.rational_resampler_fff(stage.interp,stage.decim,taps)
+        self.stage_blocks.append(b)
+      if len(self.stage_blocks) == 0:
+        self.stage_blocks.append(blocks.copy(size))
+      self.connect(self,self.stage_blocks[0])
+      for a,b in zip(self.stage_blocks[:-1],self.stage_blocks[1:]):
+        self.connect(a,b)
+      self.connect(self.stage_blocks[-1],self)
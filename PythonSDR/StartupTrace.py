@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import functools
+import importlib
+
+# cold-start timing. With PYTHONSDR_TRACE_STARTUP=1 in the environment every
+# traced import and startup phase is reported on stderr with its own
+# duration and the time since the process began; otherwise nothing is
+# wrapped or printed.
+
+enabled = os.environ.get('PYTHONSDR_TRACE_STARTUP','') not in ('','0')
+
+start_time = time.time()
+last_mark = start_time
+
+def report(name,seconds):
+  if enabled:
+    sys.stderr.write("startup %8.1f ms  %-36s %8.1f ms\n" % ((time.time() - start_time) * 1e3,name,seconds * 1e3))
+
+# time since the previous mark, for a group of module-level imports
+def mark(name):
+  global last_mark
+  now = time.time()
+  report(name,now - last_mark)
+  last_mark = now
+
+# imports a module on first use, timing it the first time only
+def load(name):
+  if name in sys.modules:
+    return sys.modules[name]
+  t = time.time()
+  module = importlib.import_module(name)
+  report("import " + name,time.time() - t)
+  return module
+
+# method decorator reporting each call as a startup phase
+def traced(name):
+  def wrap(f):
+    if not enabled:
+      return f
+    @functools.wraps(f)
+    def call(*args,**kwargs):
+      t = time.time()
+      try:
+        return f(*args,**kwargs)
+      finally:
+        report(name,time.time() - t)
+    return call
+  return wrap
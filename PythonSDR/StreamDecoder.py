@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+import FilterDesign
+import TapCache
+import DSPBlocks
+import APTDecoder
+import APTSync
+import CaptureReader
+import PassPredictor
+
+# replays a full-rate complex64 .raw capture (blocks_file_sink_0) through
+# the NOAA receive chain one fixed-size chunk at a time:
+#
+#   mixer -> freq_xlating low pass -> FM demod -> audio filter -> APT envelope
+#
+# every stage keeps its own filter state between chunks, so peak memory
+# depends on chunk_size only, never on the length of the recording.
+#
+# track, a (times, freqs) Doppler correction from PassPredictor, makes the
+# mixer follow the pass instead of a fixed offset; offset is added to it
+
+class StreamDecoder():
+  def __init__(self,sample_rate = 2e6,offset = 0,filter_cutoff = 10e3,filter_trans = 100e3,
+      quad_rate = 400e3,audio_rate = 20e3,sync = True,gain = 0.6,track = None,start_time = None):
+    self.sample_rate = float(sample_rate)
+    self.offset = offset
+    self.quad_decim = max(1,int(round(self.sample_rate / quad_rate)))
+    self.quad_rate = self.sample_rate / self.quad_decim
+    self.audio_decim = max(1,int(round(self.quad_rate / audio_rate)))
+    self.audio_rate = self.quad_rate / self.audio_decim
+    # the flowgraph's analog_sig_source_x_1 x blocks_multiply_xx_0 and
+    # freq_xlating_fir_filter_xxx_0 as one stage decimating to the wfm_rcv
+    # quadrature rate; the mixer runs after the decimation
+    self.track = track
+    if track != None:
+      times,freqs = track
+      self.mixer = DSPBlocks.TrackMixer(times,np.asarray(freqs) + offset,self.quad_rate,start_time)
+    else:
+      self.mixer = DSPBlocks.Mixer(offset,self.quad_rate)
+    self.channel_filter = DSPBlocks.XlatingFilter(
+      TapCache.low_pass(1,self.sample_rate,filter_cutoff,filter_trans,FilterDesign.WIN_HAMMING,6.76),
+      self.quad_decim,self.sample_rate,self.mixer)
+    self.fm_demod = DSPBlocks.FMDemodulator(self.quad_rate)
+    self.audio_filter = DSPBlocks.OverlapSaveFilter(
+      DSPBlocks.audio_taps(self.quad_rate,5e3,1.6e3),self.audio_decim)
+    self.apt = APTDecoder.APTDemodulator(audio_rate = int(round(self.audio_rate)),gain = gain)
+    self.sync = None
+    if sync:
+      self.sync = APTSync.StreamSync()
+    self.line_buffer = np.zeros(0,dtype=np.float32)
+    self.samples = 0
+
+  def set_offset(self,offset):
+    if self.track != None:
+      self.mixer.freqs += offset - self.offset
+    else:
+      self.mixer.set_freq(offset)
+    self.offset = offset
+
+  # raw IQ chunk in, APT envelope at 4160 samples/s out
+  def envelope(self,chunk):
+    self.samples += len(chunk)
+    x = self.channel_filter.process(chunk)
+    x = self.fm_demod.process(x)
+    x = self.audio_filter.process(x)
+    return self.apt.feed(x)
+
+  def emit_lines(self,envelope):
+    if self.sync != None:
+      for row,confidence in self.sync.feed(envelope):
+        yield row
+    else:
+      w = APTSync.LINE_WIDTH
+      self.line_buffer = np.concatenate((self.line_buffer,envelope))
+      n = len(self.line_buffer) // w
+      for i in range(n):
+        yield self.line_buffer[i*w:(i+1)*w]
+      self.line_buffer = self.line_buffer[n*w:].copy()
+
+  # yields image lines as soon as they are complete
+  def lines(self,chunks):
+    for chunk in chunks:
+      for row in self.emit_lines(self.envelope(chunk)):
+        yield row
+    for row in self.emit_lines(self.apt.flush()):
+      yield row
+
+  # decodes a .raw capture, optionally only the part between start and
+  # start + duration seconds
+  def decode_file(self,path,chunk_size = 1 << 20,start = 0,duration = None):
+    capture = CaptureReader.open_capture(path,self.sample_rate)
+    if self.track != None:
+      # the track is in absolute time, the file name says where it starts
+      if self.mixer.start_time == None:
+        self.mixer.set_start_time(PassPredictor.capture_start(path) + start)
+    return self.lines(capture.chunks(chunk_size,start,duration))
+
+def main():
+  parser = argparse.ArgumentParser(description="decode a .raw capture into APT lines")
+  parser.add_argument('capture')
+  parser.add_argument('offset',nargs='?',type=float,default=0,help="mixer offset, Hz")
+  parser.add_argument('sample_rate',nargs='?',type=float,default=2e6)
+  parser.add_argument('--tle',default=None,help="TLE file, enables the Doppler correction")
+  parser.add_argument('--station',default=None,help="lat,lon[,alt] of the receiver")
+  parser.add_argument('--satellite',default=None,help="name in the TLE file (default: from the capture name)")
+  parser.add_argument('--center-freq',type=float,default=None,help="frequency the capture was tuned to (default: the downlink)")
+  options = parser.parse_args()
+  src = options.capture
+  rate = options.sample_rate
+  track = None
+  if options.tle != None:
+    if options.station == None:
+      parser.error("--tle needs --station")
+    track = PassPredictor.capture_track(src,options.tle,PassPredictor.parse_station(options.station),
+      rate,options.satellite,options.center_freq)
+  dest = os.path.splitext(src)[0] + "_lines.dat"
+  decoder = StreamDecoder(sample_rate = rate,offset = options.offset,track = track)
+  t = time.time()
+  count = 0
+  f = open(dest,'wb')
+  for row in decoder.decode_file(src):
+    APTDecoder.to_uchar(row).tofile(f)
+    count += 1
+  f.close()
+  elapsed = time.time() - t
+  print("decoded %d lines (%.1f s of signal) in %.2f s -> %s" % (count,decoder.samples / rate,elapsed,dest))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import FilterDesign
+
+# filter tap designs keyed on their parameters, shared by Radio, the
+# flowgraphs and the offline decoders. Flipping bandwidth or rate settings
+# back and forth finds the taps already designed; with a directory set,
+# designs also survive restarts as .npy files.
+#
+# cached taps are read-only arrays, GNU Radio blocks get them as lists
+
+class TapCache():
+  def __init__(self,size = 64,directory = None):
+    self.size = size
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.set_directory(directory)
+
+  def set_directory(self,directory):
+    if directory == '':
+      directory = None
+    if directory != None and not os.path.isdir(directory):
+      try:
+        os.makedirs(directory)
+      except OSError:
+        directory = None
+    self.directory = directory
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+
+  def path_for(self,key):
+    name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    return os.path.join(self.directory,name + ".npy")
+
+  def load(self,key):
+    if self.directory == None:
+      return None
+    path = self.path_for(key)
+    if not os.path.exists(path):
+      return None
+    try:
+      return np.load(path)
+    except (IOError,ValueError):
+      return None
+
+  def store(self,key,taps):
+    if self.directory == None:
+      return
+    path = self.path_for(key)
+    tmp = path + ".%d.tmp" % os.getpid()
+    try:
+      f = open(tmp,'wb')
+      np.save(f,taps)
+      f.close()
+      os.rename(tmp,path)
+    except (IOError,OSError):
+      pass
+
+  # key is (kind, gain, rate, cutoff(s), transition, window, beta);
+  # design is only called on a miss in both tiers
+  def get(self,key,design):
+    with self.lock:
+      taps = self.entries.pop(key,None)
+      if taps is not None:
+        self.entries[key] = taps
+        self.hits += 1
+        return taps
+    taps = self.load(key)
+    if taps is None:
+      taps = np.asarray(design())
+      self.store(key,taps)
+    taps.flags.writeable = False
+    with self.lock:
+      self.misses += 1
+      self.entries[key] = taps
+      while len(self.entries) > self.size:
+        self.entries.popitem(last = False)
+    return taps
+
+shared = TapCache(directory = os.environ.get('PYTHONSDR_TAP_CACHE'))
+
+def low_pass(gain,rate,cutoff,transition,window = FilterDesign.WIN_HAMMING,beta = 6.76):
+  key = ('low_pass',float(gain),float(rate),float(cutoff),float(transition),int(window),float(beta))
+  return shared.get(key,lambda: FilterDesign.low_pass(gain,rate,cutoff,transition,window,beta))
+
+def band_pass(gain,rate,low_cutoff,high_cutoff,transition,window = FilterDesign.WIN_HAMMING,beta = 6.76):
+  key = ('band_pass',float(gain),float(rate),(float(low_cutoff),float(high_cutoff)),float(transition),int(window),float(beta))
+  return shared.get(key,lambda: FilterDesign.band_pass(gain,rate,low_cutoff,high_cutoff,transition,window,beta))
+
+def complex_band_pass(gain,rate,low_cutoff,high_cutoff,transition,window = FilterDesign.WIN_HAMMING,beta = 6.76):
+  key = ('complex_band_pass',float(gain),float(rate),(float(low_cutoff),float(high_cutoff)),float(transition),int(window),float(beta))
+  return shared.get(key,lambda: FilterDesign.complex_band_pass(gain,rate,low_cutoff,high_cutoff,transition,window,beta))
@@ -2,15 +2,6 @@
 # -*- coding: utf-8 -*-
 
 
-import re
-import sys
-import os
-import time
-import struct
-import signal
-import numpy as np
-from threading import Thread
-
 from PyQt5 import Qt
 from PyQt5 import QtCore,QtGui
 from PyQt5.QtWidgets import QWidget
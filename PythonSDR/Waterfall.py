@@ -1,14 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import re
-import sys
-import os
 import time
-import struct
-import signal
 import numpy as np
-import random
+
+import DisplayReduce
 
 from PyQt5 import Qt
 from PyQt5 import QtCore,QtGui
@@ -28,6 +24,8 @@ class WaterfallWidget(QWidget):
     self.dw = 0
     self.dh = 0
     self.line = 0
+    self.buffer = None
+    self.reducer = DisplayReduce.DisplayReducer()
     self.bias = self.main.config['waterfall_bias']
     self.drawing = False
     self.setup1()
@@ -44,15 +42,20 @@ class WaterfallWidget(QWidget):
       h = self.ntrp(n,0,256,240,60)
       cn = self.ntrp(n,0,256,80,255)
       self.colors.append(QColor.fromHsv(h,255.0,cn))
+    # the same ramp as packed 0xffRRGGBB pixels for whole-row lookups
+    self.lut = np.array([c.rgb() & 0xffffffff for c in self.colors],dtype=np.uint32)
       
   def setup2(self):
     dw = self.dw
     dh = self.dh
     self.acquire_essential()
     if dw != self.dw or dh != self.dh:
-      self.image = QImage(self.dw,self.dh,QImage.Format_RGB32)
-      p = QPainter(self.image)
-      p.fillRect(0, 0, self.width(), self.height(),QtGui.QColor(0,0,0))
+      # ring of rows the image is a view of; the QImage does not own
+      # the memory so the array has to live as long as the image
+      self.buffer = np.empty((self.dh,self.dw),dtype=np.uint32)
+      self.buffer.fill(0xff000000)
+      self.image = QImage(self.buffer.data,self.dw,self.dh,self.dw * 4,QImage.Format_RGB32)
+      self.line = 0
       
   def acquire_essential(self):
     self.dh = self.height()
@@ -62,26 +65,25 @@ class WaterfallWidget(QWidget):
     return (x-xa)*(yb-ya)/(xb-xa) + ya
       
   def accept_data_line(self,array):
-    if not self.drawing and self.isVisible():
+    if not self.drawing and self.isVisible() and self.buffer is not None and self.dh > 0:
+      t = time.time()
       self.line = (self.line - 1) % self.dh
       self.drawing = True
-      qp = QPainter(self.image)
       
-      la = len(array)
-      ox = None
-      for x,y in enumerate(array):
-        x = self.ntrp(x,0,la,0,self.dw)
-        y = int(self.ntrp(y*4+self.bias,self.config['dbscale_lo'],self.config['dbscale_hi'],0,255))
-        y = (y,0)[y < 0]
-        y = (y,255)[y > 255]
-        if ox != None:
-          qp.setPen(self.colors[y])
-          qp.drawLine(ox,self.line,x,self.line)
-        ox = x
+      lo = self.config['dbscale_lo']
+      hi = self.config['dbscale_hi']
+      # strongest bin under each pixel column
+      values = self.reducer.peak(np.asarray(array),max(self.dw,1))
+      # same mapping as ntrp(y*4+bias,lo,hi,0,255), clamped to the palette
+      index = ((values * 4 + (self.bias - lo)) * (255.0 / (hi - lo))).astype(np.int32)
+      np.clip(index,0,255,out=index)
+      self.buffer[self.line] = self.lut[index]
       self.update()
+      self.main.display_scheduler.measure(time.time() - t)
     
   def paintEvent(self,event):
     if self.isVisible():
+      t = time.time()
       self.drawing = True
       self.setup2()
       qp = QtGui.QPainter(self)
@@ -97,5 +99,4 @@ class WaterfallWidget(QWidget):
       qp.drawImage(ta,self.image,fa)
       qp.drawImage(tb,self.image,fb)
       self.drawing = False
-    
-    
\ No newline at end of file
+      self.main.display_scheduler.measure(time.time() - t)
@@ -0,0 +1,29 @@
+import numpy as np
+
+import APTSync
+
+# synthetic APT: random pixels with both sync patterns, one line every
+# 2080 words starting at offset, and the 2400 Hz AM audio carrying it
+def words(lines,offset = 0,seed = 1):
+  rng = np.random.RandomState(seed)
+  w = APTSync.LINE_WIDTH
+  out = (rng.rand(offset + (lines + 1) * w) * 0.6 + 0.2).astype(np.float32)
+  for i in range(lines + 1):
+    s = offset + i * w
+    out[s:s + 39] = APTSync.SYNC_A * 0.8 + 0.1
+    out[s + 1040:s + 1079] = APTSync.SYNC_B * 0.8 + 0.1
+  return out
+
+def audio(envelope,rate = 11025):
+  n = int(len(envelope) * rate / 4160.0)
+  t = np.arange(n) / float(rate)
+  env = np.interp(t * 4160,np.arange(len(envelope)),envelope)
+  return (env * np.sin(2 * np.pi * 2400 * t)).astype(np.float32)
+
+# the audio as the satellite sends it, FM with 17 kHz deviation, received
+# at offset Hz from the center of an IQ stream
+def iq(envelope,rate,offset = 0):
+  a = audio(envelope,int(rate))
+  t = np.arange(len(a)) / float(rate)
+  phase = 2 * np.pi * 17e3 * np.cumsum(a) / rate + 2 * np.pi * offset * t
+  return np.exp(1j * phase).astype(np.complex64)
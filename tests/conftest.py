@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+# the modules live side by side in PythonSDR/ and import each other by name
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'PythonSDR'))
+
+# the GNU Radio stand-ins of fakegr for the modules that import it at the
+# top, which are imported afresh for every test that asks for them
+GR_MODULES = ['Radio','ResamplePlan','PythonSDRDaemon','NOAAFlowgraph']
+
+@pytest.fixture
+def fake_gnuradio(monkeypatch):
+  import fakegr
+  del fakegr.graphs[:]
+  del fakegr.sinks[:]
+  for name,module in fakegr.modules().items():
+    monkeypatch.setitem(sys.modules,name,module)
+  for name in GR_MODULES:
+    monkeypatch.delitem(sys.modules,name,raising=False)
+  yield fakegr
+  for name in GR_MODULES:
+    sys.modules.pop(name,None)
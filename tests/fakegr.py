@@ -0,0 +1,125 @@
+import types
+
+# just enough of GNU Radio and gr-osmosdr for Radio and the flowgraphs to
+# build and wire their blocks with no radio libraries installed. Blocks
+# take any arguments and any setter call, and any block a module is asked
+# for is one; top blocks keep the set of connected edges.
+
+class Block(object):
+  def __init__(self,*args,**kwargs):
+    self.args = args
+    self.kwargs = kwargs
+    self.calls = []
+
+  def __getattr__(self,name):
+    if name.startswith('__'):
+      raise AttributeError(name)
+    def method(*args,**kwargs):
+      self.calls.append((name,args))
+    return method
+
+class Module(types.ModuleType):
+  def __getattr__(self,name):
+    if name.startswith('__'):
+      raise AttributeError(name)
+    return Block
+
+class sync_block(Block):
+  def __init__(self,name = "",in_sig = None,out_sig = None):
+    Block.__init__(self)
+
+class hier_block2(Block):
+  def connect(self,*args):
+    pass
+
+class top_block(Block):
+  def __init__(self,*args):
+    Block.__init__(self)
+    self.edges = set()
+    self.locked = False
+    graphs.append(self)
+
+  def key(self,a,b):
+    return (id(a[0]),a[1],id(b[0]),b[1])
+
+  def connect(self,a,b):
+    assert self.key(a,b) not in self.edges
+    self.edges.add(self.key(a,b))
+
+  def disconnect(self,a,b):
+    self.edges.remove(self.key(a,b))
+
+  def disconnect_all(self):
+    self.edges = set()
+
+  def lock(self):
+    self.locked = True
+
+  def unlock(self):
+    self.locked = False
+
+  def connected(self,block):
+    return any(id(block) in (e[0],e[2]) for e in self.edges)
+
+graphs = []
+
+# every sound card sink notes which sinks the running graphs still had
+# connected when it was opened
+class audio_sink(Block):
+  def __init__(self,*args):
+    Block.__init__(self,*args)
+    self.open_with = [s for s in sinks if any(g.connected(s) for g in graphs)]
+    self.locked = any(g.locked for g in graphs)
+    sinks.append(self)
+
+sinks = []
+
+class Source(Block):
+  def get_gain_names(self):
+    return ['LNA']
+
+  def get_bandwidth_range(self):
+    return {}
+
+  def get_sample_rates(self):
+    return {0 : 2400000,1 : 3200000}
+
+def modules():
+  gr = Module('gnuradio.gr')
+  gr.sync_block = sync_block
+  gr.hier_block2 = hier_block2
+  gr.top_block = top_block
+  gr.io_signature = Block
+  gr.sizeof_float = 4
+  gr.sizeof_gr_complex = 8
+  firdes = types.ModuleType('firdes')
+  firdes.WIN_HAMMING = 0
+  names = {
+    'gnuradio.analog' : ['agc2_cc','agc2_ff','pwr_squelch_cc','pwr_squelch_ff','nbfm_rx','wfm_rcv'],
+    'gnuradio.blocks' : ['multiply_vcc','complex_to_real','complex_to_imag','complex_to_mag',
+      'complex_to_float','multiply_const_vff','add_vff','null_sink','copy'],
+    'gnuradio.filter' : ['freq_xlating_fir_filter_ccc','fir_filter_ccf','fir_filter_fff',
+      'rational_resampler_ccf','rational_resampler_fff','hilbert_fc'],
+    'gnuradio.fft.logpwrfft' : ['logpwrfft_c'],
+  }
+  out = {'gnuradio.gr' : gr}
+  for name,blocks in names.items():
+    module = Module(name)
+    for block in blocks:
+      setattr(module,block,Block)
+    out[name] = module
+  out['gnuradio.filter'].firdes = firdes
+  audio = types.ModuleType('gnuradio.audio')
+  audio.sink = audio_sink
+  out['gnuradio.audio'] = audio
+  out['gnuradio.fft'] = types.ModuleType('gnuradio.fft')
+  out['gnuradio.fft'].logpwrfft = out['gnuradio.fft.logpwrfft']
+  gnuradio = types.ModuleType('gnuradio')
+  for name,module in out.items():
+    if name.count('.') == 1:
+      setattr(gnuradio,name.split('.')[1],module)
+  out['gnuradio'] = gnuradio
+  osmosdr = types.ModuleType('osmosdr')
+  osmosdr.source = Source
+  out['osmosdr'] = osmosdr
+  return out
@@ -0,0 +1,32 @@
+import zlib
+import struct
+import numpy as np
+
+# strict reader for the 8-bit, unfiltered PNGs APTImage writes; raises
+# on anything a viewer could choke on
+def read_png(path):
+  f = open(path,'rb')
+  data = f.read()
+  f.close()
+  assert data[:8] == b'\x89PNG\r\n\x1a\n'
+  position = 8
+  chunks = []
+  while position < len(data):
+    size,tag = struct.unpack('>I4s',data[position:position + 8])
+    body = data[position + 8:position + 8 + size]
+    assert len(body) == size
+    crc = struct.unpack('>I',data[position + 8 + size:position + 12 + size])[0]
+    assert crc == zlib.crc32(tag + body) & 0xffffffff
+    chunks.append((tag,body))
+    position += 12 + size
+  assert chunks[0][0] == b'IHDR' and chunks[-1] == (b'IEND',b'')
+  width,height,depth,color_type = struct.unpack('>IIBB',chunks[0][1][:10])
+  assert width > 0 and height > 0 and depth == 8
+  channels = {0 : 1,2 : 3}[color_type]
+  raw = zlib.decompress(b''.join(body for tag,body in chunks if tag == b'IDAT'))
+  rows = np.frombuffer(raw,dtype=np.uint8).reshape(height,width * channels + 1)
+  assert np.all(rows[:,0] == 0)
+  image = rows[:,1:]
+  if channels == 3:
+    image = image.reshape(height,width,3)
+  return image
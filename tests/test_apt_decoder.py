@@ -0,0 +1,35 @@
+import numpy as np
+
+import APTDecoder
+import aptsignal
+
+def test_feed_is_independent_of_chunk_sizes():
+  x = aptsignal.audio(aptsignal.words(6))
+  whole = APTDecoder.APTDemodulator().process(x)
+  demod = APTDecoder.APTDemodulator()
+  rng = np.random.RandomState(3)
+  parts = []
+  i = 0
+  while i < len(x):
+    n = int(rng.randint(1,20000))
+    parts.append(demod.feed(x[i:i + n]))
+    i += n
+  parts.append(demod.flush())
+  chunked = np.concatenate(parts)
+  assert len(chunked) == len(whole)
+  assert np.allclose(chunked,whole,atol=1e-5)
+
+def test_output_length_follows_the_rate_ratio():
+  x = np.zeros(11025 * 3 + 17,dtype=np.float32)
+  out = APTDecoder.APTDemodulator().process(x)
+  assert len(out) == len(x) * 4160 // 11025
+
+def test_recovers_the_envelope():
+  words = aptsignal.words(4)
+  out = APTDecoder.APTDemodulator().process(aptsignal.audio(words))
+  n = min(len(out),len(words))
+  # away from the stream edges the envelope follows the words
+  assert np.corrcoef(out[500:n - 500],words[500:n - 500])[0,1] > 0.9
+
+def test_to_uchar_clips():
+  assert list(APTDecoder.to_uchar(np.array([-1,0,0.5,2.0]))) == [0,0,127,255]
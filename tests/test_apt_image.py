@@ -0,0 +1,31 @@
+import numpy as np
+
+import APTImage
+import pngread
+
+def test_write_png(tmpdir):
+  path = str(tmpdir.join("a.png"))
+  image = np.random.RandomState(1).randint(0,256,(30,40,3)).astype(np.uint8)
+  APTImage.write_png(path,image)
+  assert np.array_equal(pngread.read_png(path),image)
+
+def test_progressive_png_is_valid_after_every_flush(tmpdir):
+  path = str(tmpdir.join("p.png"))
+  png = APTImage.ProgressivePNG(path,64,flush_rows = 10)
+  # readable before anything has been added
+  assert pngread.read_png(path).shape == (1,64)
+  image = np.random.RandomState(2).randint(0,256,(95,64)).astype(np.uint8)
+  for i in range(0,95,7):
+    png.add_rows(image[i:i + 7])
+    flushed = png.height - png.unflushed
+    if flushed > 0:
+      assert np.array_equal(pngread.read_png(path),image[:flushed])
+  png.close()
+  assert np.array_equal(pngread.read_png(path),image)
+
+def test_progressive_png_closed_empty_stays_valid(tmpdir):
+  path = str(tmpdir.join("p.png"))
+  png = APTImage.ProgressivePNG(path,16,channels = 3)
+  png.flush()
+  png.close()
+  assert pngread.read_png(path).shape == (1,16,3)
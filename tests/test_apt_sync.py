@@ -0,0 +1,31 @@
+import numpy as np
+
+import APTSync
+import aptsignal
+
+def test_locate_finds_every_line_of_an_exact_multiple():
+  w = APTSync.LINE_WIDTH
+  envelope = aptsignal.words(300)[:300 * w]
+  starts,confidence = APTSync.APTSync().locate(envelope)
+  assert len(starts) == 300
+  assert np.all(starts == np.arange(300) * w)
+  assert np.all(confidence > 0.5)
+
+def test_locate_with_an_offset():
+  w = APTSync.LINE_WIDTH
+  envelope = aptsignal.words(40,offset = 777)
+  starts,confidence = APTSync.APTSync().locate(envelope)
+  assert np.all(starts % w == 777)
+  assert len(starts) == (len(envelope) - 777) // w
+
+def test_stream_sync_tracks_every_line():
+  w = APTSync.LINE_WIDTH
+  envelope = aptsignal.words(30,offset = 1234)
+  sync = APTSync.StreamSync()
+  rows = []
+  for i in range(0,len(envelope),3000):
+    rows.extend(sync.feed(envelope[i:i + 3000]))
+  assert len(rows) >= 27
+  for row,confidence in rows:
+    assert np.allclose(row[:39],APTSync.SYNC_A * 0.8 + 0.1)
+    assert confidence > 0.5
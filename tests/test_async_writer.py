@@ -0,0 +1,107 @@
+import io
+import time
+import threading
+import numpy as np
+
+import AsyncWriter
+import IQArchive
+
+class SlowFile():
+  def __init__(self,delay = 0.0):
+    self.data = io.BytesIO()
+    self.delay = delay
+    self.sizes = []
+    self.closed = False
+
+  def write(self,x):
+    time.sleep(self.delay)
+    self.sizes.append(len(x))
+    self.data.write(x.tobytes())
+
+  def close(self):
+    self.closed = True
+
+def test_everything_arrives_in_block_multiples():
+  f = SlowFile()
+  writer = AsyncWriter.AsyncWriter(f.write,f.close,capacity = 1 << 16,block = 1 << 12,policy = AsyncWriter.BLOCK)
+  x = np.arange(200000,dtype=np.uint8)
+  for i in range(0,len(x),3333):
+    assert writer.put(x[i:i + 3333])
+  writer.close()
+  assert f.closed
+  assert f.data.getvalue() == x.tobytes()
+  # every write but the last ends on a block boundary
+  ends = np.cumsum(f.sizes)[:-1]
+  assert np.all(ends % (1 << 12) == 0)
+  s = writer.stats()
+  assert s['received'] == s['written'] == len(x)
+  assert s['dropped'] == 0 and s['max_fill'] <= s['capacity']
+
+def test_overflow_drops_whole_buffers_and_counts_them():
+  f = SlowFile(0.02)
+  writer = AsyncWriter.AsyncWriter(f.write,f.close,capacity = 1 << 14,block = 1 << 12,policy = AsyncWriter.DROP)
+  kept = []
+  for i in range(200):
+    x = np.full(3000,i % 251 + 1,dtype=np.uint8)
+    kept.append((x,np.zeros_like(x))[not writer.put(x)])
+  writer.close()
+  s = writer.stats()
+  assert s['overflows'] > 0
+  assert s['received'] == 200 * 3000
+  assert s['written'] + s['dropped'] == s['received']
+  assert s['dropped'] == s['filled'] == 3000 * s['overflows']
+  # what was kept is intact and at its offset, with zeros for the rest
+  assert f.data.getvalue() == np.concatenate(kept).tobytes()
+
+class HeldFile(SlowFile):
+  def __init__(self):
+    SlowFile.__init__(self)
+    self.release = threading.Event()
+
+  def write(self,x):
+    self.release.wait()
+    SlowFile.write(self,x)
+
+def test_samples_after_an_overflow_stay_aligned():
+  f = HeldFile()
+  writer = AsyncWriter.AsyncWriter(f.write,f.close,capacity = 64,block = 64,policy = AsyncWriter.DROP)
+  x = (np.arange(24) + 1j * np.arange(24)).astype(np.complex64)
+  assert writer.put(x[:8])
+  # the ring is full until the held write goes through
+  assert not writer.put(x[8:12])
+  assert not writer.put(x[12:16])
+  f.release.set()
+  while writer.stats()['written'] < 64:
+    time.sleep(0.001)
+  assert writer.put(x[16:])
+  writer.close()
+  y = np.frombuffer(f.data.getvalue(),dtype=np.complex64)
+  assert len(y) == len(x)
+  assert np.all(y[8:16] == 0)
+  assert np.array_equal(y[:8],x[:8]) and np.array_equal(y[16:],x[16:])
+
+def test_blocking_writer_waits_for_room():
+  f = SlowFile(0.005)
+  writer = AsyncWriter.AsyncWriter(f.write,f.close,capacity = 1 << 13,block = 1 << 12,policy = AsyncWriter.BLOCK)
+  x = np.random.RandomState(1).randint(0,256,100000).astype(np.uint8)
+  # bigger than the ring in one call
+  writer.put(x)
+  writer.close()
+  assert writer.stats()['waits'] > 0
+  assert f.data.getvalue() == x.tobytes()
+
+def test_archive_through_a_full_ring(tmpdir):
+  path = str(tmpdir.join("a.iqc"))
+  archive = IQArchive.ArchiveWriter(path,2e6,chunk_samples = 1 << 16)
+  writer = AsyncWriter.open_archive(archive,capacity = 64 << 10,block = 8 << 10,policy = AsyncWriter.BLOCK)
+  rng = np.random.RandomState(7)
+  chunks = [((rng.rand(1 << 14) - 0.5) + 1j * (rng.rand(1 << 14) - 0.5)).astype(np.complex64) for i in range(40)]
+  for chunk in chunks:
+    writer.put(chunk)
+  writer.close()
+  assert writer.stats()['waits'] > 0
+  x = np.concatenate(chunks)
+  result = IQArchive.Archive(path)
+  assert len(result) == len(x)
+  assert np.max(np.abs(result.read(0,len(x)) - x)) <= 1 / 127.0
+  result.close()
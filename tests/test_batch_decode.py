@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import wave
+import numpy as np
+
+import BatchDecode
+import aptsignal
+
+def write_pass(directory,stem):
+  x = aptsignal.audio(aptsignal.words(10))
+  w = wave.open(os.path.join(directory,stem + ".wav"),'wb')
+  w.setnchannels(1)
+  w.setsampwidth(2)
+  w.setframerate(11025)
+  w.writeframes((x * 16000).astype(np.int16).tobytes())
+  w.close()
+
+def run(monkeypatch,directory,*args):
+  monkeypatch.setattr(sys,'argv',['BatchDecode.py',str(directory),'-j','1'] + list(args))
+  BatchDecode.main()
+  f = open(os.path.join(str(directory),'manifest.json'))
+  manifest = json.load(f)
+  f.close()
+  return dict((os.path.basename(e['source']),e) for e in manifest['passes'])
+
+def test_up_to_date_needs_every_output(tmpdir):
+  source = tmpdir.join("NOAA19_2020.01.01.12.00.00.wav")
+  source.write("x")
+  output = str(tmpdir.join("NOAA19_2020.01.01.12.00.00.png"))
+  paths = BatchDecode.outputs(output,['mcir'])
+  assert paths[1].endswith("NOAA19_2020.01.01.12.00.00_mcir.png")
+  open(output,'w').close()
+  assert BatchDecode.up_to_date(str(source),paths[:1])
+  assert not BatchDecode.up_to_date(str(source),paths)
+
+def test_reruns_merge_the_manifest(tmpdir,monkeypatch):
+  write_pass(str(tmpdir),"NOAA19_2020.01.01.12.00.00")
+  first = run(monkeypatch,tmpdir)
+  entry = first["NOAA19_2020.01.01.12.00.00.wav"]
+  assert entry['status'] == 'decoded'
+  # a second run skips the pass but keeps what the first one measured
+  second = run(monkeypatch,tmpdir)
+  skipped = second["NOAA19_2020.01.01.12.00.00.wav"]
+  assert skipped['status'] == 'skipped'
+  assert skipped['seconds'] == entry['seconds']
+  assert skipped['lines'] == entry['lines']
+  # asking for a false color variant the pass lacks decodes it again, and
+  # a pass added since is decoded alongside it
+  write_pass(str(tmpdir),"NOAA18_2020.01.02.12.00.00")
+  third = run(monkeypatch,tmpdir,'--false-color','mcir')
+  assert third["NOAA19_2020.01.01.12.00.00.wav"]['status'] == 'decoded'
+  assert third["NOAA18_2020.01.02.12.00.00.wav"]['status'] == 'decoded'
+  assert tmpdir.join("NOAA19_2020.01.01.12.00.00_mcir.png").check()
+
+def test_pass_without_lines_is_an_error_and_tried_again(tmpdir,monkeypatch):
+  np.random.RandomState(2).randn(400000).astype(np.complex64).tofile(str(tmpdir.join("NOAA19_2020.01.01.12.00.00.raw")))
+  entry = run(monkeypatch,tmpdir)["NOAA19_2020.01.01.12.00.00.raw"]
+  assert entry['status'] == 'error'
+  assert 'lines' not in entry
+  assert not tmpdir.join("NOAA19_2020.01.01.12.00.00.png").check()
+  assert run(monkeypatch,tmpdir)["NOAA19_2020.01.01.12.00.00.raw"]['status'] == 'error'
@@ -0,0 +1,57 @@
+import struct
+import wave
+from datetime import datetime
+import numpy as np
+
+import CaptureReader
+
+def test_parse_name():
+  assert CaptureReader.parse_name("/x/NOAA19_2021.02.03.04.05.06.raw") == ('NOAA19',datetime(2021,2,3,4,5,6))
+  assert CaptureReader.parse_name("NOAA 15_2021.02.03.04.05.06.wav")[0] == 'NOAA 15'
+  assert CaptureReader.parse_name("capture.raw") == (None,None)
+  assert CaptureReader.parse_name("NOAA19_2021.02.03.04.05.06.png") == (None,None)
+
+def test_raw_is_memory_mapped(tmpdir):
+  path = str(tmpdir.join("NOAA19_2021.02.03.04.05.06.raw"))
+  x = (np.arange(10000) * (1 + 1j)).astype(np.complex64)
+  x.tofile(path)
+  capture = CaptureReader.open_capture(path,1000)
+  assert isinstance(capture.data,np.memmap)
+  assert len(capture) == 10000 and capture.duration() == 10.0
+  assert capture.satellite == 'NOAA19'
+  assert np.array_equal(capture.at(2.5,1.0),x[2500:3500])
+  assert np.array_equal(np.concatenate(list(capture.chunks(3000,start = 1))),x[1000:])
+  assert len(capture.at(20)) == 0
+
+def test_dat_is_normalized(tmpdir):
+  path = str(tmpdir.join("a.dat"))
+  np.array([0,255,51],dtype=np.uint8).tofile(path)
+  capture = CaptureReader.open_capture(path)
+  assert capture.sample_rate == CaptureReader.DAT_RATE
+  assert np.allclose(capture.normalized(capture.data),[0,1,0.2])
+
+def test_wav_reads_the_header(tmpdir):
+  path = str(tmpdir.join("a.wav"))
+  w = wave.open(path,'wb')
+  w.setnchannels(2)
+  w.setsampwidth(2)
+  w.setframerate(11025)
+  samples = np.array([[16384,-16384]] * 50,dtype='<i2')
+  w.writeframes(samples.tobytes())
+  w.close()
+  capture = CaptureReader.open_capture(path)
+  assert (capture.sample_rate,capture.channels,len(capture)) == (11025,2,50)
+  assert np.allclose(capture.normalized(capture.data[:,0]),0.5)
+
+def test_wav_left_open_by_its_writer(tmpdir):
+  # a sink killed mid-pass leaves zero in the data chunk size
+  path = str(tmpdir.join("a.wav"))
+  fmt = struct.pack('<HHIIHH',1,1,11025,22050,2,16)
+  data = np.arange(100,dtype='<i2').tobytes()
+  with open(path,'wb') as f:
+    f.write(b'RIFF' + struct.pack('<I',0) + b'WAVE')
+    f.write(b'fmt ' + struct.pack('<I',16) + fmt)
+    f.write(b'data' + struct.pack('<I',0) + data)
+  capture = CaptureReader.open_capture(path)
+  assert len(capture) == 100
+  assert capture.data[99] == 99
@@ -0,0 +1,37 @@
+import numpy as np
+
+import APTSync
+import aptsignal
+
+def test_daemon_radio_builds_headless(fake_gnuradio,tmpdir):
+  import Radio
+  import RadioController
+  import PythonSDRDaemon
+  config = PythonSDRDaemon.get_default_config()
+  config['device_cache_file'] = ''
+  controller = RadioController.RadioController(config)
+  radio = Radio.Radio(controller)
+  controller.radio = radio
+  radio.initialize_radio(config)
+  assert not radio.error and radio.device_found
+  # no display and no sound card: the spectrum branch is left out and the
+  # audio ends in a null sink
+  graph = fake_gnuradio.graphs[-1]
+  assert not graph.connected(radio.logpwrfft)
+  assert radio.logpwrfft.kwargs['frame_rate'] == 60
+  assert fake_gnuradio.sinks == []
+  assert graph.connected(radio.audio_sink)
+  tap = PythonSDRDaemon.APTTap(radio.audio_rate,str(tmpdir.join("lines.dat")))
+  radio.add_audio_tap(tap)
+  assert graph.connected(tap)
+
+def test_apt_tap_writes_lines(fake_gnuradio,tmpdir):
+  import PythonSDRDaemon
+  path = str(tmpdir.join("lines.dat"))
+  tap = PythonSDRDaemon.APTTap(11025,path,str(tmpdir.join("image.png")))
+  x = aptsignal.audio(aptsignal.words(12))
+  for i in range(0,len(x),4096):
+    assert tap.work([x[i:i + 4096]],None) == len(x[i:i + 4096])
+  tap.close()
+  assert tap.lines >= 10
+  assert len(np.fromfile(path,dtype=np.uint8)) == tap.lines * APTSync.LINE_WIDTH
@@ -0,0 +1,81 @@
+import os
+import json
+
+import DeviceCache
+
+CAPABILITIES = {'gain_names' : ['LNA'],'sample_rates' : [2400000,3200000]}
+
+class Device():
+  def __init__(self,s):
+    self.s = s
+
+  def to_string(self):
+    return self.s
+
+class device():
+  found = []
+
+  @classmethod
+  def find(cls,hint):
+    return cls.found
+
+class Osmosdr():
+  device = device
+
+  @staticmethod
+  def device_t(driver):
+    return driver
+
+def test_capabilities_come_back_for_the_same_device_and_version():
+  cache = DeviceCache.DeviceCache()
+  assert cache.get('rtl','rtl=0,serial=1','0.1.4') == None
+  cache.put('rtl','rtl=0,serial=1',CAPABILITIES,'0.1.4')
+  assert cache.get('rtl','rtl=0,serial=1','0.1.4') == CAPABILITIES
+  assert cache.get('rtl','rtl=0,serial=2','0.1.4') == None
+  assert cache.get('rtl','rtl=0,serial=1','0.1.5') == None
+
+def test_entries_persist_and_expire(tmpdir):
+  path = os.path.join(str(tmpdir),'cache','devices.json')
+  DeviceCache.DeviceCache(path).put('rtl','rtl=0,serial=1',CAPABILITIES)
+  assert DeviceCache.DeviceCache(path).get('rtl','rtl=0,serial=1') == CAPABILITIES
+  assert DeviceCache.DeviceCache(path,max_age = 0).get('rtl','rtl=0,serial=1') == None
+
+def test_old_cache_format_is_ignored(tmpdir):
+  path = os.path.join(str(tmpdir),'devices.json')
+  DeviceCache.DeviceCache(path).put('rtl','x',CAPABILITIES)
+  f = open(path)
+  entries = json.load(f)
+  f.close()
+  for entry in entries.values():
+    entry['cache_version'] = DeviceCache.CACHE_VERSION - 1
+  f = open(path,'w')
+  json.dump(entries,f)
+  f.close()
+  assert DeviceCache.DeviceCache(path).get('rtl','x') == None
+
+def test_unidentified_devices_stay_in_memory(tmpdir):
+  path = os.path.join(str(tmpdir),'devices.json')
+  cache = DeviceCache.DeviceCache(path)
+  cache.put('rtl','',CAPABILITIES)
+  assert cache.get('rtl','') == CAPABILITIES
+  assert not os.path.exists(path)
+
+def test_unreadable_file_is_an_empty_cache(tmpdir):
+  path = os.path.join(str(tmpdir),'devices.json')
+  f = open(path,'w')
+  f.write("{not json")
+  f.close()
+  cache = DeviceCache.DeviceCache(path)
+  assert cache.get('rtl','x') == None
+  cache.put('rtl','x',CAPABILITIES)
+  assert DeviceCache.DeviceCache(path).get('rtl','x') == CAPABILITIES
+
+def test_device_is_enumerated_every_time():
+  device.found = [Device("hackrf=0"),Device("rtl=0,serial=00000001")]
+  cache = DeviceCache.DeviceCache()
+  assert cache.identify(Osmosdr,'rtl') == "rtl=0,serial=00000001"
+  # swapped for another dongle
+  device.found = [Device("rtl=0,serial=00000002")]
+  assert cache.identify(Osmosdr,'rtl') == "rtl=0,serial=00000002"
+  device.found = []
+  assert cache.identify(Osmosdr,'rtl') == ''
@@ -0,0 +1,35 @@
+import numpy as np
+
+import DisplayReduce
+
+def columns(n,width):
+  return [range(i * n // width,max((i + 1) * n // width,i * n // width + 1)) for i in range(width)]
+
+def test_min_max_matches_every_column_scanned():
+  reducer = DisplayReduce.DisplayReducer()
+  frame = np.random.RandomState(4).randn(4096).astype(np.float32)
+  for width in (1,7,640,1000,4096):
+    low,high = reducer.min_max(frame,width)
+    assert len(low) == len(high) == width
+    for i,bins in enumerate(columns(len(frame),width)):
+      assert low[i] == frame[list(bins)].min()
+      assert high[i] == frame[list(bins)].max()
+
+def test_narrow_peak_survives_the_reduction():
+  reducer = DisplayReduce.DisplayReducer()
+  frame = np.full(8192,-100.0)
+  frame[5001] = -20.0
+  peak = reducer.peak(frame,300)
+  assert peak.max() == -20.0
+  assert np.argmax(peak) == 5001 * 300 // 8192
+
+def test_bins_repeat_when_wider_than_the_frame():
+  reducer = DisplayReduce.DisplayReducer()
+  frame = np.arange(4.0)
+  assert list(reducer.peak(frame,8)) == [0,0,1,1,2,2,3,3]
+
+def test_column_edges_are_kept_until_the_shape_changes():
+  reducer = DisplayReduce.DisplayReducer()
+  starts = reducer.column_starts(1024,300)
+  assert reducer.column_starts(1024,300) is starts
+  assert reducer.column_starts(1024,301) is not starts
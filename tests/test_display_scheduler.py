@@ -0,0 +1,47 @@
+import DisplayScheduler
+
+def run(scheduler,cost,frames,intervals):
+  for i in range(intervals):
+    for j in range(frames):
+      scheduler.frame()
+      scheduler.measure(cost)
+    scheduler.update()
+  return scheduler.rate
+
+def test_rate_settles_within_the_budget():
+  scheduler = DisplayScheduler.DisplayScheduler({'display_cpu_budget' : 0.2})
+  assert scheduler.rate == 60
+  # 10 ms a frame: 20 frames a second use the 20% budget
+  rate = run(scheduler,0.01,30,20)
+  assert abs(rate - 20) <= 2
+  assert run(scheduler,0.01,20,5) == rate
+
+def test_rate_stays_within_its_limits():
+  config = {'display_min_rate' : 5,'display_max_rate' : 30}
+  scheduler = DisplayScheduler.DisplayScheduler(config)
+  # half way steps stop once they would move the rate by under a tenth
+  assert 5 <= run(scheduler,1.0,5,20) <= 6
+  assert 27 <= run(scheduler,0.0,5,20) <= 30
+
+def test_small_changes_are_not_reported():
+  scheduler = DisplayScheduler.DisplayScheduler({'display_cpu_budget' : 0.2})
+  scheduler.rate = 20
+  scheduler.frame()
+  scheduler.measure(0.2 / 21)
+  assert scheduler.update() == None
+  assert scheduler.rate == 20
+
+def test_no_frames_or_paused_leaves_the_rate():
+  scheduler = DisplayScheduler.DisplayScheduler({})
+  assert scheduler.update() == None
+  assert scheduler.set_visible(False)
+  assert not scheduler.set_visible(False)
+  assert scheduler.paused
+  assert run(scheduler,1.0,5,3) == 60
+  assert scheduler.set_visible(True)
+  assert not scheduler.paused
+
+def test_hidden_display_keeps_running_without_pause_hidden():
+  scheduler = DisplayScheduler.DisplayScheduler({'display_pause_hidden' : False})
+  assert not scheduler.set_visible(False)
+  assert not scheduler.paused
@@ -0,0 +1,52 @@
+import numpy as np
+
+import DSPBlocks
+import TapCache
+
+def test_nco_matches_the_exponential():
+  rate = 48000.0
+  nco = DSPBlocks.NCO(rate,1234)
+  out = np.concatenate([nco.phasors(n) for n in (1,1023,1024,5000,7)])
+  t = np.arange(len(out)) / rate
+  assert np.max(np.abs(out - np.exp(2j * np.pi * 1234 * t))) < 1e-4
+
+def test_nco_phase_is_continuous_across_frequency_changes():
+  rate = 48000.0
+  nco = DSPBlocks.NCO(rate,1000)
+  a = nco.phasors(1500)
+  nco.set_freq(-2500)
+  b = nco.phasors(2000)
+  t = np.arange(2000) / rate
+  expected = np.exp(2j * np.pi * 1000 * 1500 / rate) * np.exp(-2j * np.pi * 2500 * t)
+  assert np.max(np.abs(b - expected)) < 1e-4
+  # per block frequencies carry the phase the same way
+  nco = DSPBlocks.NCO(rate,block = 100)
+  out = nco.phasors(250,[100,200,300])
+  phase = np.concatenate((100 * np.arange(100),100 * 100 + 200 * np.arange(100),
+    100 * 100 + 200 * 100 + 300 * np.arange(50))) / rate
+  assert np.max(np.abs(out - np.exp(2j * np.pi * phase))) < 1e-4
+  assert nco.freq == 300
+
+def test_nco_stays_on_the_unit_circle():
+  nco = DSPBlocks.NCO(2e6,123457)
+  for i in range(200):
+    out = nco.phasors(10000)
+  assert np.allclose(np.abs(out),1,atol=1e-5)
+
+def test_mixer_at_zero_is_a_no_op():
+  x = np.arange(10,dtype=np.complex64)
+  assert DSPBlocks.Mixer(0,1e3).process(x) is x
+
+def test_xlating_filter_equals_mix_then_filter():
+  rate = 1e6
+  decim = 5
+  freq = 123e3
+  taps = TapCache.low_pass(1,rate,40e3,20e3)
+  rng = np.random.RandomState(4)
+  x = (rng.randn(60000) + 1j * rng.randn(60000)).astype(np.complex64)
+  reference = DSPBlocks.OverlapSaveFilter(taps.astype(np.complex64),decim).process(
+    DSPBlocks.Mixer(freq,rate).process(x))
+  xlating = DSPBlocks.XlatingFilter(taps,decim,rate,DSPBlocks.Mixer(freq,rate / decim))
+  out = np.concatenate([xlating.process(x[i:i + 7000]) for i in range(0,len(x),7000)])
+  assert len(out) == len(reference)
+  assert np.max(np.abs(out - reference)) < 1e-3 * np.max(np.abs(reference))
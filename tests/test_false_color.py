@@ -0,0 +1,72 @@
+import os
+import sys
+import numpy as np
+
+import APTSync
+import FalseColor
+import pngread
+
+# a synced image whose telemetry frames start at line shift, seen through
+# a receiver with the given gain and offset
+def synthetic(rows = 512,shift = 37,gain = 0.8,offset = 20,ids = (2,4),seed = 3):
+  rng = np.random.RandomState(seed)
+  nominal = np.zeros((rows,APTSync.LINE_WIDTH))
+  for channel in (0,1):
+    base = channel * FalseColor.CHANNEL + FalseColor.SYNC + FalseColor.SPACE
+    nominal[:,base:base + FalseColor.IMAGE] = rng.randint(0,256,(rows,FalseColor.IMAGE))
+    wedges = np.zeros(16)
+    wedges[:9] = FalseColor.WEDGE_VALUES
+    wedges[9:15] = 100
+    wedges[15] = FalseColor.WEDGE_VALUES[ids[channel] - 1]
+    lines = (np.arange(rows) - shift) % FalseColor.FRAME // FalseColor.WEDGE
+    nominal[:,base + FalseColor.IMAGE:base + FalseColor.IMAGE + FalseColor.TELEMETRY] = wedges[lines][:,None]
+  image = np.clip(np.round(nominal * gain + offset),0,255).astype(np.uint8)
+  return nominal,image
+
+def test_wedge_staircase_is_even():
+  # wedges 1-8 are 1/8 to 8/8 of full scale, wedge 9 is zero
+  assert np.all(np.diff(FalseColor.WEDGE_VALUES[:8]) == 32)
+  assert FalseColor.WEDGE_VALUES[7] == 255 and FalseColor.WEDGE_VALUES[8] == 0
+
+def test_wedges_are_found_and_calibrated():
+  nominal,image = synthetic()
+  channels = FalseColor.Channels(image)
+  assert (channels.channel_a,channels.channel_b) == ('2','4')
+  assert np.allclose(channels.wedges_a[:9],FalseColor.WEDGE_VALUES * 0.8 + 20,atol=1)
+  expected,_ = FalseColor.split(nominal,0)
+  measured,_ = FalseColor.split(image,0)
+  error = np.abs(channels.a.astype(np.float64) - expected)
+  assert np.max(error) <= 1 and np.mean(error) < 0.5
+  assert np.mean(np.abs(measured.astype(np.float64) - expected)) > 10
+
+def test_short_pass_is_left_uncalibrated():
+  nominal,image = synthetic(rows = 100)
+  channels = FalseColor.Channels(image)
+  assert channels.wedges_a is None and channels.channel_a is None
+  assert np.array_equal(channels.a,FalseColor.split(image,0)[0])
+
+def test_palettes_are_lookup_tables():
+  nominal,image = synthetic()
+  channels = FalseColor.Channels(image)
+  for name in FalseColor.PALETTES:
+    lut = FalseColor.palette(name)
+    assert lut.shape == (65536,3) and lut.dtype == np.uint8
+    rgb = channels.composite(name)
+    assert rgb.shape == (image.shape[0],FalseColor.IMAGE,3)
+    a = channels.a.astype(np.int64)
+    b = channels.b.astype(np.int64)
+    assert np.array_equal(rgb[5,7],lut[a[5,7] * 256 + b[5,7]])
+  # thermal ignores the visible channel
+  lut = FalseColor.palette('thermal').reshape(256,256,3)
+  assert np.all(lut == lut[:1])
+
+def test_main_writes_every_palette(tmpdir,monkeypatch):
+  nominal,image = synthetic()
+  source = str(tmpdir.join("NOAA19_2020.01.01.00.00.00_lines.dat"))
+  image.tofile(source)
+  monkeypatch.setattr(sys,'argv',['FalseColor.py',source,'-p','mcir','-p','thermal'])
+  assert FalseColor.main() == 0
+  for name in ('mcir','thermal'):
+    path = str(tmpdir.join("NOAA19_2020.01.01.00.00.00_%s.png" % name))
+    assert pngread.read_png(path).shape == (512,FalseColor.IMAGE,3)
+  assert not os.path.exists(str(tmpdir.join("NOAA19_2020.01.01.00.00.00_vegetation.png")))
@@ -0,0 +1,93 @@
+import threading
+import numpy as np
+
+import FrameQueue
+
+def frame(value,size = 8):
+  return np.full(size,value,dtype=np.float32)
+
+def test_reader_takes_the_newest_frame():
+  q = FrameQueue.FrameQueue(8)
+  assert q.acquire() is None
+  assert q.put(frame(1))
+  assert not q.put(frame(2))
+  assert q.acquire()[0] == 2
+  q.release()
+  assert q.acquire() is None
+  assert q.stats() == {'produced' : 2,'dropped' : 1,'displayed' : 1}
+
+def test_full_ring_keeps_the_latest_frame():
+  q = FrameQueue.FrameQueue(8,slots = 3)
+  for i in range(10):
+    q.put(frame(i))
+  assert q.acquire()[0] == 9
+  q.release()
+  s = q.stats()
+  assert s['produced'] == 10 and s['displayed'] == 1
+  assert s['dropped'] == 9
+
+def test_held_frame_is_never_overwritten():
+  q = FrameQueue.FrameQueue(8,slots = 2)
+  q.put(frame(1))
+  held = q.acquire()
+  for i in range(2,20):
+    q.put(frame(i))
+  assert np.all(held == 1)
+  q.release()
+  assert q.acquire()[0] == 19
+
+def test_fftshift_while_copying():
+  q = FrameQueue.FrameQueue(5)
+  x = np.arange(5,dtype=np.float32)
+  q.put(x,True)
+  assert np.all(q.acquire() == np.fft.fftshift(x))
+
+def test_discarded_frames_are_counted():
+  q = FrameQueue.FrameQueue(8)
+  q.discard(4)
+  q.put(frame(5))
+  assert q.stats() == {'produced' : 5,'dropped' : 4,'displayed' : 0}
+
+def test_threads_see_whole_frames_in_order():
+  q = FrameQueue.FrameQueue(4096,slots = 3)
+  count = 20000
+  seen = []
+  def reader():
+    while True:
+      f = q.acquire()
+      if f is None:
+        if done:
+          return
+        continue
+      assert np.all(f == f[0])
+      seen.append(f[0])
+      q.release()
+  done = False
+  t = threading.Thread(target = reader)
+  t.start()
+  for i in range(count):
+    q.put(frame(i,4096))
+  done = True
+  t.join()
+  last = q.acquire()
+  if last is not None:
+    seen.append(last[0])
+    q.release()
+  assert seen == sorted(seen)
+  assert seen[-1] == count - 1
+  s = q.stats()
+  assert s['produced'] == count
+  assert s['displayed'] + s['dropped'] == count
+
+def test_vector_sink_counts_the_frames_it_passes_over(fake_gnuradio):
+  import Radio
+  class Main():
+    frame_queue = None
+    def frame_ready(self):
+      pass
+  sink = Radio.MyVectorSink(Main(),4)
+  frames = np.arange(12,dtype=np.float32).reshape(3,4)
+  assert sink.work([frames],None) == 3
+  s = sink.queue.stats()
+  assert s['produced'] == 3 and s['dropped'] == 2
+  assert list(sink.queue.acquire()) == [10,11,8,9]
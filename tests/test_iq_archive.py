@@ -0,0 +1,102 @@
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pytest
+
+import CaptureReader
+import IQArchive
+import PassPredictor
+
+def signal(n,seed = 6):
+  rng = np.random.RandomState(seed)
+  return ((rng.rand(n) - 0.5) + 1j * (rng.rand(n) - 0.5)).astype(np.complex64)
+
+def write(path,x,**options):
+  writer = IQArchive.ArchiveWriter(path,2e6,137.5e6,"NOAA19",**options)
+  for i in range(0,len(x),3001):
+    writer.write(x[i:i + 3001])
+  writer.close()
+  return writer
+
+def test_round_trip(tmpdir):
+  x = signal(50000)
+  for sample_format,step in (('int8',1 / 127.0),('int16',1 / 32767.0)):
+    for compress in (True,False):
+      path = str(tmpdir.join("a_%s_%d.iqc" % (sample_format,compress)))
+      write(path,x,start_time = 1.6e9,sample_format = sample_format,chunk_samples = 4096,compress = compress)
+      archive = IQArchive.Archive(path)
+      assert len(archive) == len(x)
+      assert len(archive.offsets) == (len(x) + 4095) // 4096
+      assert archive.sample_rate == 2e6 and archive.satellite == "NOAA19"
+      assert np.max(np.abs(archive.read(0,len(x)) - x)) <= step
+      archive.close()
+
+def test_reads_across_chunks(tmpdir):
+  path = str(tmpdir.join("a.iqc"))
+  x = signal(20000)
+  write(path,x,chunk_samples = 1000)
+  archive = IQArchive.Archive(path)
+  whole = archive.read(0,len(x))
+  assert np.array_equal(archive.read(999,3001),whole[999:3001])
+  assert np.array_equal(archive.at(0.001,0.002),whole[2000:6000])
+  assert np.array_equal(np.concatenate(list(archive.chunks(777))),whole)
+  assert len(archive.read(25000,30000)) == 0
+  archive.close()
+
+def test_truncated_file_is_indexed_by_its_chunks(tmpdir):
+  path = str(tmpdir.join("a.iqc"))
+  x = signal(10000)
+  writer = IQArchive.ArchiveWriter(path,2e6,chunk_samples = 1000)
+  writer.write(x)
+  # the writer dies: no index, and the last chunk only half written
+  writer.f.flush()
+  size = os.path.getsize(path)
+  writer.f.close()
+  with open(path,'r+b') as f:
+    f.truncate(size - 100)
+  archive = IQArchive.Archive(path)
+  assert len(archive.offsets) == 9
+  assert len(archive) == 9000
+  assert np.max(np.abs(archive.read(0,9000) - x[:9000])) <= 1 / 127.0
+  archive.close()
+
+def test_unknown_start_time_is_null(tmpdir):
+  path = str(tmpdir.join("a.iqc"))
+  write(path,signal(100))
+  assert IQArchive.read_header(path)[0]['start_time'] is None
+  archive = IQArchive.Archive(path)
+  assert archive.start_time is None
+  archive.close()
+  assert PassPredictor.capture_start(path) is None
+
+def test_convert_keeps_the_stamp(tmpdir):
+  source = str(tmpdir.join("NOAA18_2021.03.04.05.06.07.raw"))
+  x = signal(30000)
+  x.tofile(source)
+  dest,writer = IQArchive.convert(source)
+  assert dest.endswith("NOAA18_2021.03.04.05.06.07.iqc")
+  archive = IQArchive.Archive(dest)
+  assert archive.satellite == "NOAA18"
+  assert archive.start_time == datetime(2021,3,4,5,6,7)
+  assert np.max(np.abs(archive.read(0,len(x)) - x)) <= 1 / 127.0
+  archive.close()
+  start = time.mktime(datetime(2021,3,4,5,6,7).timetuple())
+  assert PassPredictor.capture_start(source) == start
+  assert PassPredictor.capture_start(dest) == start
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'),reason="needs /proc")
+def test_capture_start_leaves_no_file_open(tmpdir):
+  path = str(tmpdir.join("a.iqc"))
+  write(path,signal(100),start_time = 1.6e9 + 0.25)
+  fds = os.listdir('/proc/self/fd')
+  for i in range(20):
+    assert PassPredictor.capture_start(path) == 1.6e9 + 0.25
+  assert len(os.listdir('/proc/self/fd')) == len(fds)
+
+def test_open_capture_dispatches_on_the_extension(tmpdir):
+  path = str(tmpdir.join("NOAA19_2020.01.01.00.00.00.iqc"))
+  write(path,signal(100),start_time = 1.6e9)
+  capture = CaptureReader.open_capture(path)
+  assert isinstance(capture,IQArchive.Archive)
+  capture.close()
@@ -0,0 +1,59 @@
+import os
+import numpy as np
+
+import DSPBlocks
+import MultiDecoder
+import PassPredictor
+import StreamDecoder
+
+TLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),'data','noaa.tle')
+STATION = PassPredictor.Station(40.4,-3.7,650)
+
+def test_plan_puts_every_downlink_in_a_channel():
+  channels,decim,taps,layout = MultiDecoder.plan(2e6,137.5e6,PassPredictor.DOWNLINKS)
+  assert (channels,decim) == (10,5)
+  assert [(c.satellite,c.index) for c in layout] == [('NOAA15',1),('NOAA18',2),('NOAA19',-2)]
+  for c in layout:
+    assert abs(c.downlink - c.freq) + MultiDecoder.APT_HALF_WIDTH < 2e6 / decim / 2
+
+def test_narrow_window_leaves_satellites_out():
+  layout = MultiDecoder.plan(250e3,137.62e6,PassPredictor.DOWNLINKS)[3]
+  assert [c.satellite for c in layout] == ['NOAA15']
+
+# the mixer of every channel's StreamDecoder, as channel_worker builds it
+def mixer_freqs(tle_path,start_time):
+  channels,decim,taps,layout = MultiDecoder.plan(2e6,137.5e6,PassPredictor.DOWNLINKS)
+  out = {}
+  for channel in layout:
+    offset,track = MultiDecoder.tuning(channel,tle_path,STATION,start_time)
+    decoder = StreamDecoder.StreamDecoder(sample_rate = 2e6 / decim,offset = offset,
+      track = track,start_time = start_time)
+    out[channel.satellite] = (channel,decoder.mixer.current_freq())
+  return out
+
+def test_fixed_offsets_take_each_channel_to_its_downlink():
+  freqs = mixer_freqs(None,None)
+  assert freqs['NOAA15'][1] == 80e3
+  assert freqs['NOAA18'][1] == -12.5e3
+  assert freqs['NOAA19'][1] == 0
+
+def test_doppler_track_is_applied_once():
+  start = PassPredictor.read_tle(TLE_PATH,'NOAA15').epoch + 3600
+  for satellite,(channel,freq) in mixer_freqs(TLE_PATH,start).items():
+    orbit = PassPredictor.Orbit(PassPredictor.read_tle(TLE_PATH,satellite))
+    received = orbit.received(STATION,np.array([start]),channel.downlink)[0]
+    assert abs(freq - (channel.freq - received)) < 1
+
+def test_channelizer_equals_mix_filter_decimate():
+  rate = 2e6
+  channels,decim,taps,layout = MultiDecoder.plan(rate,137.5e6,PassPredictor.DOWNLINKS)
+  bins = [c.index for c in layout]
+  rng = np.random.RandomState(5)
+  x = (rng.randn(50003) + 1j * rng.randn(50003)).astype(np.complex64)
+  channelizer = DSPBlocks.Channelizer(taps,channels,decim,bins)
+  out = np.concatenate([channelizer.process(x[i:i + 6001]) for i in range(0,len(x),6001)])
+  for column,k in enumerate(bins):
+    mixed = DSPBlocks.Mixer(-k * rate / channels,rate).process(x)
+    reference = DSPBlocks.OverlapSaveFilter(np.asarray(taps,dtype=np.complex64),decim).process(mixed)
+    assert len(out) == len(reference)
+    assert np.max(np.abs(out[:,column] - reference)) < 1e-3 * np.max(np.abs(reference))
@@ -0,0 +1,69 @@
+import os
+import fakegr
+
+def build(fake_gnuradio,tmpdir,source,**settings):
+  import NOAAFlowgraph
+  settings.setdefault('record',False)
+  tb = NOAAFlowgraph.NOAAFlowgraph(source = source,sample_rate = 2000000,
+    dir_path = str(tmpdir) + os.sep,satellite = "NOAA19",**settings)
+  if tb.record:
+    for name,writer in tb.recorders:
+      writer.close()
+  return tb
+
+def feeds(tb,a,b):
+  return tb.key((a,0),(b,0)) in tb.edges
+
+# every block the flowgraph made is wired into it
+def unconnected(tb):
+  blocks = [b for b in vars(tb).values() if isinstance(b,fakegr.Block)]
+  return [b for b in blocks if not tb.connected(b)]
+
+def test_fast_replay_leaves_out_throttle_audio_and_udp(fake_gnuradio,tmpdir):
+  tb = build(fake_gnuradio,tmpdir,"pass.raw",fast = True)
+  for name in ('blocks_throttle_raw','audio_sink_0_0','blocks_udp_sink_0','blocks_multiply_const_vxx_0'):
+    assert name not in vars(tb)
+  assert tb.iq_source is tb.blocks_file_source
+  assert feeds(tb,tb.blocks_file_source,tb.freq_xlating_fir_filter_xxx_0)
+  assert unconnected(tb) == []
+
+def test_replay_keeps_throttle_and_audio(fake_gnuradio,tmpdir):
+  tb = build(fake_gnuradio,tmpdir,"pass.raw")
+  assert feeds(tb,tb.blocks_file_source,tb.blocks_throttle_raw)
+  assert feeds(tb,tb.blocks_throttle_raw,tb.freq_xlating_fir_filter_xxx_0)
+  assert feeds(tb,tb.blocks_multiply_const_vxx_0,tb.audio_sink_0_0)
+  assert unconnected(tb) == []
+
+def test_direct_goes_straight_to_the_envelope_rate(fake_gnuradio,tmpdir):
+  import NOAAFlowgraph
+  tb = build(fake_gnuradio,tmpdir,"pass.raw",fast = True,direct = True)
+  assert tb.rational_resampler_env.plan.in_rate == 400000
+  assert tb.rational_resampler_env.plan.out_rate == NOAAFlowgraph.ENVELOPE_RATE
+  # nothing on the way to the envelope runs at 44100 or 11025 Hz
+  assert 'rational_resampler_xxx_0' not in vars(tb)
+  assert 'rational_resampler_xxx_0_0' not in vars(tb)
+  assert feeds(tb,tb.analog_wfm_rcv_0,tb.rational_resampler_env)
+  assert feeds(tb,tb.band_pass_filter_0,tb.hilbert_fc_0)
+  stages = tb.rational_resampler_xxx_1_0.plan.stages
+  assert [(s.interp,s.decim) for s in stages] == [(1,3)]
+  assert unconnected(tb) == []
+
+def test_direct_wav_tap_is_a_side_branch(fake_gnuradio,tmpdir):
+  tb = build(fake_gnuradio,tmpdir,"pass.raw",fast = True,direct = True,record = True)
+  assert feeds(tb,tb.analog_wfm_rcv_0,tb.rational_resampler_xxx_1)
+  assert tb.rational_resampler_xxx_1.plan.out_rate == 11025
+  assert feeds(tb,tb.blocks_multiply_const_vxx_0_2,tb.blocks_wavfile_sink_0)
+  assert sorted(name for name,writer in tb.recorders) == ['dat','wav']
+  assert unconnected(tb) == []
+
+  tb = build(fake_gnuradio,tmpdir,"pass.raw",fast = True,direct = True,record = True,wav_tap = False)
+  assert 'rational_resampler_xxx_1' not in vars(tb)
+  assert [name for name,writer in tb.recorders] == ['dat']
+  assert unconnected(tb) == []
+
+def test_direct_wav_input(fake_gnuradio,tmpdir):
+  tb = build(fake_gnuradio,tmpdir,"pass.wav",fast = True,direct = True)
+  assert tb.envelope_in_rate == 11025
+  assert feeds(tb,tb.blocks_wavfile_source_0,tb.rational_resampler_env)
+  assert feeds(tb,tb.rational_resampler_env,tb.band_pass_filter_0)
+  assert unconnected(tb) == []
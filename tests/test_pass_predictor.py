@@ -0,0 +1,65 @@
+import os
+import numpy as np
+
+import DSPBlocks
+import PassPredictor
+
+TLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),'data','noaa.tle')
+STATION = PassPredictor.Station(40.4,-3.7,650)
+
+def orbit(name = 'NOAA19'):
+  return PassPredictor.Orbit(PassPredictor.read_tle(TLE_PATH,name))
+
+def test_read_tle_matches_names_loosely():
+  tle = PassPredictor.read_tle(TLE_PATH,'noaa-19')
+  assert tle.name == 'NOAA 19'
+  assert abs(tle.mean_motion - 14.125) < 1e-9
+  assert abs(np.degrees(tle.inclination) - 99.19) < 1e-9
+
+def test_passes_and_doppler_are_plausible():
+  o = orbit()
+  passes = PassPredictor.find_passes(o,STATION,o.tle.epoch,24)
+  # a sun-synchronous orbit at ~850 km is seen a few times a day
+  assert 4 <= len(passes) <= 8
+  for p in passes:
+    assert 60 < p.duration() < 20 * 60
+    assert p.aos <= p.tca <= p.los
+    times = np.arange(p.aos,p.los,10.0)
+    shift = o.received(STATION,times,137.1e6) - 137.1e6
+    # approaching then receding, never more than about 3.5 kHz at 137 MHz
+    assert np.all(np.abs(shift) < 3500)
+    assert shift[0] > 0 > shift[-1]
+    assert np.all(np.diff(shift) < 0)
+
+def test_correction_track_cancels_the_doppler():
+  o = orbit()
+  p = PassPredictor.find_passes(o,STATION,o.tle.epoch,24)[1]
+  times,freqs = PassPredictor.correction_track(o,STATION,137.1e6,137.1e6,p.aos,p.los)
+  assert np.allclose(freqs + o.received(STATION,times,137.1e6),137.1e6)
+
+# the mixer frequency is sampled once per NCO block from wherever a chunk
+# starts, so chunking changes the output slightly, but not the phase it
+# reaches. The sweep is ten times faster than any Doppler curve; what
+# error is left comes from the NCO's 1 Hz resolution
+def test_track_mixer_is_continuous_across_chunks():
+  rate = 100e3
+  times = np.array([0.0,1.0])
+  freqs = np.array([-300.0,300.0])
+  x = np.ones(int(rate),dtype=np.complex64)
+  t = np.arange(len(x)) / rate
+  phase = 2 * np.pi * (-300 * t + 300 * t * t)
+  whole = DSPBlocks.TrackMixer(times,freqs,rate,0.0).process(x)
+  mixer = DSPBlocks.TrackMixer(times,freqs,rate,0.0)
+  rng = np.random.RandomState(2)
+  parts = []
+  i = 0
+  while i < len(x):
+    n = int(rng.randint(1,5000))
+    parts.append(mixer.process(x[i:i + n]))
+    i += n
+  chunked = np.concatenate(parts)
+  for out in (whole,chunked):
+    error = np.angle(out * np.exp(-1j * phase))
+    assert np.max(np.abs(error)) < 0.25
+    assert np.allclose(np.abs(out),1,atol=1e-4)
+  assert abs(mixer.current_freq() - 300) < 1
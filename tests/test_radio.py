@@ -0,0 +1,74 @@
+import RadioController
+
+class Scheduler():
+  rate = 20
+  paused = False
+
+# the Qt window's side of Radio, with a display scheduler as it has one
+def controller(**settings):
+  config = {'sample_rate' : 2000000,'audio_rate' : 48000,'bandwidth' : 0,'audio_output' : True}
+  config.update(settings)
+  main = RadioController.RadioController(config)
+  main.display_scheduler = Scheduler()
+  return main
+
+def start(fake_gnuradio,main):
+  import Radio
+  radio = Radio.Radio(main)
+  main.radio = radio
+  radio.initialize_radio(main.config)
+  assert not radio.error and radio.device_found
+  return radio
+
+def test_audio_rate_change_releases_the_old_sink_first(fake_gnuradio):
+  main = controller()
+  radio = start(fake_gnuradio,main)
+  old = radio.audio_sink
+  graph = fake_gnuradio.graphs[-1]
+  assert graph.connected(old)
+  main.config['audio_rate'] = 44100
+  assert radio.reconfigure(main.config)
+  new = radio.audio_sink
+  assert new is not old
+  assert new.args[0] == 44100
+  # opened inside lock() once nothing fed the old one any more
+  assert new.locked
+  assert new.open_with == []
+  assert graph.connected(new) and not graph.connected(old)
+  assert not graph.locked
+
+def test_headless_sink_survives_an_audio_rate_change(fake_gnuradio):
+  main = controller(audio_output = False)
+  radio = start(fake_gnuradio,main)
+  sink = radio.audio_sink
+  main.config['audio_rate'] = 44100
+  assert radio.reconfigure(main.config)
+  assert radio.audio_sink is sink
+  assert fake_gnuradio.graphs[-1].connected(sink)
+
+def test_rebuilt_radio_keeps_the_spectrum_paused(fake_gnuradio):
+  import Radio
+  main = controller()
+  main.spectrum = True
+  main.display_scheduler.paused = True
+  assert not Radio.Radio(main).spectrum_enabled
+  main.display_scheduler.paused = False
+  assert Radio.Radio(main).spectrum_enabled
+
+def test_unplugged_device_is_not_found_from_the_cache(fake_gnuradio,monkeypatch):
+  import DeviceCache
+  monkeypatch.setattr(DeviceCache,'shared',DeviceCache.DeviceCache())
+  probes = []
+  def get_sample_rates(self):
+    probes.append(1)
+    return {0 : 2400000}
+  monkeypatch.setattr(fake_gnuradio.Source,'get_sample_rates',get_sample_rates)
+  main = controller()
+  radio = start(fake_gnuradio,main)
+  radio.configure_source_controls()
+  assert radio.device_found
+  # the ranges came from the cache the second time
+  assert len(probes) == 1
+  monkeypatch.setattr(fake_gnuradio.Source,'get_gain_names',lambda self: [])
+  radio.configure_source_controls()
+  assert not radio.device_found
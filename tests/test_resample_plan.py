@@ -0,0 +1,49 @@
+import numpy as np
+
+import ResamplePlan
+
+def response(taps,rate,freqs):
+  n = np.arange(len(taps))
+  return np.abs(np.exp(-2j * np.pi * np.outer(freqs,n) / rate).dot(taps))
+
+def test_stages_chain_up_to_the_output_rate():
+  for a,b in [(400000,44100),(11025,16640),(2000000,48000),(44100,4160),(48000,48000)]:
+    plan = ResamplePlan.ResamplePlan(a,b)
+    rate = a
+    for stage in plan.stages:
+      assert stage.in_rate == rate
+      assert stage.decim <= plan.max_stage or stage is plan.stages[-1]
+      rate = stage.out_rate
+    assert rate == b
+
+def test_decimates_by_integers_first():
+  plan = ResamplePlan.ResamplePlan(400000,44100)
+  assert [(s.interp,s.decim) for s in plan.stages] == [(1,8),(441,500)]
+  assert [len(s.taps) for s in plan.stages] == [65,6023]
+  # cheaper than running one 441/4000 polyphase filter at the input rate
+  assert plan.cost() < 10
+  plan = ResamplePlan.ResamplePlan(11025,16640)
+  assert [(s.interp,s.decim) for s in plan.stages] == [(3328,2205)]
+  assert len(plan.stages[0].taps) == 40087
+
+def test_passband_follows_rational_resampler():
+  # fractional_bw 0.4 of the lower rate, as in rational_resampler_xxx
+  plan = ResamplePlan.ResamplePlan(400000,44100)
+  assert plan.passband == 0.4 * 44100
+  first,last = plan.stages
+  poly_rate = last.in_rate * last.interp
+  # flat to 1% over most of the band; window designs sized like firdes
+  # are down a few percent right at the edge, as the GNU Radio ones are
+  band = np.linspace(0,0.9 * plan.passband,20)
+  assert np.all(np.abs(response(first.taps,400000,band) - 1) < 0.01)
+  assert np.all(np.abs(response(last.taps,poly_rate,band) / last.interp - 1) < 0.01)
+  edge = [plan.passband]
+  assert response(first.taps,400000,edge)[0] > 0.95
+  assert response(last.taps,poly_rate,edge)[0] / last.interp > 0.95
+  # what the first stage folds onto the pass band is stopped, and so is
+  # everything above the output's Nyquist rate
+  assert np.all(response(first.taps,400000,50000 - np.linspace(0,plan.passband,20)) < 0.05)
+  assert np.all(response(first.taps,400000,50000 - band) < 0.02)
+  stop = np.linspace(44100 - plan.passband,60000,40)
+  assert np.all(response(last.taps,poly_rate,stop) / last.interp < 0.05)
+  assert np.all(response(last.taps,poly_rate,stop[stop > 44100 - 0.9 * plan.passband]) / last.interp < 0.02)
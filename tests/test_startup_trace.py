@@ -0,0 +1,18 @@
+import StartupTrace
+
+def test_traced_keeps_the_function_name(monkeypatch,capsys):
+  monkeypatch.setattr(StartupTrace,'enabled',True)
+  @StartupTrace.traced('phase')
+  def build(x):
+    "builds"
+    return x + 1
+  assert build(1) == 2
+  assert build.__name__ == 'build'
+  assert build.__doc__ == "builds"
+  assert 'phase' in capsys.readouterr().err
+
+def test_untraced_is_the_function_itself(monkeypatch):
+  monkeypatch.setattr(StartupTrace,'enabled',False)
+  def build():
+    pass
+  assert StartupTrace.traced('phase')(build) is build
@@ -0,0 +1,39 @@
+import numpy as np
+
+import StreamDecoder
+import aptsignal
+
+RATE = 400e3
+
+def best_match(row,words,lines):
+  return max(np.corrcoef(row,words[500 + j * 2080:500 + (j + 1) * 2080])[0,1] for j in range(lines))
+
+def test_decodes_every_line_at_an_offset():
+  words = aptsignal.words(10,offset = 500)
+  x = aptsignal.iq(words,RATE,30e3)
+  decoder = StreamDecoder.StreamDecoder(sample_rate = RATE,offset = -30e3)
+  rows = list(decoder.lines(x[i:i + 65536] for i in range(0,len(x),65536)))
+  assert len(rows) == 10
+  for row in rows:
+    assert best_match(row,words,10) > 0.75
+
+def test_envelope_is_independent_of_chunk_sizes():
+  x = aptsignal.iq(aptsignal.words(3),RATE,-20e3)
+  out = []
+  for size in (65536,9999):
+    decoder = StreamDecoder.StreamDecoder(sample_rate = RATE,offset = 20e3)
+    parts = [decoder.envelope(x[i:i + size]) for i in range(0,len(x),size)]
+    out.append(np.concatenate(parts + [decoder.apt.flush()]))
+  assert len(out[0]) == len(out[1])
+  assert np.allclose(out[0],out[1],atol=1e-3)
+
+def test_decode_file(tmpdir):
+  words = aptsignal.words(6,offset = 500)
+  path = str(tmpdir.join("NOAA19_2020.01.01.00.00.00.raw"))
+  aptsignal.iq(words,RATE,10e3).tofile(path)
+  decoder = StreamDecoder.StreamDecoder(sample_rate = RATE,offset = -10e3)
+  rows = list(decoder.decode_file(path,chunk_size = 50000))
+  assert len(rows) == 6
+  # the second half only
+  decoder = StreamDecoder.StreamDecoder(sample_rate = RATE,offset = -10e3)
+  assert len(list(decoder.decode_file(path,start = 1.5))) == 3
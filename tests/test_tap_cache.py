@@ -0,0 +1,70 @@
+import os
+import numpy as np
+import pytest
+
+import FilterDesign
+import TapCache
+
+def response(taps,freqs,rate):
+  n = np.arange(len(taps))
+  return np.array([abs(np.sum(taps * np.exp(-2j * np.pi * f / rate * n))) for f in freqs])
+
+def test_low_pass_is_linear_phase_with_the_gain_at_dc():
+  taps = FilterDesign.low_pass(2,48000,5000,1000)
+  assert len(taps) % 2 == 1
+  assert np.allclose(taps,taps[::-1])
+  assert abs(np.sum(taps) - 2) < 1e-6
+  # Hamming gives about 53 dB past the transition band
+  assert np.max(response(taps,np.linspace(6100,24000,200),48000)) < 2 * 10 ** (-50 / 20.0)
+
+def test_band_pass_passes_the_band_only():
+  taps = FilterDesign.band_pass(1,11025,500,4200,200)
+  assert abs(response(taps,[2000],11025)[0] - 1) < 0.01
+  assert np.max(response(taps,[0,200,4500,5000],11025)) < 0.01
+
+def test_complex_band_pass_is_one_sided():
+  taps = FilterDesign.complex_band_pass(1,48000,1000,5000,500)
+  assert abs(response(taps,[3000],48000)[0] - 1) < 0.01
+  assert response(taps,[-3000],48000)[0] < 0.01
+
+def test_hits_misses_and_read_only_taps():
+  cache = TapCache.TapCache()
+  calls = []
+  def design():
+    calls.append(1)
+    return np.ones(5)
+  a = cache.get(('k',1),design)
+  b = cache.get(('k',1),design)
+  assert a is b
+  assert len(calls) == 1
+  assert (cache.hits,cache.misses) == (1,1)
+  with pytest.raises(ValueError):
+    a[0] = 2
+
+def test_least_recently_used_entry_goes_first():
+  cache = TapCache.TapCache(size = 2)
+  cache.get('a',lambda: np.zeros(1))
+  cache.get('b',lambda: np.zeros(1))
+  cache.get('a',lambda: np.zeros(1))
+  cache.get('c',lambda: np.zeros(1))
+  assert list(cache.entries.keys()) == ['a','c']
+
+def test_designs_survive_in_the_directory(tmpdir):
+  directory = os.path.join(str(tmpdir),'taps')
+  taps = TapCache.TapCache(directory = directory).get('k',lambda: np.arange(7.0))
+  assert len(os.listdir(directory)) == 1
+  cache = TapCache.TapCache(directory = directory)
+  again = cache.get('k',lambda: pytest.fail("designed twice"))
+  assert np.array_equal(again,taps)
+  assert not again.flags.writeable
+
+def test_empty_directory_setting_keeps_memory_only():
+  cache = TapCache.TapCache(directory = '')
+  assert cache.directory == None
+  cache.get('k',lambda: np.zeros(3))
+  assert cache.misses == 1
+
+def test_shared_helpers_return_the_designs():
+  low = TapCache.low_pass(1,2000000,10000,100000)
+  assert np.array_equal(low,FilterDesign.low_pass(1,2000000,10000,100000))
+  assert TapCache.low_pass(1,2000000,10000,100000) is low